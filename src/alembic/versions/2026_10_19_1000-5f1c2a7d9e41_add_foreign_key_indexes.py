@@ -0,0 +1,49 @@
+"""add foreign key indexes
+
+Revision ID: 5f1c2a7d9e41
+Revises: 3b299e0fe97c
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f1c2a7d9e41"
+down_revision: Union[str, None] = "3b299e0fe97c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("likes", "tweet_id"),
+    ("tweets", "user_id"),
+    ("followers", "follower_id"),
+    ("tweet_media_association", "tweet_id"),
+]  # Внешние ключи, по которым идут соединения в ленте, профилях и каскадных удалениях
+
+
+def upgrade() -> None:
+    # Индексы строятся без блокировки записи в таблицы, поэтому вне транзакции
+    with op.get_context().autocommit_block():
+        for table, column in INDEXES:
+            op.create_index(
+                op.f(f"ix_{table}_{column}"),
+                table,
+                [column],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in INDEXES:
+            op.drop_index(
+                op.f(f"ix_{table}_{column}"),
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
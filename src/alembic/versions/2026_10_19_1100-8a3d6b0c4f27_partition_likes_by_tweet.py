@@ -0,0 +1,155 @@
+"""partition likes by tweet
+
+Revision ID: 8a3d6b0c4f27
+Revises: 5f1c2a7d9e41
+Create Date: 2026-10-19 11:00:00.000000
+
+Таблица likes заменяется секционированной по хэшу tweet_id без остановки записи:
+1) создается секционированная таблица likes_partitioned, а триггер на likes
+   повторяет в ней все новые вставки и удаления;
+2) существующие строки копируются пачками, каждая пачка в своей транзакции;
+3) в короткой транзакции таблицы меняются местами.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a3d6b0c4f27"
+down_revision: Union[str, None] = "5f1c2a7d9e41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16  # Количество секций, совпадает с LIKES_PARTITIONS в модели
+BATCH_SIZE = 10_000  # Количество строк, копируемых в одной транзакции
+
+
+def copy_in_batches(source: str, target: str) -> None:
+    """
+    Копирует строки лайков из одной таблицы в другую пачками по идентификатору.
+    Строки пачки блокируются на время копирования,
+    чтобы параллельное удаление дождалось копии и удалило ее через триггер.
+    """
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT max(id) FROM {source}")).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                f"""
+                INSERT INTO {target} (id, user_id, tweet_id)
+                SELECT id, user_id, tweet_id FROM {source}
+                WHERE id > :start AND id <= :end
+                FOR SHARE
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def create_sync_trigger(source: str, target: str) -> None:
+    """
+    Создает триггер, повторяющий вставки и удаления строк source в target.
+    """
+    op.execute(
+        f"""
+        CREATE FUNCTION {source}_sync_to_{target}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO {target} (id, user_id, tweet_id)
+                VALUES (NEW.id, NEW.user_id, NEW.tweet_id)
+                ON CONFLICT DO NOTHING;
+            ELSE
+                DELETE FROM {target} WHERE id = OLD.id AND tweet_id = OLD.tweet_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER {source}_sync_to_{target}
+        AFTER INSERT OR DELETE ON {source}
+        FOR EACH ROW EXECUTE FUNCTION {source}_sync_to_{target}()
+        """
+    )
+
+
+def swap_tables(old: str, new: str) -> None:
+    """
+    Удаляет старую таблицу лайков и переименовывает новую вместе с ограничениями и индексами.
+    """
+    op.execute(f"LOCK TABLE {old} IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER {old}_sync_to_{new} ON {old}")
+    op.execute(f"DROP FUNCTION {old}_sync_to_{new}()")
+    op.execute(f"ALTER SEQUENCE likes_id_seq OWNED BY {new}.id")
+    op.execute(f"DROP TABLE {old}")
+    op.execute(f"ALTER TABLE {new} RENAME TO likes")
+    op.execute(f"ALTER TABLE likes RENAME CONSTRAINT {new}_pkey TO likes_pkey")
+    op.execute(
+        f"ALTER TABLE likes RENAME CONSTRAINT {new}_user_id_fkey TO likes_user_id_fkey"
+    )
+    op.execute(
+        f"ALTER TABLE likes RENAME CONSTRAINT {new}_tweet_id_fkey TO likes_tweet_id_fkey"
+    )
+    op.execute(
+        f"ALTER TABLE likes RENAME CONSTRAINT {new}_uniq_user_tweet "
+        "TO idx_uniq_user_tweet"
+    )
+    op.execute(f"ALTER INDEX ix_{new}_tweet_id RENAME TO ix_likes_tweet_id")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE likes_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('likes_id_seq'),
+            user_id INTEGER NOT NULL,
+            tweet_id INTEGER NOT NULL,
+            CONSTRAINT likes_partitioned_pkey PRIMARY KEY (id, tweet_id),
+            CONSTRAINT likes_partitioned_uniq_user_tweet UNIQUE (user_id, tweet_id),
+            CONSTRAINT likes_partitioned_user_id_fkey FOREIGN KEY (user_id)
+                REFERENCES users (id) ON DELETE CASCADE,
+            CONSTRAINT likes_partitioned_tweet_id_fkey FOREIGN KEY (tweet_id)
+                REFERENCES tweets (id) ON DELETE CASCADE
+        ) PARTITION BY HASH (tweet_id)
+        """
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE likes_p{remainder} PARTITION OF likes_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.create_index("ix_likes_partitioned_tweet_id", "likes_partitioned", ["tweet_id"])
+    create_sync_trigger(source="likes", target="likes_partitioned")
+    with op.get_context().autocommit_block():
+        copy_in_batches(source="likes", target="likes_partitioned")
+    swap_tables(old="likes", new="likes_partitioned")
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE likes_plain (
+            id INTEGER NOT NULL DEFAULT nextval('likes_id_seq'),
+            user_id INTEGER NOT NULL,
+            tweet_id INTEGER NOT NULL,
+            CONSTRAINT likes_plain_pkey PRIMARY KEY (id),
+            CONSTRAINT likes_plain_uniq_user_tweet UNIQUE (user_id, tweet_id),
+            CONSTRAINT likes_plain_user_id_fkey FOREIGN KEY (user_id)
+                REFERENCES users (id) ON DELETE CASCADE,
+            CONSTRAINT likes_plain_tweet_id_fkey FOREIGN KEY (tweet_id)
+                REFERENCES tweets (id) ON DELETE CASCADE
+        )
+        """
+    )
+    op.create_index("ix_likes_plain_tweet_id", "likes_plain", ["tweet_id"])
+    create_sync_trigger(source="likes", target="likes_plain")
+    with op.get_context().autocommit_block():
+        copy_in_batches(source="likes", target="likes_plain")
+    swap_tables(old="likes", new="likes_plain")
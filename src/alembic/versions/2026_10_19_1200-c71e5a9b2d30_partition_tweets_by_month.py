@@ -0,0 +1,302 @@
+"""partition tweets by month
+
+Revision ID: c71e5a9b2d30
+Revises: 8a3d6b0c4f27
+Create Date: 2026-10-19 12:00:00.000000
+
+В таблицу tweets добавляется дата создания, а сама таблица заменяется
+секционированной по месяцам даты создания без остановки записи:
+1) создается секционированная таблица tweets_partitioned с секциями на текущий
+   и несколько следующих месяцев, а триггер на tweets повторяет в ней все изменения;
+2) существующие строки копируются пачками, каждая пачка в своей транзакции;
+3) в короткой транзакции таблицы меняются местами.
+
+Первичный ключ секционированной таблицы должен включать ключ секционирования,
+поэтому внешние ключи likes.tweet_id и tweet_media_association.tweet_id
+заменяются триггерами: при вставке проверяется существование твита,
+при удалении твита удаляются его лайки и связи с картинками.
+Существующим твитам проставляется время применения миграции.
+
+Функция create_tweets_partitions(months_ahead) создает секции на текущий
+и months_ahead следующих месяцев. Ее вызывает приложение при запуске.
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71e5a9b2d30"
+down_revision: Union[str, None] = "8a3d6b0c4f27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3  # На сколько месяцев вперед создаются секции
+BATCH_SIZE = 10_000  # Количество строк, копируемых в одной транзакции
+REFERENCING_TABLES = [
+    ("likes", "likes_tweet_id_fkey"),
+    ("tweet_media_association", "tweet_media_association_tweet_id_fkey"),
+]  # Таблицы, ссылающиеся на твиты, и названия их внешних ключей
+
+CREATE_TWEETS_PARTITIONS = """
+CREATE FUNCTION create_tweets_partitions(months_ahead integer) RETURNS void AS $$
+DECLARE
+    month_start timestamptz;
+    month_end timestamptz;
+    partition_name text;
+BEGIN
+    FOR month_number IN 0..months_ahead LOOP
+        month_start := (
+            date_trunc('month', now() AT TIME ZONE 'UTC')
+            + make_interval(months => month_number)
+        ) AT TIME ZONE 'UTC';
+        month_end := (
+            (month_start AT TIME ZONE 'UTC') + interval '1 month'
+        ) AT TIME ZONE 'UTC';
+        partition_name := 'tweets_' || to_char(month_start AT TIME ZONE 'UTC', '"y"YYYY"m"MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        -- Секцию нельзя создать, если твиты ее месяца уже попали в секцию по умолчанию
+        IF EXISTS (
+            SELECT 1 FROM tweets_default
+            WHERE created_at >= month_start AND created_at < month_end
+        ) THEN
+            RAISE WARNING 'tweets_default contains rows for %, partition is not created',
+                partition_name;
+            CONTINUE;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF tweets FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_end
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CHECK_TWEET_EXISTS = """
+CREATE FUNCTION check_tweet_exists() RETURNS trigger AS $$
+BEGIN
+    PERFORM 1 FROM tweets WHERE id = NEW.tweet_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION
+            'insert or update on table "%" violates foreign key constraint "%"',
+            TG_ARGV[0], TG_ARGV[1]
+            USING
+                ERRCODE = 'foreign_key_violation',
+                DETAIL = format(
+                    'Key (tweet_id)=(%s) is not present in table "tweets".', NEW.tweet_id
+                );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+DELETE_TWEET_REFERENCES = """
+CREATE FUNCTION delete_tweet_references() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM likes WHERE tweet_id = OLD.id;
+    DELETE FROM tweet_media_association WHERE tweet_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def get_month_start(moment: datetime, months_ahead: int = 0) -> datetime:
+    """
+    Возвращает начало месяца в UTC, отстоящего от moment на months_ahead месяцев.
+    """
+    month = moment.year * 12 + moment.month - 1 + months_ahead
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def create_month_partitions(table: str, months_ahead: int) -> None:
+    """
+    Создает секции таблицы твитов на текущий и months_ahead следующих месяцев.
+    """
+    now = datetime.now(timezone.utc)
+    for month_number in range(months_ahead + 1):
+        month_start = get_month_start(now, month_number)
+        month_end = get_month_start(now, month_number + 1)
+        op.execute(
+            f"CREATE TABLE tweets_{month_start:y%Ym%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')"
+        )
+
+
+def copy_in_batches(source: str, target: str, columns: str) -> None:
+    """
+    Копирует строки твитов из одной таблицы в другую пачками по идентификатору.
+    Строки пачки блокируются на время копирования,
+    чтобы параллельное удаление дождалось копии и удалило ее через триггер.
+    """
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT max(id) FROM {source}")).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                f"""
+                INSERT INTO {target} ({columns})
+                SELECT {columns} FROM {source}
+                WHERE id > :start AND id <= :end
+                FOR SHARE
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def create_sync_trigger(source: str, target: str, columns: list[str]) -> None:
+    """
+    Создает триггер, повторяющий вставки, изменения и удаления строк source в target.
+    """
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    updates = ", ".join(f"{column} = NEW.{column}" for column in columns)
+    op.execute(
+        f"""
+        CREATE FUNCTION {source}_sync_to_{target}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO {target} ({", ".join(columns)}) VALUES ({new_values})
+                ON CONFLICT DO NOTHING;
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE {target} SET {updates} WHERE id = OLD.id;
+            ELSE
+                DELETE FROM {target} WHERE id = OLD.id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER {source}_sync_to_{target}
+        AFTER INSERT OR UPDATE OR DELETE ON {source}
+        FOR EACH ROW EXECUTE FUNCTION {source}_sync_to_{target}()
+        """
+    )
+
+
+def swap_tables(old: str, new: str) -> None:
+    """
+    Удаляет старую таблицу твитов и переименовывает новую вместе с ограничениями и индексами.
+    Внешние ключи ссылающихся таблиц должны быть удалены заранее.
+    """
+    op.execute(f"DROP TRIGGER {old}_sync_to_{new} ON {old}")
+    op.execute(f"DROP FUNCTION {old}_sync_to_{new}()")
+    op.execute(f"ALTER SEQUENCE tweets_id_seq OWNED BY {new}.id")
+    op.execute(f"DROP TABLE {old}")
+    op.execute(f"ALTER TABLE {new} RENAME TO tweets")
+    op.execute(f"ALTER TABLE tweets RENAME CONSTRAINT {new}_pkey TO tweets_pkey")
+    op.execute(
+        f"ALTER TABLE tweets RENAME CONSTRAINT {new}_user_id_fkey TO tweets_user_id_fkey"
+    )
+    op.execute(f"ALTER INDEX ix_{new}_user_id RENAME TO ix_tweets_user_id")
+
+
+def lock_tweets_and_references() -> None:
+    """
+    Блокирует таблицу твитов и ссылающиеся на нее таблицы до конца транзакции.
+    """
+    tables = ", ".join(["tweets"] + [table for table, _ in REFERENCING_TABLES])
+    op.execute(f"LOCK TABLE {tables} IN ACCESS EXCLUSIVE MODE")
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        CREATE TABLE tweets_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('tweets_id_seq'),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            content TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            CONSTRAINT tweets_partitioned_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT tweets_partitioned_user_id_fkey FOREIGN KEY (user_id)
+                REFERENCES users (id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE tweets_default PARTITION OF tweets_partitioned DEFAULT")
+    create_month_partitions("tweets_partitioned", MONTHS_AHEAD)
+    op.create_index("ix_tweets_partitioned_user_id", "tweets_partitioned", ["user_id"])
+    columns = ["id", "created_at", "content", "user_id"]
+    create_sync_trigger(source="tweets", target="tweets_partitioned", columns=columns)
+    with op.get_context().autocommit_block():
+        copy_in_batches(
+            source="tweets", target="tweets_partitioned", columns=", ".join(columns)
+        )
+
+    lock_tweets_and_references()
+    for table, constraint in REFERENCING_TABLES:
+        op.drop_constraint(constraint, table, type_="foreignkey")
+    swap_tables(old="tweets", new="tweets_partitioned")
+
+    op.execute(CREATE_TWEETS_PARTITIONS)
+    op.execute(CHECK_TWEET_EXISTS)
+    op.execute(DELETE_TWEET_REFERENCES)
+    for table, constraint in REFERENCING_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {constraint}
+            AFTER INSERT OR UPDATE OF tweet_id ON {table}
+            FOR EACH ROW EXECUTE FUNCTION check_tweet_exists('{table}', '{constraint}')
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER tweets_delete_references
+        AFTER DELETE ON tweets
+        FOR EACH ROW EXECUTE FUNCTION delete_tweet_references()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE tweets_plain (
+            id INTEGER NOT NULL DEFAULT nextval('tweets_id_seq'),
+            content TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            CONSTRAINT tweets_plain_pkey PRIMARY KEY (id),
+            CONSTRAINT tweets_plain_user_id_fkey FOREIGN KEY (user_id)
+                REFERENCES users (id) ON DELETE CASCADE
+        )
+        """
+    )
+    op.create_index("ix_tweets_plain_user_id", "tweets_plain", ["user_id"])
+    columns = ["id", "content", "user_id"]
+    create_sync_trigger(source="tweets", target="tweets_plain", columns=columns)
+    with op.get_context().autocommit_block():
+        copy_in_batches(
+            source="tweets", target="tweets_plain", columns=", ".join(columns)
+        )
+
+    lock_tweets_and_references()
+    op.execute("DROP TRIGGER tweets_delete_references ON tweets")
+    for table, constraint in REFERENCING_TABLES:
+        op.execute(f"DROP TRIGGER {constraint} ON {table}")
+    op.execute("DROP FUNCTION delete_tweet_references()")
+    op.execute("DROP FUNCTION check_tweet_exists()")
+    op.execute("DROP FUNCTION create_tweets_partitions(integer)")
+    swap_tables(old="tweets", new="tweets_plain")
+    for table, constraint in REFERENCING_TABLES:
+        op.create_foreign_key(
+            constraint, table, "tweets", ["tweet_id"], ["id"], ondelete="CASCADE"
+        )
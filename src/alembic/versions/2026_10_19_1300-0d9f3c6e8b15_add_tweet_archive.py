@@ -0,0 +1,74 @@
+"""add tweet archive
+
+Revision ID: 0d9f3c6e8b15
+Revises: c71e5a9b2d30
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0d9f3c6e8b15"
+down_revision: Union[str, None] = "c71e5a9b2d30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "archived_tweets",
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("content", sa.TEXT(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_archived_tweets_user_id"), "archived_tweets", ["user_id"])
+    op.create_table(
+        "archived_likes",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["tweet_id"], ["archived_tweets.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "tweet_id", name="idx_uniq_archived_user_tweet"),
+    )
+    op.create_index(op.f("ix_archived_likes_tweet_id"), "archived_likes", ["tweet_id"])
+    op.create_table(
+        "archived_tweet_media_association",
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("media_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["media_id"], ["medias.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["tweet_id"], ["archived_tweets.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("media_id"),
+    )
+    op.create_index(
+        op.f("ix_archived_tweet_media_association_tweet_id"),
+        "archived_tweet_media_association",
+        ["tweet_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("archived_tweet_media_association")
+    op.drop_table("archived_likes")
+    op.drop_table("archived_tweets")
@@ -0,0 +1,115 @@
+"""add tweet ranking columns
+
+Revision ID: e4a7b19c6d52
+Revises: 0d9f3c6e8b15
+Create Date: 2026-10-19 14:00:00.000000
+
+В таблицу tweets добавляются количество лайков и горячесть твита, см. src.core.ranking.
+Колонки со значениями по умолчанию добавляются без перезаписи таблицы,
+затем заполняются пачками, каждая пачка в своей транзакции.
+Секционированную таблицу нельзя индексировать с CONCURRENTLY, поэтому индекс
+создается только на родительской таблице, строится на каждой секции отдельно
+и присоединяется к родительскому.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7b19c6d52"
+down_revision: Union[str, None] = "0d9f3c6e8b15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000  # Количество твитов, заполняемых в одной транзакции
+HOT_EPOCH = "2024-01-01T00:00:00+00:00"  # Совпадает с HOT_EPOCH в src.core.ranking
+HOT_DECAY = 45000  # Совпадает с HOT_DECAY в src.core.ranking
+INDEXES = {
+    "ix_tweets_hot": ["hot_score", "id"],
+    "ix_tweets_top": ["like_count", "created_at", "id"],
+    "ix_tweets_new": ["created_at", "id"],
+}  # Названия индексов лент и их колонки
+
+
+def get_partitions() -> list[str]:
+    """
+    Возвращает названия секций таблицы твитов.
+    """
+    result = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT inhrelid::regclass::text FROM pg_inherits
+            WHERE inhparent = 'tweets'::regclass
+            """
+        )
+    )
+    return list(result.scalars())
+
+
+def fill_in_batches() -> None:
+    """
+    Заполняет количество лайков и горячесть твитов пачками по идентификатору.
+    """
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM tweets")).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                f"""
+                UPDATE tweets SET
+                    like_count = counts.like_count,
+                    hot_score = log(greatest(counts.like_count, 1)::double precision)
+                        + extract(epoch FROM (created_at - TIMESTAMPTZ '{HOT_EPOCH}'))
+                        ::double precision / {HOT_DECAY}
+                FROM (
+                    SELECT tweets.id, count(likes.id) AS like_count
+                    FROM tweets LEFT JOIN likes ON likes.tweet_id = tweets.id
+                    WHERE tweets.id > :start AND tweets.id <= :end
+                    GROUP BY tweets.id
+                ) AS counts
+                WHERE tweets.id = counts.id
+                """
+            ),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column("like_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "hot_score",
+            sa.Float(),
+            server_default=sa.text(
+                f"extract(epoch FROM (now() - TIMESTAMPTZ '{HOT_EPOCH}')) / {HOT_DECAY}"
+            ),
+            nullable=False,
+        ),
+    )
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON ONLY tweets ({', '.join(columns)})")
+    with op.get_context().autocommit_block():
+        fill_in_batches()
+        for partition in get_partitions():
+            for name, columns in INDEXES.items():
+                partition_index = f"{partition}_{'_'.join(columns)}_idx"
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} "
+                    f"ON {partition} ({', '.join(columns)})"
+                )
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="tweets")
+    op.drop_column("tweets", "hot_score")
+    op.drop_column("tweets", "like_count")
@@ -0,0 +1,35 @@
+"""add like counter shards
+
+Revision ID: f2b8c4d1a937
+Revises: e4a7b19c6d52
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b8c4d1a937"
+down_revision: Union[str, None] = "e4a7b19c6d52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tweet_like_counter_shards",
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.SmallInteger(), nullable=False),
+        sa.Column("delta", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("tweet_id", "shard", name="idx_uniq_tweet_shard"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tweet_like_counter_shards")
@@ -0,0 +1,55 @@
+"""index following pages
+
+Revision ID: 1c6e9a4f7b28
+Revises: f2b8c4d1a937
+Create Date: 2026-10-19 16:00:00.000000
+
+Индекс по follower_id заменяется индексом (follower_id, user_id),
+из которого страницы подписок читаются уже упорядоченными.
+Новый индекс строится без блокировки записи, старый удаляется после него.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1c6e9a4f7b28"
+down_revision: Union[str, None] = "f2b8c4d1a937"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_followers_follower_id_user_id",
+            "followers",
+            ["follower_id", "user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_followers_follower_id",
+            table_name="followers",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_followers_follower_id",
+            "followers",
+            ["follower_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_followers_follower_id_user_id",
+            table_name="followers",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
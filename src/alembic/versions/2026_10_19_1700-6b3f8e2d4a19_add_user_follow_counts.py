@@ -0,0 +1,68 @@
+"""add user follow counts
+
+Revision ID: 6b3f8e2d4a19
+Revises: 1c6e9a4f7b28
+Create Date: 2026-10-19 17:00:00.000000
+
+В таблицу users добавляются количество подписчиков и подписок.
+Колонки со значением по умолчанию добавляются без перезаписи таблицы,
+затем заполняются пачками, каждая пачка в своей транзакции.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6b3f8e2d4a19"
+down_revision: Union[str, None] = "1c6e9a4f7b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000  # Количество пользователей, заполняемых в одной транзакции
+
+
+def fill_in_batches() -> None:
+    """
+    Заполняет количество подписчиков и подписок пользователей пачками по идентификатору.
+    """
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM users")).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                """
+                UPDATE users SET
+                    followers_count = (
+                        SELECT count(*) FROM followers WHERE followers.user_id = users.id
+                    ),
+                    following_count = (
+                        SELECT count(*) FROM followers
+                        WHERE followers.follower_id = users.id
+                    )
+                WHERE users.id > :start AND users.id <= :end
+                """
+            ),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("followers_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "users",
+        sa.Column("following_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        fill_in_batches()
+
+
+def downgrade() -> None:
+    op.drop_column("users", "following_count")
+    op.drop_column("users", "followers_count")
@@ -0,0 +1,52 @@
+"""add follow suggestions
+
+Revision ID: 9d4e2a7c5b13
+Revises: 6b3f8e2d4a19
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4e2a7c5b13"
+down_revision: Union[str, None] = "6b3f8e2d4a19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "follow_suggestions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("suggested_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["suggested_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "suggested_id", name="idx_uniq_user_suggestion"),
+    )
+    op.create_index(
+        op.f("ix_follow_suggestions_suggested_id"),
+        "follow_suggestions",
+        ["suggested_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_follow_suggestions_suggested_id"), table_name="follow_suggestions"
+    )
+    op.drop_table("follow_suggestions")
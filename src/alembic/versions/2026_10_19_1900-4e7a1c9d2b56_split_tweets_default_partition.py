@@ -0,0 +1,119 @@
+"""split tweets default partition
+
+Revision ID: 4e7a1c9d2b56
+Revises: 9d4e2a7c5b13
+Create Date: 2026-10-19 19:00:00.000000
+
+Функция create_tweets_partitions(months_ahead) заменяется версией для задания
+src.jobs.partitions, которое запускается по расписанию, а не при запуске приложения:
+- секция создается отдельной таблицей и подключается через ATTACH PARTITION,
+  поэтому таблица tweets блокируется только в режиме SHARE UPDATE EXCLUSIVE,
+  не мешающем чтению и записи;
+- твиты месяца, уже попавшие в секцию по умолчанию, переносятся в новую секцию
+  до ее подключения. Триггер удаления лайков и картинок на время переноса отключается;
+- функция возвращает количество созданных секций.
+
+Одновременный запуск нескольких заданий исключает advisory-блокировка,
+которую берет вызывающий код.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e7a1c9d2b56"
+down_revision: Union[str, None] = "9d4e2a7c5b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CREATE_TWEETS_PARTITIONS = """
+CREATE FUNCTION create_tweets_partitions(months_ahead integer) RETURNS integer AS $$
+DECLARE
+    month_start timestamptz;
+    month_end timestamptz;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    FOR month_number IN 0..months_ahead LOOP
+        month_start := (
+            date_trunc('month', now() AT TIME ZONE 'UTC')
+            + make_interval(months => month_number)
+        ) AT TIME ZONE 'UTC';
+        month_end := (
+            (month_start AT TIME ZONE 'UTC') + interval '1 month'
+        ) AT TIME ZONE 'UTC';
+        partition_name := 'tweets_' || to_char(month_start AT TIME ZONE 'UTC', '"y"YYYY"m"MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        -- Подключение секции проверяет секцию по умолчанию, поэтому она блокируется
+        -- до переноса твитов, чтобы в нее не попали новые твиты месяца
+        LOCK TABLE tweets_default IN ACCESS EXCLUSIVE MODE;
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE tweets INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+            partition_name
+        );
+        ALTER TABLE tweets_default DISABLE TRIGGER tweets_delete_references;
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM tweets_default'
+            '    WHERE created_at >= $1 AND created_at < $2 RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            partition_name
+        ) USING month_start, month_end;
+        ALTER TABLE tweets_default ENABLE TRIGGER tweets_delete_references;
+        EXECUTE format(
+            'ALTER TABLE tweets ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_end
+        );
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_TWEETS_PARTITIONS_OLD = """
+CREATE FUNCTION create_tweets_partitions(months_ahead integer) RETURNS void AS $$
+DECLARE
+    month_start timestamptz;
+    month_end timestamptz;
+    partition_name text;
+BEGIN
+    FOR month_number IN 0..months_ahead LOOP
+        month_start := (
+            date_trunc('month', now() AT TIME ZONE 'UTC')
+            + make_interval(months => month_number)
+        ) AT TIME ZONE 'UTC';
+        month_end := (
+            (month_start AT TIME ZONE 'UTC') + interval '1 month'
+        ) AT TIME ZONE 'UTC';
+        partition_name := 'tweets_' || to_char(month_start AT TIME ZONE 'UTC', '"y"YYYY"m"MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        -- Секцию нельзя создать, если твиты ее месяца уже попали в секцию по умолчанию
+        IF EXISTS (
+            SELECT 1 FROM tweets_default
+            WHERE created_at >= month_start AND created_at < month_end
+        ) THEN
+            RAISE WARNING 'tweets_default contains rows for %, partition is not created',
+                partition_name;
+            CONTINUE;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF tweets FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_end
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute("DROP FUNCTION create_tweets_partitions(integer)")
+    op.execute(CREATE_TWEETS_PARTITIONS)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION create_tweets_partitions(integer)")
+    op.execute(CREATE_TWEETS_PARTITIONS_OLD)
@@ -0,0 +1,67 @@
+"""add like versions
+
+Revision ID: 8c2f5d7e1a94
+Revises: 4e7a1c9d2b56
+Create Date: 2026-10-19 20:00:00.000000
+
+Таблица like_versions хранит номер последнего записанного изменения лайка
+каждой пары (пользователь, твит) из буфера лайков. Триггер удаления твита
+удаляет и строки его пар.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2f5d7e1a94"
+down_revision: Union[str, None] = "4e7a1c9d2b56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DELETE_TWEET_REFERENCES = """
+CREATE OR REPLACE FUNCTION delete_tweet_references() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM likes WHERE tweet_id = OLD.id;
+    DELETE FROM tweet_media_association WHERE tweet_id = OLD.id;
+    DELETE FROM like_versions WHERE tweet_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+DELETE_TWEET_REFERENCES_OLD = """
+CREATE OR REPLACE FUNCTION delete_tweet_references() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM likes WHERE tweet_id = OLD.id;
+    DELETE FROM tweet_media_association WHERE tweet_id = OLD.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "like_versions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "tweet_id", name="idx_uniq_like_version"),
+    )
+    op.create_index(
+        op.f("ix_like_versions_tweet_id"), "like_versions", ["tweet_id"], unique=False
+    )
+    op.execute(DELETE_TWEET_REFERENCES)
+
+
+def downgrade() -> None:
+    op.execute(DELETE_TWEET_REFERENCES_OLD)
+    op.drop_index(op.f("ix_like_versions_tweet_id"), table_name="like_versions")
+    op.drop_table("like_versions")
@@ -3,18 +3,54 @@
 """
 
 from collections.abc import AsyncGenerator
+from time import perf_counter
+from typing import Any
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from .pool import InstrumentedQueuePool
+from .query_stats import current_query_stats, get_repository_caller
+from .replicas import ReplicaSet, RoutingSession
 from .settings import settings
 
 
+def get_prepared_statement_name() -> str:
+    """
+    Возвращает уникальное имя подготовленного запроса asyncpg.
+    Имена вида __asyncpg_stmt_1__ повторяются на разных клиентских соединениях
+    и конфликтуют, когда PgBouncer отдает одно соединение с базой нескольким клиентам.
+    """
+    return f"__asyncpg_{uuid4()}__"
+
+
 class DBHelper:
     """
     Класс - помощник для работы с базой данных.
     """
 
-    def __init__(self, url: str, echo: bool = False) -> None:
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        query_stats: bool = True,
+        replica_urls: list[str] | None = None,
+        replica_ejection_time: float = 30,
+        pgbouncer_transaction_mode: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        name: str | None = None,
+    ) -> None:
         """
         Инициализация класса.
 
@@ -23,17 +59,141 @@ class DBHelper:
         echo: Принимает значения True или False
 
         Если установлен в True, то в консоль будут выводиться запросы к базе. По умолчанию False.
+
+        query_stats: Принимает значения True или False.
+        Если установлен в True, то запросы к базе учитываются в статистике http-запроса. По умолчанию True.
+
+        replica_urls: Строки для подключения к репликам базы данных.
+        Если переданы, то чтения из методов репозиториев с декоратором replica_read выполняются на репликах.
+
+        replica_ejection_time: На сколько секунд исключается реплика, к которой не удалось подключиться
+
+        pgbouncer_transaction_mode: Принимает значения True или False.
+        Если установлен в True, то кэш подготовленных запросов asyncpg отключается,
+        а подготовленные запросы получают уникальные имена.
+        Это нужно для работы через PgBouncer в режиме пула транзакций,
+        где соседние запросы сессии могут попасть на разные соединения с базой. По умолчанию False.
+
+        pool_size: Количество соединений, которые пул держит открытыми
+        max_overflow: Сколько соединений сверх pool_size можно открыть при пиковой нагрузке
+        pool_timeout: Сколько секунд ждать свободное соединение, прежде чем вызвать исключение
+        pool_recycle: Через сколько секунд соединение переоткрывается. -1 - не переоткрывается
+        pool_pre_ping: Проверять ли соединение перед выдачей из пула
+        name: Название помощника в метках метрик пула. Пулы называются {name}-primary
+        и {name}-replica-N, чтобы метрики разных помощников не смешивались.
+        Если не передано, пулы называются primary и replica-N
         """
-        self.engine = create_async_engine(
-            url=url,
-            echo=echo,
+        self.query_stats = query_stats
+        self.pgbouncer_transaction_mode = pgbouncer_transaction_mode
+        self.pool_options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+        }  # Параметры пула соединений для всех двигателей
+        prefix = f"{name}-" if name else ""  # Префикс названий пулов в метриках
+        self.engine = self.create_engine(
+            url=url, echo=echo, name=f"{prefix}primary"
         )  # Двигатель для работы с асинхронной базой данных
+        self.replicas = (
+            ReplicaSet(
+                engines=[
+                    self.create_engine(
+                        url=replica_url, echo=echo, name=f"{prefix}replica-{index}"
+                    )
+                    for index, replica_url in enumerate(replica_urls)
+                ],
+                ejection_time=replica_ejection_time,
+            )
+            if replica_urls
+            else None
+        )  # Реплики базы данных для выполнения запросов на чтение
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             autocommit=False,
             expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            info={"replicas": self.replicas},
         )  # Фабрика сессий для работы с асинхронной базой данных
 
+    def create_engine(self, url: str, echo: bool, name: str) -> AsyncEngine:
+        """
+        Создает двигатель для работы с асинхронной базой данных.
+
+        Параметры:
+        url: Строка для подключения к базе данных
+        echo: Принимает значения True или False
+        name: Название пула соединений в метриках
+
+        Возвращает двигатель, запросы которого учитываются в статистике, если она включена.
+        """
+        connect_args = {}
+        if self.pgbouncer_transaction_mode:
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": get_prepared_statement_name,
+            }
+        engine = create_async_engine(
+            url=url,
+            echo=echo,
+            connect_args=connect_args,
+            poolclass=InstrumentedQueuePool,
+            pool_logging_name=name,
+            **self.pool_options,
+        )
+        if self.query_stats:
+            event.listen(
+                engine.sync_engine,
+                "before_cursor_execute",
+                self.before_cursor_execute,
+            )
+            event.listen(
+                engine.sync_engine,
+                "after_cursor_execute",
+                self.after_cursor_execute,
+            )
+        return engine
+
+    @staticmethod
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext,
+        executemany: bool,
+    ) -> None:
+        """
+        Запоминает время начала выполнения запроса, если для текущего http-запроса собирается статистика.
+        """
+        if current_query_stats.get() is not None:
+            conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+    @staticmethod
+    def after_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext,
+        executemany: bool,
+    ) -> None:
+        """
+        Добавляет выполненный запрос в статистику текущего http-запроса.
+        """
+        stats = current_query_stats.get()
+        start_times = conn.info.get("query_start_time")
+        if stats is None or not start_times:
+            return
+        stats.add_statement(
+            statement=statement,
+            duration=perf_counter() - start_times.pop(),
+            rowcount=cursor.rowcount,
+            caller=get_repository_caller(),
+        )
+
     async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
         """
         Возвращает сессию для асинхронной работы с базой данных.
@@ -46,4 +206,13 @@ class DBHelper:
 db_helper = DBHelper(
     url=settings.db.database_url,
     echo=settings.db.echo,
+    query_stats=settings.db.query_stats,
+    replica_urls=settings.db.replica_urls,
+    replica_ejection_time=settings.db.replica_ejection_time,
+    pgbouncer_transaction_mode=settings.db.pgbouncer_transaction_mode,
+    pool_size=settings.db.pool_size,
+    max_overflow=settings.db.max_overflow,
+    pool_timeout=settings.db.pool_timeout,
+    pool_recycle=settings.db.pool_recycle,
+    pool_pre_ping=settings.db.pool_pre_ping,
 )
@@ -0,0 +1,202 @@
+"""
+Модуль с кэшем ленты твитов в памяти процесса.
+
+Кэш хранит отдельно порядок твитов каждой страницы ленты и готовый JSON каждого твита.
+Страница собирается склейкой JSON твитов, поэтому лайк одного твита сбрасывает только
+его JSON и порядок страниц, а остальные твиты страницы отдаются из памяти.
+
+JSON твита хранится по ключу (твит, версия). Сброс твита выдает ему новую версию,
+а старая запись вытесняется из LRU. Версия запоминается до чтения твита из базы,
+поэтому запрос, прочитавший твит до изменения и сохранивший его после сброса,
+положит JSON под старую версию, которую больше никто не запросит.
+
+Порядок страниц хранится в кэше SwrCache. Создание твита или лайк в этом процессе удаляет
+порядок страниц, поэтому следующий запрос, в том числе запрос автора, читает его из базы.
+Сбросы других процессов кэш получает через шину invalidation_bus, если она включена:
+они делают порядок устаревшим, и следующий запрос получает прежний порядок,
+пока новый читается в фоне. Иначе JSON твита хранится fragment_ttl секунд,
+а порядок страниц обновляется по истечении своего срока.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from time import monotonic
+
+from .db_helper import db_helper
+from .invalidation_bus import invalidation_bus
+from .metrics import metrics
+from .ranking import FeedSort
+from .settings import settings
+from .swr_cache import SwrCache
+
+# Сортировка, номер страницы и размер страницы ленты
+PageKey = tuple[FeedSort, int | None, int | None]
+
+MAX_PAGES = 1000  # Сколько страниц ленты хранит кэш порядка твитов
+
+FEED_CACHE_REQUESTS = metrics.counter(
+    "feed_cache_requests_total",
+    "Number of tweet fragment lookups in the feed cache by result (hit, miss)",
+)
+FEED_CACHE_INVALIDATIONS = metrics.counter(
+    "feed_cache_invalidations_total", "Number of tweets invalidated in the feed cache"
+)
+
+
+def get_page_key(offset: int | None, limit: int | None, sort: FeedSort) -> PageKey:
+    """
+    Возвращает ключ страницы ленты. Без номера или размера страницы лента отдается целиком,
+    поэтому такие запросы получают один ключ.
+
+    Параметры:
+
+    offset: Номер страницы
+    limit: Размер страницы
+    sort: Порядок твитов
+    """
+    if offset and limit:
+        return sort, offset, limit
+    return sort, None, None
+
+
+class FeedCache:
+    """
+    Класс - кэш порядка твитов страниц ленты и JSON отдельных твитов.
+    """
+
+    def __init__(
+        self,
+        max_fragments: int,
+        fragment_ttl: float,
+        pages: SwrCache[list[int]],
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        max_fragments: Сколько твитов хранит кэш
+        fragment_ttl: Сколько секунд хранится JSON твита
+        pages: Кэш идентификаторов твитов страниц по порядку
+        clock: Функция, возвращающая текущее время в секундах
+        """
+        self.max_fragments = max_fragments
+        self.fragment_ttl = fragment_ttl
+        self.pages = pages
+        self.clock = clock
+        # JSON твитов по ключу (твит, версия) и время окончания хранения
+        self.fragments: OrderedDict[tuple[int, int], tuple[float, bytes]] = (
+            OrderedDict()
+        )
+        self.versions: dict[int, int] = {}  # Версии твитов, сброшенных после очистки
+        self.last_version = 0  # Последняя выданная версия. Версии не повторяются
+        self.epoch = 0  # Версия твитов, не сброшенных после очистки
+
+    def get_version(self, tweet_id: int) -> int:
+        """
+        Возвращает текущую версию твита.
+
+        Параметры:
+
+        tweet_id: Идентификатор твита
+        """
+        return self.versions.get(tweet_id, self.epoch)
+
+    def get_fragment(self, tweet_id: int, version: int) -> bytes | None:
+        """
+        Возвращает JSON твита указанной версии или None, если его нет или он устарел.
+
+        Параметры:
+
+        tweet_id: Идентификатор твита
+        version: Версия твита
+        """
+        key = (tweet_id, version)
+        entry = self.fragments.get(key)
+        if entry is None or entry[0] <= self.clock():
+            FEED_CACHE_REQUESTS.inc(result="miss")
+            return None
+        self.fragments.move_to_end(key)
+        FEED_CACHE_REQUESTS.inc(result="hit")
+        return entry[1]
+
+    def set_fragment(self, tweet_id: int, version: int, fragment: bytes) -> None:
+        """
+        Сохраняет JSON твита, вытесняя давно не запрошенные твиты.
+
+        Параметры:
+
+        tweet_id: Идентификатор твита
+        version: Версия твита, полученная до чтения твита из базы
+        fragment: JSON твита
+        """
+        key = (tweet_id, version)
+        self.fragments[key] = (self.clock() + self.fragment_ttl, fragment)
+        self.fragments.move_to_end(key)
+        while len(self.fragments) > self.max_fragments:
+            self.fragments.popitem(last=False)
+
+    def invalidate_pages(self, remote: bool = False) -> None:
+        """
+        Сбрасывает порядок твитов всех страниц, например после создания твита.
+        После изменения этого процесса порядок удаляется, по уведомлению другого процесса
+        становится устаревшим.
+
+        Параметры:
+
+        remote: True, если сброс пришел от другого процесса
+        """
+        if remote:
+            self.pages.invalidate()
+        else:
+            self.pages.clear()
+
+    def invalidate_tweets(self, tweet_ids: Iterable[int], remote: bool = False) -> None:
+        """
+        Сбрасывает JSON твитов и порядок твитов всех страниц, например после лайка.
+
+        Параметры:
+
+        tweet_ids: Идентификаторы измененных или удаленных твитов
+        remote: True, если сброс пришел от другого процесса
+        """
+        tweet_ids = set(tweet_ids)
+        FEED_CACHE_INVALIDATIONS.inc(len(tweet_ids))
+        if len(self.versions) + len(tweet_ids) > self.max_fragments:
+            self.clear()  # Версии не копятся бесконечно
+            return
+        for tweet_id in tweet_ids:
+            self.last_version += 1
+            self.versions[tweet_id] = self.last_version
+        self.invalidate_pages(remote)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш. Все твиты получают новую версию.
+        """
+        self.fragments.clear()
+        self.versions.clear()
+        self.last_version += 1
+        self.epoch = self.last_version
+        self.pages.clear()
+
+
+feed_cache = FeedCache(
+    max_fragments=settings.db.feed_cache_size,
+    fragment_ttl=settings.db.feed_cache_fragment_ttl,
+    pages=SwrCache(
+        name="feed",
+        soft_ttl=settings.db.feed_cache_ids_ttl,
+        hard_ttl=settings.db.feed_cache_ids_hard_ttl,
+        stale_if_error=settings.db.cache_stale_if_error,
+        max_entries=MAX_PAGES,
+        session_factory=db_helper.session_factory,
+    ),
+)
+invalidation_bus.subscribe(
+    "tweet", lambda keys: feed_cache.invalidate_tweets(keys, remote=True)
+)
+invalidation_bus.subscribe(
+    "feed", lambda keys: feed_cache.invalidate_pages(remote=True)
+)
+invalidation_bus.subscribe_flush(feed_cache.clear)
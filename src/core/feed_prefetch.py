@@ -0,0 +1,166 @@
+"""
+Модуль с предзагрузкой следующей страницы ленты в кэш ленты.
+
+После ответа на страницу k лента загружает страницу k + 1 в кэш в фоновой задаче
+с отдельной сессией, поэтому, когда пользователь долистает до нее, страница отдается из памяти.
+Предзагрузка идет через то же объединение одновременных чтений, что и запросы, поэтому запрос
+следующей страницы, пришедший во время предзагрузки, дожидается ее, а не читает страницу заново.
+
+Одновременно выполняется не больше max_concurrency предзагрузок в процессе. Под нагрузкой,
+когда в пуле нет свободных соединений, предзагрузка пропускается, чтобы не занимать соединения
+сверх pool_size и не задерживать запросы пользователей.
+
+Запрос страницы после первой считается попаданием, если эта страница загружается сейчас
+или была предзагружена не раньше чем ttl секунд назад. Доля попаданий показывает, как часто предзагрузка
+избавляет пользователя от ожидания базы при листании.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import AbstractAsyncContextManager
+from time import monotonic
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_helper import db_helper
+from .feed_cache import MAX_PAGES
+from .metrics import metrics
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+FEED_PREFETCHES = metrics.counter(
+    "feed_prefetches_total",
+    "Number of next feed page prefetches by result: done, failed,"
+    " budget (skipped, too many prefetches running), busy (skipped, no idle connections)",
+)
+FEED_PREFETCH_REQUESTS = metrics.counter(
+    "feed_prefetch_requests_total",
+    "Number of requests for feed pages after the first by result:"
+    " hit (the page was prefetched), miss",
+)
+
+
+class FeedPrefetcher:
+    """
+    Класс - предзагрузка страниц ленты в фоне.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_pages: int,
+        ttl: float,
+        session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+        is_busy: Callable[[], bool] = lambda: False,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        max_concurrency: Сколько предзагрузок выполняется одновременно
+        max_pages: Сколько предзагруженных страниц запоминается для подсчета попаданий
+        ttl: Сколько секунд предзагруженная страница считается попаданием
+        session_factory: Функция, открывающая сессию для предзагрузки
+        is_busy: Функция, проверяющая, что свободных соединений нет
+        clock: Функция, возвращающая текущее время в секундах
+        """
+        self.max_concurrency = max_concurrency
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.is_busy = is_busy
+        self.clock = clock
+        self.tasks: dict[Hashable, asyncio.Task] = {}  # Выполняемые предзагрузки
+        # Предзагруженные страницы, которые еще не запрашивались, и время окончания хранения
+        self.prefetched: OrderedDict[Hashable, float] = OrderedDict()
+
+    def record_request(self, key: Hashable) -> None:
+        """
+        Учитывает запрос страницы после первой: попадание, если страница была предзагружена
+        или загружается сейчас и запрос дождется предзагрузки.
+
+        Параметры:
+
+        key: Ключ страницы
+        """
+        hit = key in self.tasks or self.prefetched.pop(key, 0) > self.clock()
+        FEED_PREFETCH_REQUESTS.inc(result="hit" if hit else "miss")
+
+    def start(
+        self, key: Hashable, load: Callable[[AsyncSession], Awaitable[Any]]
+    ) -> None:
+        """
+        Запускает предзагрузку страницы, если она еще не загружена или не загружается
+        и бюджет предзагрузок и пул соединений это позволяют.
+
+        Параметры:
+
+        key: Ключ страницы
+        load: Функция, загружающая страницу в кэш в переданной сессии
+        """
+        if key in self.tasks or self.prefetched.get(key, 0) > self.clock():
+            return
+        if len(self.tasks) >= self.max_concurrency:
+            FEED_PREFETCHES.inc(result="budget")
+            return
+        if self.is_busy():
+            FEED_PREFETCHES.inc(result="busy")
+            return
+        task = asyncio.create_task(self.prefetch(key, load))
+        self.tasks[key] = task
+        task.add_done_callback(lambda _: self.tasks.pop(key, None))
+
+    async def prefetch(
+        self, key: Hashable, load: Callable[[AsyncSession], Awaitable[Any]]
+    ) -> None:
+        """
+        Загружает страницу в отдельной сессии и запоминает ее для подсчета попаданий.
+
+        Параметры:
+
+        key: Ключ страницы
+        load: Функция, загружающая страницу в кэш в переданной сессии
+        """
+        try:
+            async with self.session_factory() as session:
+                await load(session)
+        except Exception:
+            FEED_PREFETCHES.inc(result="failed")
+            logger.warning("Failed to prefetch feed page %s", key, exc_info=True)
+            return
+        FEED_PREFETCHES.inc(result="done")
+        self.prefetched[key] = self.clock() + self.ttl
+        self.prefetched.move_to_end(key)
+        while len(self.prefetched) > self.max_pages:
+            self.prefetched.popitem(last=False)
+
+    async def stop(self) -> None:
+        """
+        Отменяет выполняемые предзагрузки.
+        """
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def is_pool_busy() -> bool:
+    """
+    Проверяет, что все соединения пула основной базы заняты.
+    """
+    pool = db_helper.engine.pool
+    return pool.checkedout() >= pool.size()
+
+
+feed_prefetcher = FeedPrefetcher(
+    max_concurrency=settings.db.feed_prefetch_concurrency,
+    max_pages=MAX_PAGES,
+    ttl=settings.db.feed_cache_ids_hard_ttl,
+    session_factory=db_helper.session_factory,
+    is_busy=is_pool_busy,
+)
@@ -0,0 +1,272 @@
+"""
+Модуль со снимком ленты твитов в файле, общем для всех процессов приложения.
+
+Задание src.jobs.feed_snapshot каждые feed_snapshot_interval секунд читает первые
+feed_snapshot_size твитов ленты в каждом порядке, сохраняет готовый JSON твитов в файл
+и заменяет им прежний снимок через os.replace. Процессы приложения отображают файл в память
+(mmap) и собирают страницы из срезов отображения без запросов к базе и без разбора JSON.
+Память отображения общая для всех процессов, поэтому снимок хранится в памяти один раз.
+
+Замена файла атомарна: процесс видит либо прежний снимок, либо новый целиком.
+Раз в reload_interval секунд процесс проверяет, не заменен ли файл, и отображает новый.
+Страницы за пределами снимка и запросы при снимке старше max_age секунд
+обслуживаются как обычно.
+
+Формат файла (порядок байт платформы, разделы выровнены на 8 байт):
+заголовок HEADER, количество твитов каждого порядка (I), номера твитов всех порядков
+подряд (I), начало JSON каждого твита (Q) и JSON всех твитов подряд.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Callable, Sequence
+from time import time
+
+from .metrics import metrics
+from .ranking import FeedSort
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Идентификаторы твитов по порядку и содержит ли порядок все твиты ленты
+SnapshotOrder = tuple[Sequence[int], bool]
+
+MAGIC = b"FEEDSNP1"  # Метка формата в начале файла
+# Метка, количество твитов, порядки со всеми твитами (бит на порядок), время построения
+HEADER = struct.Struct("=8sIId")
+SORTS = list(FeedSort)  # Порядки в снимке в порядке записи
+
+FEED_SNAPSHOT_REQUESTS = metrics.counter(
+    "feed_snapshot_requests_total",
+    "Number of feed pages looked up in the snapshot by result (hit, miss)",
+)
+FEED_SNAPSHOT_TWEETS = metrics.gauge(
+    "feed_snapshot_tweets", "Number of tweets in the mapped feed snapshot"
+)
+
+
+def align(size: int) -> int:
+    """
+    Возвращает размер, дополненный до кратного 8 байтам.
+
+    Параметры:
+
+    size: Размер в байтах
+    """
+    return (size + 7) & ~7
+
+
+def write_snapshot(
+    path: str,
+    orders: dict[FeedSort, SnapshotOrder],
+    fragments: dict[int, bytes],
+    built_at: float | None = None,
+) -> None:
+    """
+    Записывает снимок во временный файл рядом с path и атомарно заменяет им path.
+    Твиты порядков без JSON, например удаленные во время построения, пропускаются.
+
+    Параметры:
+
+    path: Путь к файлу снимка
+    orders: Порядки твитов ленты
+    fragments: JSON твитов по идентификатору
+    built_at: Время построения снимка. По умолчанию текущее
+    """
+    numbers = {tweet_id: number for number, tweet_id in enumerate(fragments)}
+    lengths, positions, complete = array("I"), array("I"), 0
+    for index, sort in enumerate(SORTS):
+        tweet_ids, is_complete = orders.get(sort, ((), False))
+        sort_positions = [
+            numbers[tweet_id] for tweet_id in tweet_ids if tweet_id in numbers
+        ]
+        lengths.append(len(sort_positions))
+        positions.extend(sort_positions)
+        complete |= is_complete << index
+    offsets = array("Q", [0])
+    for fragment in fragments.values():
+        offsets.append(offsets[-1] + len(fragment))
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        header = HEADER.pack(
+            MAGIC, len(fragments), complete, time() if built_at is None else built_at
+        )
+        for section in (header, lengths.tobytes(), positions.tobytes()):
+            file.write(section.ljust(align(len(section)), b"\0"))
+        file.write(offsets.tobytes())
+        file.writelines(fragments.values())
+    os.replace(temp_path, path)
+
+
+class SnapshotView:
+    """
+    Класс - отображенный в память файл снимка.
+    """
+
+    def __init__(self, file_map: mmap.mmap) -> None:
+        """
+        Инициализация класса. Разбирает разделы файла без копирования.
+
+        Параметры:
+        file_map: Отображение файла снимка
+        """
+        self.file_map = file_map
+        buffer = memoryview(file_map)
+        magic, count, self.complete, self.built_at = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Unknown feed snapshot format")
+        start = align(HEADER.size)
+        self.lengths = buffer[start : start + len(SORTS) * 4].cast("I")
+        self.starts = [0]  # Номер первого твита каждого порядка в positions
+        for length in self.lengths:
+            self.starts.append(self.starts[-1] + length)
+        start = align(start + len(SORTS) * 4)
+        self.positions = buffer[start : start + self.starts[-1] * 4].cast("I")
+        start = align(start + self.starts[-1] * 4)
+        self.offsets = buffer[start : start + (count + 1) * 8].cast("Q")
+        self.data = buffer[start + (count + 1) * 8 :]
+        self.count = count
+
+    def get_page(
+        self, offset: int | None, limit: int | None, sort: FeedSort
+    ) -> bytes | None:
+        """
+        Собирает JSON страницы ленты или возвращает None, если страницы нет в снимке.
+
+        Параметры:
+
+        offset: Номер страницы
+        limit: Размер страницы
+        sort: Порядок твитов
+        """
+        index = SORTS.index(sort)
+        length = self.lengths[index]
+        complete = self.complete >> index & 1
+        if offset and limit:
+            first, last = (offset - 1) * limit, offset * limit
+            if last > length and not complete:
+                return None
+        elif complete:
+            first, last = 0, length
+        else:
+            return None
+        base = self.starts[index]
+        offsets, data = self.offsets, self.data
+        tweets = [
+            data[offsets[number] : offsets[number + 1]]
+            for number in self.positions[base + first : base + min(last, length)]
+        ]
+        return b"".join((b'{"result":true,"tweets":[', b",".join(tweets), b"]}"))
+
+
+class FeedSnapshot:
+    """
+    Класс - снимок ленты, отображенный в память процесса.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        reload_interval: float,
+        max_age: float,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        path: Путь к файлу снимка
+        reload_interval: Через сколько секунд проверяется, не заменен ли файл
+        max_age: Сколько секунд после построения снимок отдается
+        clock: Функция, возвращающая текущее время в секундах с начала эпохи
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.max_age = max_age
+        self.clock = clock
+        self.view: SnapshotView | None = None
+        self.file_id: tuple[int, int] | None = None  # Inode и время изменения файла
+        self.reload_task: asyncio.Task | None = None
+
+    def reload(self) -> None:
+        """
+        Отображает файл снимка, если он заменен с прошлой проверки.
+        Если файл не удалось прочитать, остается прежний снимок.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) == self.file_id:
+            return
+        try:
+            with open(self.path, "rb") as file:
+                # Файл мог быть заменен после проверки, поэтому запоминается открытый файл
+                stat = os.fstat(file.fileno())
+                view = SnapshotView(
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                )
+        except (OSError, ValueError, struct.error):
+            logger.exception("Failed to map feed snapshot %s", self.path)
+            return
+        # Прежнее отображение закрывается, когда на него не останется ссылок
+        self.view, self.file_id = view, (stat.st_ino, stat.st_mtime_ns)
+        FEED_SNAPSHOT_TWEETS.set(view.count)
+
+    def get_page(
+        self, offset: int | None, limit: int | None, sort: FeedSort
+    ) -> bytes | None:
+        """
+        Возвращает JSON страницы ленты из снимка или None, если ее нужно читать из базы.
+
+        Параметры:
+
+        offset: Номер страницы
+        limit: Размер страницы
+        sort: Порядок твитов
+        """
+        view = self.view
+        page = None
+        if view is not None and self.clock() - view.built_at < self.max_age:
+            page = view.get_page(offset=offset, limit=limit, sort=sort)
+        FEED_SNAPSHOT_REQUESTS.inc(result="miss" if page is None else "hit")
+        return page
+
+    async def start(self) -> None:
+        """
+        Отображает снимок и запускает периодическую проверку файла.
+        """
+        self.reload()
+        self.reload_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическую проверку файла.
+        """
+        if self.reload_task is not None:
+            self.reload_task.cancel()
+            try:
+                await self.reload_task
+            except asyncio.CancelledError:
+                pass
+            self.reload_task = None
+
+    async def run(self) -> None:
+        """
+        Проверяет файл снимка каждые reload_interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            self.reload()
+
+
+feed_snapshot = FeedSnapshot(
+    path=settings.db.feed_snapshot_path,
+    reload_interval=settings.db.feed_snapshot_reload_interval,
+    max_age=settings.db.feed_snapshot_max_age,
+)
@@ -0,0 +1,317 @@
+"""
+Модуль с индексом графа подписок в памяти процесса.
+
+Подписки хранятся в двух направлениях в формате CSR (compressed sparse row):
+для каждого пользователя в массиве offsets хранится начало его строки в массиве targets,
+а строка - отсортированные id пользователей, на которых он подписан (или которые подписаны на него).
+Массивы из модуля array занимают 8 байт на пользователя и 4 байта на подписку в каждом направлении.
+Проверка подписки - двоичный поиск по строке, страница соседей - срез строки.
+
+Подписки и отписки текущего процесса попадают в наложение поверх массивов.
+Подписки других процессов приходят через шину сбросов и тоже попадают в наложение,
+а без шины становятся видны после перезагрузки индекса из базы,
+которая выполняется каждые reload_interval секунд. Изменения, сделанные во время перезагрузки,
+повторно накладываются на новый индекс, поэтому не теряются.
+"""
+
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import AsyncIterator, Callable, Iterator
+from heapq import merge
+from time import perf_counter
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Пары (пользователь, сосед), отсортированные по паре
+Edges = AsyncIterator[tuple[int, int]]
+# Изменения строк: True - сосед добавлен, False - удален
+Overlay = dict[int, dict[int, bool]]
+
+FOLLOW_GRAPH_EDGES = metrics.gauge(
+    "follow_graph_edges", "Number of follow edges loaded into the in-memory index"
+)
+FOLLOW_GRAPH_RELOAD_SECONDS = metrics.histogram(
+    "follow_graph_reload_seconds",
+    "Time spent reloading the in-memory follow graph index from the database",
+    buckets=[0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+)
+
+
+class CompressedRows:
+    """
+    Класс - строки соседей всех пользователей в формате CSR.
+    """
+
+    def __init__(self, offsets: array, targets: array) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        offsets: Начало строки каждого пользователя в targets. Последний элемент - длина targets
+        targets: Отсортированные строки соседей, записанные подряд
+        """
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    async def build(cls, edges: Edges) -> "CompressedRows":
+        """
+        Строит строки из пар, отсортированных по пользователю и соседу,
+        не собирая пары в промежуточный список.
+
+        Параметры:
+
+        edges: Пары (пользователь, сосед)
+        """
+        offsets = array("q", [0])
+        targets = array("i")
+        async for node, target in edges:
+            while len(offsets) <= node:
+                offsets.append(len(targets))
+            targets.append(target)
+        offsets.append(len(targets))
+        return cls(offsets=offsets, targets=targets)
+
+    def bounds(self, node: int) -> tuple[int, int]:
+        """
+        Возвращает начало и конец строки пользователя в targets.
+
+        Параметры:
+
+        node: Идентификатор пользователя
+        """
+        if node + 1 >= len(self.offsets):
+            return 0, 0
+        return self.offsets[node], self.offsets[node + 1]
+
+    def contains(self, node: int, target: int) -> bool:
+        """
+        Проверяет, есть ли сосед в строке пользователя.
+
+        Параметры:
+
+        node: Идентификатор пользователя
+        target: Идентификатор соседа
+        """
+        start, end = self.bounds(node)
+        index = bisect_left(self.targets, target, start, end)
+        return index < end and self.targets[index] == target
+
+    def iterate(self, node: int, after_id: int) -> Iterator[int]:
+        """
+        Перебирает соседей пользователя с id больше after_id по возрастанию.
+
+        Параметры:
+
+        node: Идентификатор пользователя
+        after_id: Идентификатор соседа, после которого начинается перебор
+        """
+        start, end = self.bounds(node)
+        start = bisect_right(self.targets, after_id, start, end)
+        return (self.targets[index] for index in range(start, end))
+
+
+class FollowGraph:
+    """
+    Класс - индекс графа подписок в памяти процесса.
+    """
+
+    def __init__(
+        self,
+        reload_interval: float,
+        load: Callable[[bool], Edges],
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        reload_interval: Через сколько секунд индекс перезагружается из базы
+        load: Функция, отдающая пары (подписчик, пользователь), если передано True,
+        и пары (пользователь, подписчик), если передано False, отсортированные по паре
+        """
+        self.reload_interval = reload_interval
+        self.load = load
+        self.following = CompressedRows(array("q", [0]), array("i"))
+        self.followers = CompressedRows(array("q", [0]), array("i"))
+        self.following_overlay: Overlay = {}
+        self.followers_overlay: Overlay = {}
+        # Изменения, сделанные во время перезагрузки
+        self.pending: list[tuple[int, int, bool]] | None = None
+        self.loaded = False  # Загружен ли индекс хотя бы один раз
+        self.reload_lock = asyncio.Lock()  # Перезагрузки выполняются по одной
+        self.reload_task: asyncio.Task | None = None
+        self.background_reloads: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """
+        Загружает индекс и запускает периодическую перезагрузку.
+        """
+        await self.reload()
+        self.reload_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическую перезагрузку и перезагрузки в фоне.
+        """
+        tasks = [*self.background_reloads]
+        if self.reload_task is not None:
+            tasks.append(self.reload_task)
+            self.reload_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self) -> None:
+        """
+        Перезагружает индекс каждые reload_interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.try_reload()
+
+    async def try_reload(self) -> None:
+        """
+        Перезагружает индекс, записывая ошибку в лог.
+        """
+        try:
+            await self.reload()
+        except Exception:
+            logger.exception("Failed to reload follow graph")
+
+    def schedule_reload(self) -> None:
+        """
+        Запускает перезагрузку индекса в фоне, если индекс уже загружен.
+        Незагруженный индекс загрузится при запуске и без этого.
+        """
+        if not self.loaded:
+            return
+        task = asyncio.create_task(self.try_reload())
+        self.background_reloads.add(task)
+        task.add_done_callback(self.background_reloads.discard)
+
+    async def reload(self) -> None:
+        """
+        Строит индекс заново из базы и заменяет им текущий.
+        Изменения, сделанные во время построения, накладываются на новый индекс.
+        """
+        async with self.reload_lock:
+            start = perf_counter()
+            self.pending = []
+            try:
+                following = await CompressedRows.build(self.load(True))
+                followers = await CompressedRows.build(self.load(False))
+            except BaseException:
+                self.pending = None
+                raise
+            pending, self.pending = self.pending, None
+            self.following, self.followers = following, followers
+            self.following_overlay, self.followers_overlay = {}, {}
+            for follower_id, user_id, is_following in pending:
+                self.update(follower_id, user_id, is_following)
+            self.loaded = True
+            FOLLOW_GRAPH_EDGES.set(len(following.targets))
+            FOLLOW_GRAPH_RELOAD_SECONDS.observe(perf_counter() - start)
+
+    def update(self, follower_id: int, user_id: int, is_following: bool) -> None:
+        """
+        Учитывает подписку или отписку.
+
+        Параметры:
+
+        follower_id: Идентификатор подписчика
+        user_id: Идентификатор пользователя, на которого подписываются
+        is_following: True при подписке, False при отписке
+        """
+        self.following_overlay.setdefault(follower_id, {})[user_id] = is_following
+        self.followers_overlay.setdefault(user_id, {})[follower_id] = is_following
+        if self.pending is not None:
+            self.pending.append((follower_id, user_id, is_following))
+
+    def is_following(self, follower_id: int, user_id: int) -> bool:
+        """
+        Проверяет, подписан ли один пользователь на другого.
+
+        Параметры:
+
+        follower_id: Идентификатор подписчика
+        user_id: Идентификатор пользователя
+        """
+        changed = self.following_overlay.get(follower_id, {}).get(user_id)
+        if changed is not None:
+            return changed
+        return self.following.contains(follower_id, user_id)
+
+    @staticmethod
+    def get_neighbors(
+        rows: CompressedRows,
+        overlay: Overlay,
+        node: int,
+        after_id: int,
+        limit: int | None,
+    ) -> list[int]:
+        """
+        Возвращает соседей пользователя по возрастанию id с учетом наложения.
+
+        Параметры:
+
+        rows: Строки соседей
+        overlay: Изменения строк
+        node: Идентификатор пользователя
+        after_id: Идентификатор соседа, после которого начинается страница
+        limit: Количество соседей. Если не передано, возвращаются все
+        """
+        changes = overlay.get(node, {})
+        added = sorted(
+            target
+            for target, is_added in changes.items()
+            if is_added and target > after_id
+        )
+        neighbors = (
+            target
+            for target in merge(rows.iterate(node, after_id), added)
+            if changes.get(target, True)
+        )
+        result = []
+        for target in neighbors:
+            if result and result[-1] == target:
+                continue  # Подписка есть и в массивах, и в наложении
+            result.append(target)
+            if limit is not None and len(result) == limit:
+                break
+        return result
+
+    def get_following(
+        self, user_id: int, after_id: int = 0, limit: int | None = None
+    ) -> list[int]:
+        """
+        Возвращает id пользователей, на которых подписан пользователь, по возрастанию.
+
+        Параметры:
+
+        user_id: Идентификатор пользователя
+        after_id: Идентификатор, после которого начинается страница
+        limit: Количество пользователей. Если не передано, возвращаются все
+        """
+        return self.get_neighbors(
+            self.following, self.following_overlay, user_id, after_id, limit
+        )
+
+    def get_followers(
+        self, user_id: int, after_id: int = 0, limit: int | None = None
+    ) -> list[int]:
+        """
+        Возвращает id подписчиков пользователя по возрастанию.
+
+        Параметры:
+
+        user_id: Идентификатор пользователя
+        after_id: Идентификатор, после которого начинается страница
+        limit: Количество подписчиков. Если не передано, возвращаются все
+        """
+        return self.get_neighbors(
+            self.followers, self.followers_overlay, user_id, after_id, limit
+        )
@@ -0,0 +1,90 @@
+"""
+Модуль с определением популярных твитов, счетчики лайков которых нужно шардировать.
+
+Процесс считает лайки и снятия лайков каждого твита в окне фиксированной длины.
+Если за окно их набралось больше, чем like_rate * window, твит считается популярным
+на promotion_time секунд, и его счетчик лайков меняется через шарды.
+Лента читает только строку твита, поэтому лайки, записанные в шарды, влияют
+на порядок ленты с задержкой: до их переноса в строку твита заданием like_counters.
+Каждый процесс решает независимо: шарды лишь откладывают изменения счетчика,
+поэтому процессы, по-разному считающие твит популярным, не портят его.
+"""
+
+from collections import Counter
+from collections.abc import Callable
+from time import monotonic
+
+from .metrics import metrics
+from .settings import settings
+
+HOT_TWEET_PROMOTIONS = metrics.counter(
+    "hot_tweet_promotions_total",
+    "Number of tweets whose like counter was switched to sharded mode",
+)
+HOT_TWEETS = metrics.gauge(
+    "hot_tweets", "Number of tweets with a sharded like counter in this process"
+)
+
+
+class HotTweetDetector:
+    """
+    Класс, определяющий популярные твиты по частоте лайков.
+    """
+
+    def __init__(
+        self,
+        like_rate: float,
+        window: float,
+        promotion_time: float,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        like_rate: Сколько лайков в секунду делает твит популярным
+        window: Длина окна подсчета лайков в секундах
+        promotion_time: Сколько секунд твит остается популярным после превышения порога
+        clock: Функция, возвращающая текущее время в секундах
+        """
+        self.like_rate = like_rate
+        self.window = window
+        self.promotion_time = promotion_time
+        self.clock = clock
+        self.window_start = clock()
+        self.likes: Counter[int] = Counter()  # Лайки твитов в текущем окне
+        self.promoted: dict[int, float] = {}  # Популярные твиты и время окончания
+
+    def record_like(self, tweet_id: int) -> bool:
+        """
+        Учитывает лайк или снятие лайка твита.
+
+        Параметры:
+
+        tweet_id: Идентификатор твита
+
+        Возвращает True, если счетчик лайков твита нужно менять через шарды.
+        """
+        now = self.clock()
+        if now - self.window_start >= self.window:
+            self.window_start = now
+            self.likes.clear()
+            self.promoted = {
+                tweet_id: expires
+                for tweet_id, expires in self.promoted.items()
+                if expires > now
+            }
+        self.likes[tweet_id] += 1
+        if self.likes[tweet_id] > self.like_rate * self.window:
+            if tweet_id not in self.promoted:
+                HOT_TWEET_PROMOTIONS.inc()
+            self.promoted[tweet_id] = now + self.promotion_time
+        HOT_TWEETS.set(len(self.promoted))
+        return self.promoted.get(tweet_id, 0) > now
+
+
+hot_tweets = HotTweetDetector(
+    like_rate=settings.db.hot_tweet_like_rate,
+    window=settings.db.hot_tweet_window,
+    promotion_time=settings.db.hot_tweet_promotion_time,
+)
@@ -0,0 +1,244 @@
+"""
+Модуль с шиной сбросов кэшей между процессами через LISTEN/NOTIFY в Postgres.
+
+Пути записи публикуют сброс через pg_notify в той же транзакции, что и изменения.
+Postgres доставляет уведомление только после коммита, поэтому другие процессы не сбросят кэш
+раньше, чем изменения станут видны, и не сбросят его из-за откаченной транзакции.
+
+Каждый процесс держит отдельное соединение asyncpg вне пула, подписанное на канал,
+и вызывает обработчики сбросов для уведомлений других процессов.
+Свои уведомления пропускаются: процесс сбрасывает кэш сам после коммита.
+Уведомления, отправленные, пока соединения не было, теряются, поэтому после каждого
+подключения все кэши очищаются целиком. Обрыв соединения обнаруживается по закрытию
+соединения или по проверочному запросу каждые ping_interval секунд, после чего
+соединение открывается заново.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+from uuid import uuid4
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db_helper import db_helper
+from .metrics import metrics
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько чисел в ключах отправляется в одном уведомлении. Размер ограничен 8000 байт
+KEYS_PER_NOTIFICATION = 500
+# Ошибки соединения слушателя, после которых оно открывается заново
+LISTENER_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+)
+
+INVALIDATION_BUS_PUBLISHED = metrics.counter(
+    "invalidation_bus_published_total", "Number of invalidation notifications sent"
+)
+INVALIDATION_BUS_RECEIVED = metrics.counter(
+    "invalidation_bus_received_total",
+    "Number of invalidation notifications received from other processes",
+)
+INVALIDATION_BUS_FLUSHES = metrics.counter(
+    "invalidation_bus_flushes_total",
+    "Number of full cache flushes after (re)connecting the listener",
+)
+
+
+class InvalidationBus:
+    """
+    Класс - шина сбросов кэшей между процессами.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        connect: Callable[[], Awaitable[asyncpg.Connection]],
+        reconnect_interval: float,
+        ping_interval: float,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        channel: Название канала уведомлений
+        connect: Функция, открывающая соединение asyncpg для подписки на канал
+        reconnect_interval: Через сколько секунд повторяется подключение после ошибки
+        ping_interval: Через сколько секунд без уведомлений соединение проверяется запросом
+        """
+        self.channel = channel
+        self.connect = connect
+        self.reconnect_interval = reconnect_interval
+        self.ping_interval = ping_interval
+        self.origin = uuid4().hex  # Идентификатор процесса в уведомлениях
+        self.handlers: dict[str, list[Callable[[list[Any]], None]]] = {}
+        self.flush_handlers: list[Callable[[], None]] = []
+        self.listen_task: asyncio.Task | None = None
+
+    def subscribe(self, kind: str, handler: Callable[[list[Any]], None]) -> None:
+        """
+        Добавляет обработчик сбросов одного вида.
+
+        Параметры:
+
+        kind: Вид сброса, например tweet или profile
+        handler: Функция, сбрасывающая кэш по ключам
+        """
+        self.handlers.setdefault(kind, []).append(handler)
+
+    def subscribe_flush(self, handler: Callable[[], None]) -> None:
+        """
+        Добавляет обработчик полной очистки, вызываемый после каждого подключения.
+
+        Параметры:
+
+        handler: Функция, очищающая кэш целиком
+        """
+        self.flush_handlers.append(handler)
+
+    async def publish(
+        self, session: AsyncSession, kind: str, keys: Sequence[Any] = ()
+    ) -> None:
+        """
+        Публикует сброс в текущей транзакции без коммита.
+        Другие процессы получат его после коммита. Если шина выключена, ничего не делает.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        kind: Вид сброса
+        keys: Ключи сброса - числа или списки чисел одной длины
+        """
+        if not settings.db.invalidation_bus_enabled:
+            return
+        keys = list(keys)
+        width = len(keys[0]) if keys and isinstance(keys[0], Sequence) else 1
+        step = max(KEYS_PER_NOTIFICATION // width, 1)
+        for start in range(0, max(len(keys), 1), step):
+            payload = json.dumps(
+                {
+                    "origin": self.origin,
+                    "kind": kind,
+                    "keys": keys[start : start + step],
+                },
+                separators=(",", ":"),
+            )
+            await session.execute(select(func.pg_notify(self.channel, payload)))
+            INVALIDATION_BUS_PUBLISHED.inc(kind=kind)
+
+    def on_notification(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        """
+        Вызывает обработчики сброса из уведомления другого процесса.
+
+        Параметры:
+
+        connection: Соединение, получившее уведомление
+        pid: Идентификатор процесса Postgres, отправившего уведомление
+        channel: Название канала
+        payload: Содержимое уведомления
+        """
+        message = json.loads(payload)
+        if message["origin"] == self.origin:
+            return
+        INVALIDATION_BUS_RECEIVED.inc(kind=message["kind"])
+        for handler in self.handlers.get(message["kind"], []):
+            try:
+                handler(message["keys"])
+            except Exception:
+                logger.exception("Failed to handle %s invalidation", message["kind"])
+
+    def flush(self) -> None:
+        """
+        Очищает все кэши, подписанные на полную очистку.
+        """
+        INVALIDATION_BUS_FLUSHES.inc()
+        for handler in self.flush_handlers:
+            handler()
+
+    async def start(self) -> None:
+        """
+        Запускает подписку на канал.
+        """
+        self.listen_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает подписку на канал.
+        """
+        if self.listen_task is not None:
+            self.listen_task.cancel()
+            try:
+                await self.listen_task
+            except asyncio.CancelledError:
+                pass
+            self.listen_task = None
+
+    async def run(self) -> None:
+        """
+        Держит подписку на канал, переподключаясь после обрывов соединения.
+        """
+        while True:
+            try:
+                connection = await self.connect()
+            except LISTENER_ERRORS:
+                logger.warning("Failed to connect invalidation listener")
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+            try:
+                await self.listen(connection)
+            except LISTENER_ERRORS:
+                logger.warning("Invalidation listener disconnected")
+            finally:
+                connection.terminate()
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def listen(self, connection: asyncpg.Connection) -> None:
+        """
+        Подписывается на канал, очищает кэши и ждет, пока соединение не закроется.
+
+        Параметры:
+
+        connection: Соединение asyncpg
+        """
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        await connection.add_listener(self.channel, self.on_notification)
+        self.flush()  # Уведомления, отправленные без подписки, потеряны
+        while not connection.is_closed():
+            try:
+                await asyncio.wait_for(closed.wait(), self.ping_interval)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(
+                    connection.execute("SELECT 1"), self.ping_interval
+                )
+
+
+def get_listen_url() -> str:
+    """
+    Возвращает строку для подключения слушателя уведомлений.
+    По умолчанию слушатель подключается к основной базе, как и пул соединений.
+    """
+    if settings.db.invalidation_listen_url:
+        return settings.db.invalidation_listen_url
+    return db_helper.engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+
+invalidation_bus = InvalidationBus(
+    channel=settings.db.invalidation_channel,
+    connect=lambda: asyncpg.connect(get_listen_url()),
+    reconnect_interval=settings.db.invalidation_reconnect_interval,
+    ping_interval=settings.db.invalidation_ping_interval,
+)
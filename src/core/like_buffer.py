@@ -0,0 +1,344 @@
+"""
+Модуль с буфером лайков, записываемых в базу пачками.
+
+Лайк подтверждается после того, как он записан в журнал на диске и журнал сброшен
+через fsync. Одновременные запросы ждут общий fsync, поэтому на каждый запрос
+не приходится отдельная синхронизация диска. В памяти хранится только итоговое
+состояние каждой пары (пользователь, твит): лайк, затем снятие лайка и снова лайк
+дают одну запись.
+
+Каждое изменение получает номер - время записи в наносекундах, строго растущее
+в пределах процесса. В базе хранится номер последнего записанного изменения пары,
+и изменение записывается, только если оно новее. Поэтому лайк, сброшенный одним процессом
+позже снятия лайка другим процессом, или проигранный журнал упавшего процесса
+не отменяют более новое изменение. Порядок изменений разных процессов определяется
+их часами.
+
+Журнал процесса состоит из сегментов. При сбросе в базу текущий сегмент закрывается
+для записи, новые лайки пишутся в следующий, а закрытые сегменты удаляются только
+после коммита пачки. Все сегменты процесса заблокированы через flock.
+
+Восстановление после сбоя: при запуске процесс забирает сегменты, которые никто
+не блокирует, то есть сегменты упавших процессов, и проигрывает их в порядке записи.
+Применение пачки идемпотентно: изменения с уже записанным номером пропускаются,
+а счетчики лайков меняются только на реально вставленные и удаленные строки.
+Поэтому повторное проигрывание уже примененного сегмента ничего не меняет.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from time import perf_counter, time_ns
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LikeKey = tuple[int, int]  # Идентификаторы пользователя и твита
+LikeChange = tuple[bool, int]  # True - лайк стоит, False - снят, и номер изменения
+LikeChanges = dict[LikeKey, LikeChange]  # Итоговое состояние пар
+
+SEGMENT_SUFFIX = ".journal"
+
+LIKE_BUFFER_ENQUEUED = metrics.counter(
+    "like_buffer_enqueued_total", "Number of like changes written to the journal"
+)
+LIKE_BUFFER_FLUSHED = metrics.counter(
+    "like_buffer_flushed_total",
+    "Number of coalesced like changes flushed to the database",
+)
+LIKE_BUFFER_FLUSH_ERRORS = metrics.counter(
+    "like_buffer_flush_errors_total", "Number of failed flushes"
+)
+LIKE_BUFFER_FLUSH_SECONDS = metrics.histogram(
+    "like_buffer_flush_seconds",
+    "Time spent flushing a batch of like changes to the database",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+LIKE_BUFFER_PENDING = metrics.gauge(
+    "like_buffer_pending", "Number of coalesced like changes waiting for a flush"
+)
+
+
+@dataclass
+class Segment:
+    """
+    Сегмент журнала, заблокированный текущим процессом.
+    """
+
+    path: str  # Путь к файлу
+    fd: int  # Дескриптор файла
+    written: int = 0  # Количество записей в сегменте
+    synced: int = 0  # Количество записей, сброшенных на диск
+    sync_task: asyncio.Task | None = field(default=None, repr=False)  # Текущий fsync
+
+    def close(self) -> None:
+        """
+        Удаляет файл сегмента и снимает блокировку.
+        Вызывается, когда fsync сегмента не выполняется, иначе он получит закрытый
+        или уже чужой дескриптор.
+        """
+        os.unlink(self.path)
+        os.close(self.fd)
+
+
+def merge_change(changes: LikeChanges, key: LikeKey, change: LikeChange) -> None:
+    """
+    Добавляет изменение пары, если оно новее уже известного.
+
+    Параметры:
+
+    changes: Итоговое состояние пар
+    key: Пара (пользователь, твит)
+    change: Изменение пары
+    """
+    if key not in changes or changes[key][1] < change[1]:
+        changes[key] = change
+
+
+def parse_segment(fd: int) -> LikeChanges:
+    """
+    Читает изменения лайков из сегмента журнала.
+    Последняя строка без перевода строки могла быть записана не полностью и пропускается.
+    Из нескольких изменений пары остается изменение с наибольшим номером.
+
+    Параметры:
+
+    fd: Дескриптор файла сегмента
+
+    Возвращает итоговое состояние пар из сегмента.
+    """
+    changes = {}
+    with os.fdopen(os.dup(fd), "rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            liked, user_id, tweet_id, version = line.split()
+            merge_change(
+                changes, (int(user_id), int(tweet_id)), (liked == b"1", int(version))
+            )
+    return changes
+
+
+class LikeBuffer:
+    """
+    Класс - буфер лайков, подтверждаемых после записи в журнал и сбрасываемых в базу пачками.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float,
+        apply: Callable[[LikeChanges], Awaitable[None]],
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        directory: Директория для сегментов журнала. Может быть общей для нескольких процессов
+        flush_interval: Через сколько миллисекунд накопленные изменения сбрасываются в базу
+        apply: Функция, записывающая изменения в базу в одной транзакции
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.apply = apply
+        self.changes: LikeChanges = {}  # Изменения, еще не сброшенные в базу
+        self.segment: Segment | None = (
+            None  # Сегмент, в который пишутся новые изменения
+        )
+        self.sealed: list[Segment] = []  # Закрытые для записи сегменты, ждущие коммита
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+        self._start_time = time_ns()  # Начало имен сегментов процесса
+        self._segment_number = 0
+        self._version = 0  # Номер последнего изменения
+
+    def open_segment(self) -> Segment:
+        """
+        Создает новый сегмент журнала и блокирует его.
+        Имена сегментов одного процесса упорядочены по времени создания.
+        """
+        self._segment_number += 1
+        path = os.path.join(
+            self.directory,
+            f"{self._start_time:020d}-{os.getpid()}-"
+            f"{self._segment_number:08d}{SEGMENT_SUFFIX}",
+        )
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)  # Запись о новом файле тоже должна пережить сбой
+        finally:
+            os.close(directory_fd)
+        return Segment(path=path, fd=fd)
+
+    def adopt_orphan_segments(self) -> None:
+        """
+        Забирает сегменты упавших процессов и добавляет их изменения в буфер.
+        Сегменты работающих процессов заблокированы и пропускаются.
+        """
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue  # Сегмент уже забрал другой процесс
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            if os.fstat(fd).st_nlink == 0:
+                os.close(fd)  # Другой процесс успел применить и удалить сегмент
+                continue
+            for key, change in parse_segment(fd).items():
+                merge_change(self.changes, key, change)
+            self.sealed.append(Segment(path=path, fd=fd))
+            logger.warning("Recovered like journal segment %s", path)
+        LIKE_BUFFER_PENDING.set(len(self.changes))
+
+    async def start(self) -> None:
+        """
+        Восстанавливает изменения из сегментов упавших процессов, сбрасывает их в базу
+        и запускает периодический сброс.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.adopt_orphan_segments()
+        self.segment = self.open_segment()
+        await self.flush()
+        self.flush_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодический сброс и сбрасывает оставшиеся изменения.
+        """
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+        await self.flush()
+        segment, self.segment = self.segment, None
+        await self.close_segment(segment)  # После успешного сброса текущий сегмент пуст
+
+    async def run(self) -> None:
+        """
+        Сбрасывает изменения в базу каждые flush_interval миллисекунд.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval / 1000)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush like buffer")
+
+    async def enqueue(self, user_id: int, tweet_id: int, liked: bool) -> None:
+        """
+        Записывает изменение лайка в журнал и ждет, пока журнал будет сброшен на диск.
+
+        Параметры:
+
+        user_id: Идентификатор пользователя
+        tweet_id: Идентификатор твита
+        liked: True, если пользователь поставил лайк, и False, если снял
+        """
+        segment = self.segment
+        self._version = max(time_ns(), self._version + 1)
+        os.write(
+            segment.fd, f"{int(liked)} {user_id} {tweet_id} {self._version}\n".encode()
+        )
+        segment.written += 1
+        self.changes[(user_id, tweet_id)] = (liked, self._version)
+        LIKE_BUFFER_ENQUEUED.inc()
+        LIKE_BUFFER_PENDING.set(len(self.changes))
+        await self.sync(segment, segment.written)
+
+    async def sync(self, segment: Segment, position: int) -> None:
+        """
+        Ждет, пока первые position записей сегмента будут сброшены на диск.
+        Записи, накопившиеся за время выполнения fsync, сбрасываются следующим общим fsync.
+
+        Параметры:
+
+        segment: Сегмент журнала
+        position: Количество записей, которые должны оказаться на диске
+        """
+        while segment.synced < position:
+            if segment.sync_task is None:
+                segment.sync_task = asyncio.create_task(self._fsync(segment))
+            await asyncio.shield(segment.sync_task)
+
+    @staticmethod
+    async def _fsync(segment: Segment) -> None:
+        """
+        Сбрасывает сегмент на диск в отдельном потоке.
+        """
+        position = segment.written
+        try:
+            await asyncio.to_thread(os.fsync, segment.fd)
+            segment.synced = position
+        finally:
+            segment.sync_task = None
+
+    async def close_segment(self, segment: Segment) -> None:
+        """
+        Дожидается fsync всех записей сегмента, затем удаляет его.
+        Запрос, записавший изменение до закрытия сегмента для записи, может еще ждать
+        fsync, поэтому дескриптор закрывается только после него.
+
+        Параметры:
+
+        segment: Сегмент журнала, в который больше не пишут
+        """
+        await self.sync(segment, segment.written)
+        segment.close()
+
+    async def close_sealed(self) -> None:
+        """
+        Удаляет закрытые для записи сегменты, изменения которых уже в базе.
+        """
+        sealed, self.sealed = self.sealed, []
+        for segment in sealed:
+            await self.close_segment(segment)
+
+    async def flush(self) -> int:
+        """
+        Сбрасывает накопленные изменения в базу.
+        Если запись в базу не удалась, изменения возвращаются в буфер, а сегменты остаются на диске.
+
+        Возвращает количество сброшенных изменений.
+        """
+        async with self.flush_lock:
+            if not self.changes:
+                await self.close_sealed()  # Например, пустые сегменты упавшего процесса
+                return 0
+            # Сегмент закрывается для записи до ожидания fsync, поэтому после ожидания
+            # в нем нет записей, которые еще не сброшены на диск
+            segment = self.segment
+            changes, self.changes = self.changes, {}
+            self.sealed.append(segment)
+            self.segment = self.open_segment()
+            start = perf_counter()
+            try:
+                await self.sync(segment, segment.written)
+                await self.apply(changes)
+            except Exception:
+                LIKE_BUFFER_FLUSH_ERRORS.inc()
+                # Более новые изменения важнее
+                for key, change in changes.items():
+                    merge_change(self.changes, key, change)
+                raise
+            finally:
+                LIKE_BUFFER_FLUSH_SECONDS.observe(perf_counter() - start)
+                LIKE_BUFFER_PENDING.set(len(self.changes))
+            await self.close_sealed()
+            LIKE_BUFFER_FLUSHED.inc(len(changes))
+            return len(changes)
@@ -0,0 +1,223 @@
+"""
+Модуль с метриками приложения.
+Метрики хранятся в памяти процесса и отдаются в текстовом формате Prometheus.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+LabelsKey = tuple[tuple[str, str], ...]
+
+
+def get_labels_key(labels: dict[str, str]) -> LabelsKey:
+    """
+    Приводит метки к виду, пригодному для ключа словаря.
+
+    Параметры:
+    labels: Словарь с метками
+
+    Возвращает отсортированный кортеж пар.
+    """
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def render_labels(labels: LabelsKey, **extra: str) -> str:
+    """
+    Возвращает метки в формате Prometheus, например {pool="primary"}.
+
+    Параметры:
+    labels: Метки метрики
+    extra: Дополнительные метки
+    """
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """
+    Базовый класс метрики.
+    """
+
+    kind = "untyped"  # Тип метрики в формате Prometheus
+
+    def __init__(self, name: str, description: str) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        name: Название метрики
+        description: Описание метрики
+        """
+        self.name = name
+        self.description = description
+
+    def render_samples(self) -> list[str]:
+        """
+        Возвращает строки со значениями метрики.
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Возвращает метрику в текстовом формате Prometheus.
+        """
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.render_samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Метрика - счетчик, значения которой только растут.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str) -> None:
+        super().__init__(name, description)
+        self.values: defaultdict[LabelsKey, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Увеличивает значение счетчика.
+
+        Параметры:
+        amount: На сколько увеличить значение
+        labels: Метки значения
+        """
+        self.values[get_labels_key(labels)] += amount
+
+    def get(self, **labels: str) -> float:
+        """
+        Возвращает значение счетчика с переданными метками.
+        """
+        return self.values.get(get_labels_key(labels), 0)
+
+    def render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{render_labels(labels)} {value}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """
+    Метрика, значение которой может как расти, так и уменьшаться.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Устанавливает значение метрики.
+
+        Параметры:
+        value: Новое значение
+        labels: Метки значения
+        """
+        self.values[get_labels_key(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    Метрика - гистограмма, распределяющая наблюдения по корзинам.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: list[float]) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        name: Название метрики
+        description: Описание метрики
+        buckets: Верхние границы корзин по возрастанию
+        """
+        super().__init__(name, description)
+        self.buckets = buckets
+        self.counts: dict[LabelsKey, list[int]] = {}  # Наблюдения по корзинам
+        self.sums: defaultdict[LabelsKey, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Добавляет наблюдение.
+
+        Параметры:
+        value: Наблюдаемое значение
+        labels: Метки значения
+        """
+        key = get_labels_key(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def get_count(self, **labels: str) -> int:
+        """
+        Возвращает количество наблюдений с переданными метками.
+        """
+        return sum(self.counts.get(get_labels_key(labels), []))
+
+    def render_samples(self) -> list[str]:
+        lines = []
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + ["+Inf"], counts):
+                total += count
+                lines.append(
+                    f"{self.name}_bucket{render_labels(labels, le=str(bound))} {total}"
+                )
+            lines.append(f"{self.name}_sum{render_labels(labels)} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{render_labels(labels)} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Класс - реестр всех метрик процесса.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Добавляет метрику в реестр.
+        Если метрика с таким названием уже есть, возвращает существующую.
+
+        Параметры:
+        metric: Метрика
+        """
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        """
+        Возвращает счетчик с переданным названием.
+        """
+        return self.register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """
+        Возвращает метрику - значение с переданным названием.
+        """
+        return self.register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: list[float]) -> Histogram:
+        """
+        Возвращает гистограмму с переданным названием.
+        """
+        return self.register(Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        """
+        Возвращает все метрики в текстовом формате Prometheus.
+        """
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,282 @@
+"""
+Модуль с кэшем несуществующих идентификаторов (negative cache).
+
+Запросы с идентификаторами несуществующих пользователей и твитов отвечают 404 без запроса к базе,
+если кэш знает, что идентификатора нет:
+- фильтр Блума всех существующих идентификаторов не содержит идентификатор;
+- база недавно ответила, что идентификатора нет, или он удален в текущем процессе.
+
+Идентификаторы выдаются по возрастанию, но записи с ними коммитятся не по порядку:
+запись с меньшим идентификатором может быть закоммичена после чтения наибольшего.
+Поэтому кэш отвечает только за идентификаторы не больше границы - наибольшего идентификатора,
+прочитанного при одной из прошлых загрузок, после которой завершились все транзакции,
+выполнявшиеся в момент чтения. Все записи до границы уже видны, поэтому фильтр,
+прочитанный после этой проверки, содержит их все. Идентификаторы больше границы
+всегда проверяются в базе. Наибольший идентификатор новой загрузки становится границей
+на одной из следующих перезагрузок, которые выполняются каждые reload_interval секунд.
+
+Созданные идентификаторы добавляются в фильтр, а удаленные - в кэш. Фильтр рассчитан
+на количество записей, а хэши идентификаторов считаются в отдельном потоке,
+чтобы перезагрузка не останавливала обработку запросов.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from hashlib import blake2b
+from math import ceil, log
+from time import monotonic
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Во сколько раз фильтр рассчитан на больше идентификаторов, чем записей в таблице
+BLOOM_GROWTH = 2
+# Наибольший идентификатор, наименьшая выполняющаяся и следующая транзакция снимка
+Watermark = tuple[int, int, int]
+
+NEGATIVE_CACHE_REQUESTS = metrics.counter(
+    "negative_cache_requests_total",
+    "Number of id lookups in the negative cache by result: bloom (absent from the filter),"
+    " cached (recently not found), unknown (checked in the database)",
+)
+
+
+class BloomFilter:
+    """
+    Класс - фильтр Блума целых чисел.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Инициализация класса. Размер фильтра и количество хэшей рассчитываются
+        так, чтобы при capacity элементах доля ложных срабатываний была error_rate.
+
+        Параметры:
+        capacity: На сколько элементов рассчитан фильтр
+        error_rate: Доля ложных срабатываний
+        """
+        self.size = max(ceil(-capacity * log(error_rate) / log(2) ** 2), 8)
+        self.hashes = max(round(self.size / max(capacity, 1) * log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: int) -> list[int]:
+        """
+        Возвращает номера битов элемента. Номера получаются двойным хэшированием
+        из двух половин одного хэша.
+
+        Параметры:
+
+        key: Элемент
+        """
+        digest = blake2b(key.to_bytes(8, "little", signed=True), digest_size=16)
+        value = int.from_bytes(digest.digest(), "little")
+        first, second = value >> 64, value & 0xFFFFFFFFFFFFFFFF
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, key: int) -> None:
+        """
+        Добавляет элемент.
+
+        Параметры:
+
+        key: Элемент
+        """
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def add_many(self, keys: list[int]) -> None:
+        """
+        Добавляет пачку элементов. Вызывается в отдельном потоке.
+
+        Параметры:
+
+        keys: Элементы
+        """
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: int) -> bool:
+        """
+        Проверяет, мог ли элемент быть добавлен. False означает, что элемента точно нет.
+
+        Параметры:
+
+        key: Элемент
+        """
+        return all(
+            self.bits[position >> 3] & 1 << (position & 7)
+            for position in self.positions(key)
+        )
+
+
+class NegativeCache:
+    """
+    Класс - кэш несуществующих идентификаторов одной таблицы.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float,
+        reload_interval: float,
+        load_watermark: Callable[[], Awaitable[Watermark]],
+        load_ids: Callable[[], AsyncIterator[list[int]]] | None = None,
+        count_ids: Callable[[], Awaitable[int]] | None = None,
+        error_rate: float = 0.01,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        name: Название кэша в метриках
+        max_entries: Сколько несуществующих идентификаторов хранит кэш
+        ttl: Сколько секунд хранится несуществующий идентификатор
+        reload_interval: Через сколько секунд перезагружаются фильтр и граница
+        load_watermark: Функция, читающая наибольший идентификатор и границы снимка транзакций
+        load_ids: Функция, читающая пачки всех идентификаторов из базы для фильтра Блума.
+        Если не передана, фильтр не строится
+        count_ids: Функция, читающая количество записей, на которое рассчитывается фильтр
+        error_rate: Доля ложных срабатываний фильтра
+        clock: Функция, возвращающая текущее время в секундах
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.reload_interval = reload_interval
+        self.load_watermark = load_watermark
+        self.load_ids = load_ids
+        self.count_ids = count_ids
+        self.error_rate = error_rate
+        self.clock = clock
+        # Граница, до которой кэш отвечает за идентификаторы. None - еще не известна
+        self.watermark: int | None = None
+        # Следующая транзакция снимка и наибольший идентификатор прошлых загрузок,
+        # которые еще не стали границей
+        self.candidates: list[tuple[int, int]] = []
+        self.bloom: BloomFilter | None = None
+        # Несуществующие идентификаторы и время окончания хранения
+        self.entries: OrderedDict[int, float] = OrderedDict()
+        # Идентификаторы, созданные во время перезагрузки
+        self.pending: list[int] | None = None
+        self.reload_task: asyncio.Task | None = None
+
+    def is_missing(self, key: int) -> bool:
+        """
+        Проверяет, известно ли, что идентификатора нет. False означает, что нужно проверить базу.
+
+        Параметры:
+
+        key: Идентификатор
+        """
+        if self.watermark is None or key > self.watermark:
+            result = "unknown"
+        elif self.bloom is not None and key not in self.bloom:
+            result = "bloom"
+        elif self.entries.get(key, 0) > self.clock():
+            self.entries.move_to_end(key)
+            result = "cached"
+        else:
+            result = "unknown"
+        NEGATIVE_CACHE_REQUESTS.inc(name=self.name, result=result)
+        return result != "unknown"
+
+    def add_missing(self, key: int) -> None:
+        """
+        Запоминает, что идентификатора нет, например после ответа базы или удаления.
+        Идентификаторы больше границы не запоминаются: их могут создать другие процессы.
+
+        Параметры:
+
+        key: Идентификатор
+        """
+        if self.watermark is None or key > self.watermark:
+            return
+        self.entries[key] = self.clock() + self.ttl
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def add_existing(self, key: int) -> None:
+        """
+        Запоминает созданный идентификатор.
+
+        Параметры:
+
+        key: Идентификатор
+        """
+        self.entries.pop(key, None)
+        if self.bloom is not None:
+            self.bloom.add(key)
+        if self.pending is not None:
+            self.pending.append(key)
+
+    async def start(self) -> None:
+        """
+        Загружает фильтр и запускает периодическую перезагрузку.
+        """
+        await self.reload()
+        self.reload_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическую перезагрузку.
+        """
+        if self.reload_task is not None:
+            self.reload_task.cancel()
+            try:
+                await self.reload_task
+            except asyncio.CancelledError:
+                pass
+            self.reload_task = None
+
+    async def run(self) -> None:
+        """
+        Перезагружает фильтр каждые reload_interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Failed to reload %s negative cache", self.name)
+
+    async def reload(self) -> None:
+        """
+        Обновляет границу и строит фильтр заново.
+        Границей становится наибольший из наибольших идентификаторов загрузок,
+        транзакции которых к этой загрузке завершились. Фильтр читается после этого,
+        поэтому содержит все идентификаторы до границы.
+        Идентификаторы, созданные во время загрузки, добавляются в новый фильтр.
+        """
+        self.pending = []
+        try:
+            max_id, xmin, xmax = await self.load_watermark()
+            candidates = [*self.candidates, (xmax, max_id)]
+            watermark = max(
+                (key for next_xid, key in candidates if next_xid <= xmin),
+                default=self.watermark,
+            )
+            bloom = None
+            if self.load_ids is not None:
+                bloom = BloomFilter(
+                    capacity=max(await self.count_ids(), 1) * BLOOM_GROWTH,
+                    error_rate=self.error_rate,
+                )
+                async for keys in self.load_ids():
+                    await asyncio.to_thread(bloom.add_many, keys)
+        except BaseException:
+            self.pending = None
+            raise
+        pending, self.pending = self.pending, None
+        for key in pending:
+            if bloom is not None:
+                bloom.add(key)
+        self.candidates = [
+            (next_xid, key) for next_xid, key in candidates if next_xid > xmin
+        ]
+        self.watermark, self.bloom = watermark, bloom
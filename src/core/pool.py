@@ -0,0 +1,77 @@
+"""
+Модуль с пулом соединений, собирающим метрики.
+"""
+
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from .metrics import metrics
+
+POOL_CHECKED_OUT = metrics.gauge(
+    "db_pool_checked_out", "Number of connections currently checked out of the pool"
+)
+POOL_OVERFLOW = metrics.gauge(
+    "db_pool_overflow", "Number of connections opened above pool_size"
+)
+POOL_SIZE = metrics.gauge("db_pool_size", "Configured pool_size")
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool, including opening a new one",
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+POOL_TIMEOUTS = metrics.counter(
+    "db_pool_timeouts_total", "Number of checkouts that failed after pool_timeout"
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который замеряет время ожидания соединения,
+    считает тайм - ауты и обновляет метрики занятости пула.
+    Название пула в метках метрик берется из параметра pool_logging_name двигателя.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        POOL_SIZE.set(self.size(), pool=self.pool_name)
+        self.update_usage_metrics()
+        # Счетчик тайм - аутов отдается с нулем, пока тайм - аутов не было
+        POOL_TIMEOUTS.inc(0, pool=self.pool_name)
+
+    @property
+    def pool_name(self) -> str:
+        """
+        Возвращает название пула в метках метрик.
+        """
+        return self._orig_logging_name or "primary"
+
+    def update_usage_metrics(self) -> None:
+        """
+        Обновляет метрики занятых соединений и соединений сверх pool_size.
+        """
+        POOL_CHECKED_OUT.set(self.checkedout(), pool=self.pool_name)
+        POOL_OVERFLOW.set(max(self.overflow(), 0), pool=self.pool_name)
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        """
+        Выдает соединение из пула, замеряя время ожидания.
+        """
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.pool_name)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(perf_counter() - start, pool=self.pool_name)
+            self.update_usage_metrics()
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        """
+        Возвращает соединение в пул.
+        """
+        super()._do_return_conn(record)
+        self.update_usage_metrics()
@@ -0,0 +1,145 @@
+"""
+Модуль для сбора статистики запросов к базе данных в рамках одного http-запроса.
+"""
+
+import logging
+import re
+import sys
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+
+from greenlet import getcurrent
+
+logger = logging.getLogger(__name__)
+
+REPOSITORIES_MODULE = "src.repositories"  # Методы модуля - источники запросов
+
+# Список параметров asyncpg, например, раскрытый IN ($1, $2, $3)
+PARAMETERS_LIST_PATTERN = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+SPACES_PATTERN = re.compile(r"\s+")
+
+
+class QueryStats:
+    """
+    Класс со статистикой запросов к базе данных, выполненных за один http-запрос.
+    """
+
+    def __init__(self, request_name: str) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        request_name: Название http-запроса, например, "GET /api/tweets"
+        """
+        self.request_name = request_name
+        self.statements_count = 0  # Количество выполненных запросов
+        self.total_time = 0.0  # Суммарное время выполнения запросов в секундах
+        self.rows_count = 0  # Количество строк, которые вернули или затронули запросы
+        self.callers: Counter[str] = Counter()  # Запросы по методам репозиториев
+        self.shapes: Counter[tuple[str, str]] = Counter()  # Формы запросов по методам
+
+    def add_statement(
+        self, statement: str, duration: float, rowcount: int, caller: str
+    ) -> None:
+        """
+        Учитывает выполненный запрос.
+
+        Параметры:
+        statement: Текст запроса
+        duration: Время выполнения запроса в секундах
+        rowcount: Количество строк, которые вернул или затронул запрос
+        caller: Метод репозитория, который выполнил запрос
+        """
+        self.statements_count += 1
+        self.total_time += duration
+        self.rows_count += max(rowcount, 0)
+        self.callers[caller] += 1
+        self.shapes[(caller, get_statement_shape(statement))] += 1
+
+    def report(self, statement_budget: int, repeated_statement_limit: int) -> None:
+        """
+        Записывает статистику в лог.
+        Предупреждает, если запрос превысил бюджет по количеству запросов к базе
+        или выполнил запрос одной и той же формы слишком много раз (признак проблемы N+1).
+
+        Параметры:
+        statement_budget: Допустимое количество запросов к базе за один http-запрос
+        repeated_statement_limit: Допустимое количество повторов запроса одной формы
+        """
+        if not self.statements_count:
+            return
+        summary = (
+            f"{self.request_name}: {self.statements_count} statements, "
+            f"{self.total_time * 1000:.2f} ms, {self.rows_count} rows; "
+            + ", ".join(f"{caller}={count}" for caller, count in self.callers.items())
+        )
+        logger.debug(summary)
+        if self.statements_count > statement_budget:
+            logger.warning(
+                "Statement budget exceeded (%s > %s). %s",
+                self.statements_count,
+                statement_budget,
+                summary,
+            )
+        for (caller, shape), count in self.shapes.items():
+            if count >= repeated_statement_limit:
+                logger.warning(
+                    "Possible N+1 in %s: %s executed the same statement %s times: %s",
+                    self.request_name,
+                    caller,
+                    count,
+                    shape[:300],
+                )
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)  # Статистика текущего http-запроса
+
+
+def get_statement_shape(statement: str) -> str:
+    """
+    Приводит запрос к форме, не зависящей от количества параметров и пробелов.
+
+    Параметры:
+    statement: Текст запроса
+
+    Возвращает нормализованный текст запроса.
+    """
+    shape = PARAMETERS_LIST_PATTERN.sub("?", statement)
+    return SPACES_PATTERN.sub(" ", shape).strip()
+
+
+def get_frame_caller(frame: FrameType | None) -> str | None:
+    """
+    Ищет в стеке вызовов ближайший метод репозитория.
+
+    Параметры:
+    frame: Фрейм, с которого начинается поиск
+
+    Возвращает строку вида "Repository.method" или None.
+    """
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith(REPOSITORIES_MODULE):
+            owner = frame.f_locals.get("cls")
+            if owner is None:
+                return frame.f_code.co_name
+            return f"{owner.__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def get_repository_caller() -> str:
+    """
+    Определяет метод репозитория, выполняющий запрос.
+    Асинхронный драйвер выполняет запросы внутри greenlet, поэтому после стека greenlet
+    просматривается стек корутины, которая его запустила.
+
+    Возвращает строку вида "Repository.method" или "unknown".
+    """
+    caller = get_frame_caller(sys._getframe(1))
+    parent = getcurrent().parent
+    if caller is None and parent is not None:
+        caller = get_frame_caller(parent.gr_frame)
+    return caller or "unknown"
@@ -0,0 +1,65 @@
+"""
+Модуль с ранжированием ленты твитов.
+
+Горячесть твита считается как log10(max(лайки, 1)) + (время создания - HOT_EPOCH) / HOT_DECAY.
+Каждые HOT_DECAY секунд возраста равны по весу десятикратной разнице в лайках,
+поэтому старые популярные твиты постепенно уступают место новым.
+Вклад времени фиксируется при создании твита, и горячесть меняется только вместе с количеством лайков.
+Это позволяет хранить ее в индексированной колонке и обновлять при каждом лайке,
+не пересчитывая всю таблицу.
+"""
+
+from datetime import datetime, timezone
+from enum import Enum
+from math import log10
+
+from sqlalchemy import ColumnElement, Float, cast, func, literal, text
+
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)  # Точка отсчета времени создания
+HOT_DECAY = 45000  # Сколько секунд возраста равны десятикратной разнице в лайках
+
+HOT_SCORE_DEFAULT = text(
+    f"extract(epoch FROM (now() - TIMESTAMPTZ '{HOT_EPOCH.isoformat()}')) / {HOT_DECAY}"
+)  # Горячесть нового твита без лайков. now() совпадает с датой создания по умолчанию
+
+
+class FeedSort(str, Enum):
+    """
+    Порядок твитов в ленте.
+    """
+
+    HOT = "hot"  # По горячести
+    TOP = "top"  # По количеству лайков, затем по дате создания
+    NEW = "new"  # По дате создания
+
+
+def get_hot_score(like_count: int, created_at: datetime) -> float:
+    """
+    Считает горячесть твита.
+
+    Параметры:
+
+    like_count: Количество лайков твита
+    created_at: Дата создания твита
+
+    Возвращает горячесть.
+    """
+    return (
+        log10(max(like_count, 1)) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY
+    )
+
+
+def hot_score_expression(
+    like_count: ColumnElement[int], created_at: ColumnElement[datetime]
+) -> ColumnElement[float]:
+    """
+    Возвращает выражение SQL, считающее горячесть твита так же, как get_hot_score.
+
+    Параметры:
+
+    like_count: Выражение с количеством лайков твита
+    created_at: Выражение с датой создания твита
+    """
+    return func.log(cast(func.greatest(like_count, 1), Float)) + cast(
+        func.extract("epoch", created_at - literal(HOT_EPOCH)), Float
+    ) / literal(HOT_DECAY)
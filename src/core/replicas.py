@@ -0,0 +1,167 @@
+"""
+Модуль для распределения запросов на чтение между репликами базы данных.
+"""
+
+import logging
+from collections.abc import Callable
+from functools import wraps
+from time import monotonic
+from typing import Any
+
+from sqlalchemy import Delete, Insert, Update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    """
+    Класс с набором реплик базы данных.
+    Выдает реплики по кругу, временно исключая те, к которым не удалось подключиться.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], ejection_time: float) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        engines: Двигатели для работы с репликами
+        ejection_time: На сколько секунд исключается недоступная реплика
+        """
+        self.engines = engines
+        self.ejection_time = ejection_time
+        self._ejected_until: dict[int, float] = {}  # Время возврата реплик по индексу
+        self._next = 0  # Индекс следующей реплики
+
+    def healthy(self) -> list[AsyncEngine]:
+        """
+        Возвращает реплики, которые сейчас не исключены.
+        """
+        now = monotonic()
+        return [
+            engine
+            for index, engine in enumerate(self.engines)
+            if self._ejected_until.get(index, 0) <= now
+        ]
+
+    def choose(self) -> AsyncEngine | None:
+        """
+        Возвращает следующую доступную реплику или None, если доступных реплик нет.
+        """
+        now = monotonic()
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self._ejected_until.get(index, 0) <= now:
+                return self.engines[index]
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        """
+        Исключает реплику на ejection_time секунд.
+
+        Параметры:
+        engine: Двигатель недоступной реплики
+        """
+        index = self.engines.index(engine)
+        self._ejected_until[index] = monotonic() + self.ejection_time
+        logger.warning(
+            "Replica %s ejected for %s seconds",
+            engine.url.render_as_string(hide_password=True),
+            self.ejection_time,
+        )
+
+
+class RoutingSession(Session):
+    """
+    Сессия основной базы, запоминающая, что она уже записывала данные.
+    После записи чтения из методов с декоратором replica_read выполняются в этой сессии,
+    чтобы видеть ее незакоммиченные изменения.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        """
+        Отмечает запись в сессии и возвращает двигатель основной базы.
+
+        Параметры:
+        mapper: Модель, к которой относится запрос
+        clause: Выражение запроса
+        """
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["primary_only"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def choose_replica(session: AsyncSession) -> AsyncEngine | None:
+    """
+    Возвращает реплику для чтения в сессии или None, если читать нужно из основной базы:
+    реплик нет, все исключены, или сессия уже записывала данные.
+    Пока реплика доступна, все чтения сессии выполняются на ней.
+
+    Параметры:
+    session: Сессия для асинхронной работы с базой данных
+    """
+    replicas: ReplicaSet | None = session.info.get("replicas")
+    if (
+        replicas is None
+        or session.info.get("primary_only")
+        or session.new
+        or session.dirty
+        or session.deleted
+    ):
+        return None
+    replica = session.info.get("replica")
+    if replica is None or replica not in replicas.healthy():
+        replica = replicas.choose()
+        session.info["replica"] = replica
+    return replica
+
+
+def replica_read(
+    method: Callable[..., Any],
+) -> Callable[..., Any]:
+    """
+    Декоратор для методов репозиториев, которые только читают данные.
+    Если сессия еще ничего не записывала, метод выполняется в отдельной сессии
+    на соединении с репликой, которое после чтения закрывается.
+    Если чтение на реплике не удалось, недоступная реплика исключается,
+    а метод повторяется в исходной сессии на основной базе.
+    Транзакция сессии на основной базе при этом не затрагивается,
+    а следующие чтения снова направляются на реплики.
+
+    Параметры:
+    method: Асинхронный метод репозитория, принимающий сессию
+
+    Возвращает обернутый метод.
+    """
+
+    @wraps(method)
+    async def wrapper(cls: Any, *args: Any, **kwargs: Any) -> Any:
+        session: AsyncSession = kwargs.get("session") or args[0]
+        replica = choose_replica(session)
+        if replica is None:
+            return await method(cls, *args, **kwargs)
+        try:
+            async with replica.connect() as connection:
+                replica_session = AsyncSession(bind=connection, expire_on_commit=False)
+                if "session" in kwargs:
+                    replica_kwargs = {**kwargs, "session": replica_session}
+                    replica_args = args
+                else:
+                    replica_kwargs = kwargs
+                    replica_args = (replica_session, *args[1:])
+                try:
+                    return await method(cls, *replica_args, **replica_kwargs)
+                finally:
+                    await replica_session.close()
+        except (DBAPIError, OSError) as err:
+            if isinstance(err, OSError) or err.connection_invalidated:
+                session.info["replicas"].eject(replica)
+            logger.warning("Read on replica failed, retrying on primary: %s", err)
+        session.info.pop("replica", None)
+        return await method(cls, *args, **kwargs)
+
+    return wrapper
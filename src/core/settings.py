@@ -19,6 +19,70 @@ class DBSettings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     echo: bool = False
+    query_stats: bool = True  # Собирать ли статистику запросов к базе по http-запросам
+    statement_budget: int = 20  # Допустимое число запросов к базе за один http-запрос
+    repeated_statement_limit: int = 5  # Допустимые повторы запроса одной формы
+    replica_urls: list[str] = []  # Строки подключения к репликам, JSON - список
+    replica_ejection_time: float = 30  # На сколько секунд исключается упавшая реплика
+    pgbouncer_transaction_mode: bool = False  # PgBouncer в режиме пула транзакций
+    pool_size: int = 5  # Количество соединений, которые пул держит открытыми
+    max_overflow: int = 10  # Сколько соединений сверх pool_size открывается в пик
+    pool_timeout: float = 30  # Сколько секунд ждать свободное соединение из пула
+    pool_recycle: int = -1  # Через сколько секунд соединение переоткрывается
+    pool_pre_ping: bool = False  # Проверять ли соединение перед выдачей из пула
+    tweets_partitions_ahead: int = 3  # На сколько месяцев вперед создаются секции
+    archive_after_days: int = 365  # Через сколько дней после создания твит в архиве
+    archive_batch_size: int = 1000  # Сколько твитов переносится в архив за транзакцию
+    ranking_sweep_batch_size: int = 1000  # Сколько твитов сверяется за одну транзакцию
+    batch_ids_limit: int = 300  # Сколько id можно передать в одном пакетном запросе
+    follow_page_size: int = 50  # Размер страницы подписчиков и подписок по умолчанию
+    follow_counts_sweep_batch_size: int = 1000  # Пользователей, сверяемых за транзакцию
+    follow_graph_enabled: bool = False  # Держать ли граф подписок в памяти процесса
+    follow_graph_reload_interval: float = 300  # Период перезагрузки графа в секундах
+    follow_graph_load_batch_size: int = 10000  # Подписок, читаемых из курсора за раз
+    suggestions_limit: int = 20  # Сколько рекомендаций хранится на пользователя
+    suggestions_fanout_cap: int = 200  # Сколько подписок пользователя учитывается
+    suggestions_candidate_cap: int = 500  # Сколько подписок каждой подписки учитывается
+    suggestions_batch_size: int = 1000  # Пользователей с рекомендациями за транзакцию
+    suggestions_workers: int = 2  # Количество процессов, рассчитывающих рекомендации
+    single_flight_enabled: bool = True  # Склеивать ли одинаковые чтения ленты и профиля
+    feed_cache_enabled: bool = False  # Собирать ли ленту из кэша твитов в процессе
+    feed_cache_size: int = 10000  # Сколько твитов хранится в кэше ленты
+    feed_cache_fragment_ttl: float = 30  # Сколько секунд твит хранится в кэше ленты
+    feed_cache_ids_ttl: float = 5  # Сколько секунд порядок твитов страницы свежий
+    feed_cache_ids_hard_ttl: float = 60  # Сколько секунд отдается устаревший порядок
+    profile_cache_enabled: bool = False  # Хранить ли профили пользователей в процессе
+    profile_cache_size: int = 10000  # Сколько профилей хранится в кэше
+    profile_cache_ttl: float = 5  # Сколько секунд профиль в кэше считается свежим
+    profile_cache_hard_ttl: float = 60  # Сколько секунд отдается устаревший профиль
+    cache_stale_if_error: float = 300  # Сколько секунд истекший кэш отдается при сбое
+    feed_prefetch_enabled: bool = False  # Загружать ли в кэш следующую страницу ленты
+    feed_prefetch_concurrency: int = 2  # Сколько предзагрузок ленты идет одновременно
+    feed_snapshot_enabled: bool = False  # Отдавать ли первые страницы ленты из снимка
+    feed_snapshot_path: str = "/tmp/feed_snapshot.bin"  # Путь к файлу снимка ленты
+    feed_snapshot_size: int = 1000  # Сколько первых твитов каждого порядка в снимке
+    feed_snapshot_interval: float = 5  # Период перестроения снимка ленты в секундах
+    feed_snapshot_reload_interval: float = 1  # Период проверки файла снимка в секундах
+    feed_snapshot_max_age: float = 60  # Сколько секунд после построения снимок отдается
+    negative_cache_enabled: bool = False  # Отвечать ли 404 на несуществующие id сразу
+    negative_cache_size: int = 100000  # Сколько несуществующих id таблицы хранит кэш
+    negative_cache_ttl: float = 60  # Сколько секунд хранится несуществующий id
+    negative_cache_bloom_enabled: bool = False  # Строить ли фильтр Блума по таблицам
+    negative_cache_bloom_error_rate: float = 0.01  # Доля ложных срабатываний фильтра
+    negative_cache_reload_interval: float = 300  # Период перезагрузки фильтра и границы
+    negative_cache_load_batch_size: int = 10000  # Сколько id читается из курсора за раз
+    invalidation_bus_enabled: bool = False  # Рассылать ли сбросы через LISTEN/NOTIFY
+    invalidation_channel: str = "cache_invalidation"  # Канал уведомлений о сбросах
+    invalidation_listen_url: str | None = None  # Отдельная строка asyncpg для слушателя
+    invalidation_reconnect_interval: float = 1  # Пауза перед переподключением слушателя
+    invalidation_ping_interval: float = 10  # Период проверки соединения слушателя
+    like_counter_shards: int = 16  # На сколько строк делится счетчик популярного твита
+    hot_tweet_like_rate: float = 5  # Сколько лайков в секунду делает твит популярным
+    hot_tweet_window: float = 10  # За сколько секунд считается частота лайков твита
+    hot_tweet_promotion_time: float = 600  # Сколько секунд счетчик твита шардирован
+    like_buffer_enabled: bool = False  # Писать ли лайки пачками через журнал на диске
+    like_buffer_directory: str = "like_journal"  # Директория журнала лайков
+    like_buffer_flush_interval: float = 100  # Период сброса буфера лайков в мс
 
     @property
     def database_url(self) -> str:
@@ -0,0 +1,121 @@
+"""
+Модуль с объединением одинаковых одновременных чтений в одно.
+
+Первый вызов с заданным ключом выполняет запросы к базе в своей сессии, а вызовы
+с тем же ключом, пришедшие до его завершения, ждут его результат и получают тот же объект
+или то же исключение. Ожидание защищено через asyncio.shield: отмена ожидающего запроса,
+например при разрыве соединения клиентом, не отменяет общий вызов.
+Если отменен сам первый вызов, ожидающие не получают отмену, а повторяют вызов,
+и один из них становится новым первым.
+
+Вызовы объединяются только внутри процесса. Вызов, пришедший сразу после записи,
+может получить результат чтения, начатого до нее, как если бы пришел чуть раньше.
+"""
+
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial, wraps
+from typing import Any, TypeVar
+
+from .metrics import metrics
+from .settings import settings
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = metrics.counter(
+    "single_flight_calls_total",
+    "Number of reads by result: leader executed the query, coalesced waited for it",
+)
+
+
+class LeaderCancelled(Exception):
+    """
+    Исключение, которое получают ожидающие вызовы, если первый вызов отменен.
+    """
+
+
+class SingleFlight:
+    """
+    Класс, объединяющий одновременные вызовы с одинаковым ключом в один.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        name: Название вызова в метриках
+        """
+        self.name = name
+        self.calls: dict[Hashable, asyncio.Future] = {}  # Выполняющиеся вызовы
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет вызов или ждет результат уже выполняющегося вызова с тем же ключом.
+
+        Параметры:
+
+        key: Ключ вызова, составленный из приведенных к одному виду аргументов
+        call: Функция, выполняющая вызов
+
+        Возвращает результат вызова.
+        """
+        while (future := self.calls.get(key)) is not None:
+            SINGLE_FLIGHT_CALLS.inc(name=self.name, result="coalesced")
+            try:
+                return await asyncio.shield(future)
+            except LeaderCancelled:
+                continue
+        SINGLE_FLIGHT_CALLS.inc(name=self.name, result="leader")
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        try:
+            result = await call()
+        except (Exception, asyncio.CancelledError) as error:
+            if isinstance(error, asyncio.CancelledError):
+                error = LeaderCancelled()
+            future.set_exception(error)
+            future.exception()  # Исключение считается полученным, даже если вызов никто не ждал
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.calls[key]
+
+
+def single_flight(
+    name: str, key: Callable[..., Hashable]
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Декоратор для методов сервисов, объединяющий одновременные вызовы с одинаковыми аргументами.
+    Сессия в ключ не входит: общий вызов выполняется в сессии первого вызова.
+
+    Параметры:
+    name: Название вызова в метриках
+    key: Функция, принимающая аргументы метода, кроме cls и session, и возвращающая ключ
+
+    Возвращает декоратор.
+    """
+    flight = SingleFlight(name)
+
+    def decorator(
+        method: Callable[..., Awaitable[T]],
+    ) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        async def wrapper(cls: Any, *args: Any, **kwargs: Any) -> T:
+            call = partial(method, cls, *args, **kwargs)
+            if not settings.db.single_flight_enabled:
+                return await call()
+            arguments = signature.bind(cls, *args, **kwargs)
+            arguments.apply_defaults()
+            params = dict(arguments.arguments)
+            del params["cls"], params["session"]
+            return await flight.run(key(**params), call)
+
+        return wrapper
+
+    return decorator
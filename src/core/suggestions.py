@@ -0,0 +1,162 @@
+"""
+Модуль с расчетом рекомендаций подписок по друзьям друзей.
+
+Кандидат получает по одному баллу за каждую подписку пользователя, которая подписана на кандидата.
+Строки подписок берутся из графа в формате CSR, и баллы считаются сложением целых срезов строк
+в Counter, который перебирает массив на C, а не по одной паре на Python.
+У пользователей с большим количеством подписок строки прореживаются до заданного размера,
+поэтому стоимость расчета одного пользователя ограничена fanout_cap * candidate_cap.
+
+Расчет всех пользователей делится на пачки, которые считаются в пуле процессов.
+Граф передается каждому процессу один раз при запуске.
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from heapq import nsmallest
+from multiprocessing import get_context
+
+from .follow_graph import CompressedRows
+
+# Рекомендации пользователя: пары (рекомендуемый пользователь, балл) по убыванию балла
+Suggestions = list[tuple[int, int]]
+
+worker_rows: CompressedRows | None = None  # Граф подписок процесса пула
+
+
+def sample_row(rows: CompressedRows, node: int, cap: int) -> Sequence[int]:
+    """
+    Возвращает строку пользователя, равномерно прореженную до cap элементов.
+
+    Параметры:
+
+    rows: Строки подписок
+    node: Идентификатор пользователя
+    cap: Максимальное количество элементов
+    """
+    start, end = rows.bounds(node)
+    if end - start <= cap:
+        return rows.targets[start:end]
+    step = (end - start) / cap
+    return [rows.targets[start + int(index * step)] for index in range(cap)]
+
+
+def suggest(
+    rows: CompressedRows,
+    user_id: int,
+    limit: int,
+    fanout_cap: int,
+    candidate_cap: int,
+) -> Suggestions:
+    """
+    Рассчитывает рекомендации одного пользователя.
+
+    Параметры:
+
+    rows: Строки подписок
+    user_id: Идентификатор пользователя
+    limit: Количество рекомендаций
+    fanout_cap: Сколько подписок пользователя учитывается
+    candidate_cap: Сколько подписок каждой подписки пользователя учитывается
+
+    Возвращает пары (рекомендуемый пользователь, балл) по убыванию балла,
+    при равных баллах - по возрастанию id.
+    """
+    scores: Counter[int] = Counter()
+    for friend_id in sample_row(rows, user_id, fanout_cap):
+        scores.update(sample_row(rows, friend_id, candidate_cap))
+    scores.pop(user_id, None)
+    start, end = rows.bounds(user_id)
+    for index in range(start, end):
+        scores.pop(rows.targets[index], None)
+    return nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def init_worker(rows: CompressedRows) -> None:
+    """
+    Сохраняет граф подписок в процессе пула.
+
+    Параметры:
+
+    rows: Строки подписок
+    """
+    global worker_rows
+    worker_rows = rows
+
+
+def suggest_chunk(
+    user_ids: list[int], limit: int, fanout_cap: int, candidate_cap: int
+) -> list[tuple[int, Suggestions]]:
+    """
+    Рассчитывает рекомендации пачки пользователей в процессе пула.
+
+    Параметры:
+
+    user_ids: Идентификаторы пользователей
+    limit: Количество рекомендаций
+    fanout_cap: Сколько подписок пользователя учитывается
+    candidate_cap: Сколько подписок каждой подписки пользователя учитывается
+
+    Возвращает пары (пользователь, рекомендации).
+    """
+    return [
+        (user_id, suggest(worker_rows, user_id, limit, fanout_cap, candidate_cap))
+        for user_id in user_ids
+    ]
+
+
+async def compute_suggestions(
+    rows: CompressedRows,
+    user_ids: list[int],
+    workers: int,
+    chunk_size: int,
+    limit: int,
+    fanout_cap: int,
+    candidate_cap: int,
+) -> AsyncIterator[list[tuple[int, Suggestions]]]:
+    """
+    Рассчитывает рекомендации пользователей пачками в пуле процессов.
+    Одновременно считается не больше пачек, чем процессов в пуле, и еще по одной в очереди,
+    поэтому готовые рекомендации не копятся в памяти, пока вызывающий их записывает.
+
+    Параметры:
+
+    rows: Строки подписок
+    user_ids: Идентификаторы пользователей
+    workers: Количество процессов пула
+    chunk_size: Количество пользователей в пачке
+    limit: Количество рекомендаций на пользователя
+    fanout_cap: Сколько подписок пользователя учитывается
+    candidate_cap: Сколько подписок каждой подписки пользователя учитывается
+
+    Возвращает асинхронный итератор пачек пар (пользователь, рекомендации) в порядке пачек.
+    """
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=init_worker,
+        initargs=(rows,),
+    ) as pool:
+        running: list[asyncio.Future] = []
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start : start + chunk_size]
+            running.append(
+                loop.run_in_executor(
+                    pool,
+                    partial(
+                        suggest_chunk,
+                        chunk,
+                        limit=limit,
+                        fanout_cap=fanout_cap,
+                        candidate_cap=candidate_cap,
+                    ),
+                )
+            )
+            if len(running) > workers:
+                yield await running.pop(0)
+        for future in running:
+            yield await future
@@ -0,0 +1,266 @@
+"""
+Модуль с кэшем, отдающим устаревшие записи, пока они обновляются в фоне (stale-while-revalidate).
+
+Запись свежая soft_ttl секунд после чтения из базы и отдается без запросов к базе.
+С soft_ttl до hard_ttl запись устарела, но отдается сразу, а одна фоновая задача на ключ
+перечитывает ее в отдельной сессии. После hard_ttl запрос ждет чтения из базы.
+Если база при этом недоступна, запись отдается еще stale_if_error секунд,
+а при stale_if_error = 0 запрос получает ошибку. Так истечение записи не добавляет
+время запроса к базе к ответам, пока запись запрашивают чаще, чем раз в hard_ttl секунд.
+
+Изменение, сделанное этим процессом, удаляет запись (drop), поэтому следующий запрос,
+в том числе запрос автора изменения, ждет чтения из базы и видит изменение.
+Сброс по уведомлению другого процесса (invalidate) делает запись устаревшей, но не удаляет:
+следующий запрос получит старую запись и запустит обновление.
+
+Каждый сброс выдает записи новую версию, как в кэше ленты. Значение, чтение которого
+началось до сброса своей записи, отдается прочитавшему его запросу, но не сохраняется,
+а сбросы других записей его не затрагивают.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from time import monotonic
+from typing import Generic, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DATABASE_ERRORS = (DBAPIError, PoolTimeoutError, OSError)  # Ошибки недоступной базы
+
+SWR_CACHE_REQUESTS = metrics.counter(
+    "swr_cache_requests_total",
+    "Number of cache lookups by result: fresh, stale (served while refreshing),"
+    " miss (loaded from the database), stale_if_error (served because the database failed)",
+)
+SWR_CACHE_REFRESH_ERRORS = metrics.counter(
+    "swr_cache_refresh_errors_total", "Number of failed background refreshes"
+)
+
+
+@dataclass
+class CacheEntry(Generic[T]):
+    """
+    Запись кэша.
+    """
+
+    value: T  # Значение
+    fresh_until: float  # До какого времени запись свежая
+    expires: float  # До какого времени запись можно отдавать без чтения из базы
+
+
+class SwrCache(Generic[T]):
+    """
+    Класс - кэш, обновляющий устаревшие записи в фоне.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        soft_ttl: float,
+        hard_ttl: float,
+        stale_if_error: float,
+        max_entries: int,
+        session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Инициализация класса.
+
+        Параметры:
+        name: Название кэша в метриках
+        soft_ttl: Сколько секунд запись свежая
+        hard_ttl: Сколько секунд запись отдается, в том числе устаревшей
+        stale_if_error: Сколько секунд после hard_ttl запись отдается, если база недоступна
+        max_entries: Сколько записей хранит кэш. Давно не запрошенные вытесняются
+        session_factory: Функция, открывающая сессию для фонового обновления
+        clock: Функция, возвращающая текущее время в секундах
+        """
+        self.name = name
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.stale_if_error = stale_if_error
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self.clock = clock
+        self.entries: OrderedDict[Hashable, CacheEntry[T]] = OrderedDict()
+        self.refreshing: dict[Hashable, asyncio.Task] = {}  # Фоновые обновления
+        # Версии записей, сброшенных после очистки
+        self.versions: dict[Hashable, int] = {}
+        self.last_version = 0  # Последняя выданная версия. Версии не повторяются
+        self.epoch = 0  # Версия записей, не сброшенных после очистки
+
+    async def get(
+        self,
+        key: Hashable,
+        session: AsyncSession,
+        load: Callable[[AsyncSession], Awaitable[T]],
+    ) -> T:
+        """
+        Возвращает значение из кэша или читает его из базы.
+
+        Параметры:
+
+        key: Ключ записи
+        session: Сессия запроса, в которой значение читается, если записи нет или она истекла
+        load: Функция, читающая значение в переданной сессии
+        """
+        now = self.clock()
+        entry = self.entries.get(key)
+        if entry is not None and now < entry.expires:
+            self.entries.move_to_end(key)
+            if now < entry.fresh_until:
+                SWR_CACHE_REQUESTS.inc(name=self.name, result="fresh")
+            else:
+                SWR_CACHE_REQUESTS.inc(name=self.name, result="stale")
+                self.start_refresh(key, load)
+            return entry.value
+        version = self.get_version(key)
+        try:
+            value = await load(session)
+        except DATABASE_ERRORS:
+            if entry is None or now >= entry.expires + self.stale_if_error:
+                raise
+            logger.warning("Serving expired %s cache entry: database failed", self.name)
+            SWR_CACHE_REQUESTS.inc(name=self.name, result="stale_if_error")
+            return entry.value
+        SWR_CACHE_REQUESTS.inc(name=self.name, result="miss")
+        self.store(key, value, version)
+        return value
+
+    def get_version(self, key: Hashable) -> int:
+        """
+        Возвращает текущую версию записи.
+
+        Параметры:
+
+        key: Ключ записи
+        """
+        return self.versions.get(key, self.epoch)
+
+    def store(self, key: Hashable, value: T, version: int) -> None:
+        """
+        Сохраняет значение, если запись не сбрасывали после начала чтения.
+
+        Параметры:
+
+        key: Ключ записи
+        value: Значение
+        version: Версия записи до начала чтения из базы
+        """
+        if version != self.get_version(key):
+            return
+        now = self.clock()
+        self.entries[key] = CacheEntry(
+            value=value, fresh_until=now + self.soft_ttl, expires=now + self.hard_ttl
+        )
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def start_refresh(
+        self, key: Hashable, load: Callable[[AsyncSession], Awaitable[T]]
+    ) -> None:
+        """
+        Запускает фоновое обновление записи, если оно еще не запущено.
+
+        Параметры:
+
+        key: Ключ записи
+        load: Функция, читающая значение в переданной сессии
+        """
+        if key in self.refreshing:
+            return
+        task = asyncio.create_task(self.refresh(key, load, self.get_version(key)))
+        self.refreshing[key] = task
+        task.add_done_callback(lambda _: self.refreshing.pop(key, None))
+
+    async def refresh(
+        self,
+        key: Hashable,
+        load: Callable[[AsyncSession], Awaitable[T]],
+        version: int,
+    ) -> None:
+        """
+        Перечитывает запись в отдельной сессии. Если база недоступна, запись остается прежней.
+
+        Параметры:
+
+        key: Ключ записи
+        load: Функция, читающая значение в переданной сессии
+        version: Версия записи на момент запуска обновления
+        """
+        try:
+            async with self.session_factory() as session:
+                value = await load(session)
+        except DATABASE_ERRORS:
+            SWR_CACHE_REFRESH_ERRORS.inc(name=self.name)
+            logger.warning("Failed to refresh %s cache entry", self.name)
+            return
+        except Exception:
+            # Например, пользователь удален. Запрос без записи получит ошибку сам
+            SWR_CACHE_REFRESH_ERRORS.inc(name=self.name)
+            self.entries.pop(key, None)
+            return
+        self.store(key, value, version)
+
+    def next_version(self, key: Hashable | None) -> None:
+        """
+        Выдает записи новую версию. Если ключ не передан или версий слишком много,
+        новую версию получают все записи.
+
+        Параметры:
+
+        key: Ключ записи
+        """
+        self.last_version += 1
+        if key is not None and len(self.versions) < self.max_entries:
+            self.versions[key] = self.last_version
+        else:
+            self.versions.clear()  # Версии не копятся бесконечно
+            self.epoch = self.last_version
+
+    def drop(self, key: Hashable) -> None:
+        """
+        Удаляет запись после изменения, сделанного этим процессом.
+
+        Параметры:
+
+        key: Ключ записи
+        """
+        self.next_version(key)
+        self.entries.pop(key, None)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """
+        Делает запись устаревшей по уведомлению другого процесса.
+        Если ключ не передан, устаревшими становятся все записи.
+
+        Параметры:
+
+        key: Ключ записи
+        """
+        self.next_version(key)
+        if key is None:
+            for entry in self.entries.values():
+                entry.fresh_until = 0
+        elif key in self.entries:
+            self.entries[key].fresh_until = 0
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи.
+        """
+        self.entries.clear()
+        self.next_version(None)
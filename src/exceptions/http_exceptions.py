@@ -4,7 +4,12 @@
 
 from fastapi import HTTPException, status
 
-from .errors import TWEET_NOT_FOUND_ERROR, UNAUTHORIZED_ERROR, USER_NOT_FOUND_ERROR
+from .errors import (
+    LIKE_NOT_EXISTS_ERROR,
+    TWEET_NOT_FOUND_ERROR,
+    UNAUTHORIZED_ERROR,
+    USER_NOT_FOUND_ERROR,
+)
 
 AUTHORIZATION_EXCEPTION = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,3 +24,7 @@ USER_NOT_EXISTS_EXCEPTION = HTTPException(
 TWEET_NOT_FOUND_EXCEPTION = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND, detail=TWEET_NOT_FOUND_ERROR
 )
+
+LIKE_NOT_EXISTS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail=LIKE_NOT_EXISTS_ERROR
+)
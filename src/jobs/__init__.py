@@ -0,0 +1,3 @@
+"""
+Модуль с фоновыми заданиями, которые запускаются отдельно от приложения.
+"""
@@ -0,0 +1,46 @@
+"""
+Задание, переносящее старые твиты в архив.
+Запускается по расписанию командой python -m src.jobs.archive
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.services.archive_service import ArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_old_tweets() -> int:
+    """
+    Переносит в архив твиты старше archive_after_days дней.
+
+    Возвращает количество перенесенных твитов.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.db.archive_after_days)
+    async with db_helper.session_factory() as session:
+        moved = await ArchiveService.archive_old_tweets(
+            session=session,
+            cutoff=cutoff,
+            batch_size=settings.db.archive_batch_size,
+        )
+    logger.info("Archived %s tweets created before %s", moved, cutoff)
+    return moved
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await archive_old_tweets()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Задание, перестраивающее снимок ленты для процессов приложения.
+Запускается одним отдельным процессом командой python -m src.jobs.feed_snapshot
+и перестраивает снимок каждые feed_snapshot_interval секунд.
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.feed_snapshot import write_snapshot
+from src.core.settings import settings
+from src.services.tweet_service import TweetService
+
+logger = logging.getLogger(__name__)
+
+
+async def build_feed_snapshot() -> int:
+    """
+    Читает первые твиты ленты и заменяет ими файл снимка.
+
+    Возвращает количество твитов в снимке.
+    """
+    async with db_helper.session_factory() as session:
+        orders, fragments = await TweetService.get_feed_snapshot(
+            session=session, size=settings.db.feed_snapshot_size
+        )
+    write_snapshot(
+        path=settings.db.feed_snapshot_path, orders=orders, fragments=fragments
+    )
+    logger.info("Wrote feed snapshot of %s tweets", len(fragments))
+    return len(fragments)
+
+
+async def main() -> None:
+    """
+    Перестраивает снимок, пока процесс не остановят, и закрывает соединения с базой данных.
+    """
+    try:
+        while True:
+            try:
+                await build_feed_snapshot()
+            except Exception:
+                logger.exception("Failed to build feed snapshot")
+            await asyncio.sleep(settings.db.feed_snapshot_interval)
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
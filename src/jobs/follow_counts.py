@@ -0,0 +1,42 @@
+"""
+Задание, сверяющее количество подписчиков и подписок пользователей с таблицей подписчиков.
+Запускается по расписанию командой python -m src.jobs.follow_counts
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.services.user_service import UserFollowerService
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_follow_counts() -> int:
+    """
+    Сверяет счетчики подписчиков и подписок всех пользователей.
+
+    Возвращает количество исправленных пользователей.
+    """
+    async with db_helper.session_factory() as session:
+        fixed = await UserFollowerService.sweep_follow_counts(
+            session=session, batch_size=settings.db.follow_counts_sweep_batch_size
+        )
+    logger.info("Fixed follow counters of %s users", fixed)
+    return fixed
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await sweep_follow_counts()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
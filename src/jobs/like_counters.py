@@ -0,0 +1,42 @@
+"""
+Задание, переносящее шарды счетчиков лайков популярных твитов в таблицу твитов.
+Запускается по расписанию командой python -m src.jobs.like_counters
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.services.ranking_service import RankingService
+
+logger = logging.getLogger(__name__)
+
+
+async def fold_like_counters() -> int:
+    """
+    Переносит шарды счетчиков лайков всех твитов.
+
+    Возвращает количество твитов, шарды которых были перенесены.
+    """
+    async with db_helper.session_factory() as session:
+        folded = await RankingService.fold_like_counters(
+            session=session, batch_size=settings.db.ranking_sweep_batch_size
+        )
+    logger.info("Folded like counter shards of %s tweets", folded)
+    return folded
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await fold_like_counters()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
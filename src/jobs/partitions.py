@@ -0,0 +1,42 @@
+"""
+Задание, создающее секции таблицы твитов на текущий и следующие месяцы.
+Запускается по расписанию командой python -m src.jobs.partitions
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.repositories.tweets import TweetRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def create_partitions() -> int:
+    """
+    Создает секции твитов на tweets_partitions_ahead месяцев вперед.
+
+    Возвращает количество созданных секций.
+    """
+    async with db_helper.session_factory() as session:
+        created = await TweetRepository.create_partitions(
+            session=session, months_ahead=settings.db.tweets_partitions_ahead
+        )
+    logger.info("Created %s tweet partitions", created)
+    return created
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await create_partitions()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
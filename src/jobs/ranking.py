@@ -0,0 +1,42 @@
+"""
+Задание, сверяющее количество лайков и горячесть твитов с таблицей лайков.
+Запускается по расписанию командой python -m src.jobs.ranking
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.services.ranking_service import RankingService
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_rankings() -> int:
+    """
+    Сверяет счетчики лайков всех твитов.
+
+    Возвращает количество исправленных твитов.
+    """
+    async with db_helper.session_factory() as session:
+        fixed = await RankingService.sweep(
+            session=session, batch_size=settings.db.ranking_sweep_batch_size
+        )
+    logger.info("Fixed like counters of %s tweets", fixed)
+    return fixed
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await sweep_rankings()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Задание, рассчитывающее рекомендации подписок всех пользователей.
+Запускается по расписанию командой python -m src.jobs.suggestions
+"""
+
+import asyncio
+import logging
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.services.suggestion_service import SuggestionService
+
+logger = logging.getLogger(__name__)
+
+
+async def precompute_suggestions() -> int:
+    """
+    Рассчитывает рекомендации подписок.
+
+    Возвращает количество пользователей, рекомендации которых были рассчитаны.
+    """
+    async with db_helper.session_factory() as session:
+        computed = await SuggestionService.precompute(
+            session=session, workers=settings.db.suggestions_workers
+        )
+    logger.info("Computed follow suggestions of %s users", computed)
+    return computed
+
+
+async def main() -> None:
+    """
+    Запускает задание и закрывает соединения с базой данных.
+    """
+    try:
+        await precompute_suggestions()
+    finally:
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
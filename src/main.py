@@ -2,18 +2,74 @@
 Главный файл, из которого запускается приложение.
 """
 
-from fastapi import FastAPI, HTTPException, Request, status
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from src.core.feed_prefetch import feed_prefetcher
+from src.core.feed_snapshot import feed_snapshot
+from src.core.invalidation_bus import invalidation_bus
+from src.core.query_stats import QueryStats, current_query_stats
+from src.core.settings import settings
 from src.routers.medias import router as media_router
+from src.routers.metrics import router as metrics_router
 from src.routers.tweets import router as tweet_router
 from src.routers.users import router as user_router
 from src.schemas.exceptions import ExceptionSchema
+from src.services.tweet_service import missing_tweets
+from src.services.user_service import follow_graph, missing_users
+from src.services.user_tweet_service import like_buffer
 from src.services.utils import handle_errors
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Если включен буфер лайков, запускает его и сбрасывает оставшиеся лайки при остановке.
+    Если включен граф подписок в памяти, загружает его и запускает перезагрузку.
+    Если включена шина сбросов кэшей, подписывается на уведомления других процессов.
+    Если включен снимок ленты, отображает его в память и запускает проверку файла.
+    Если включен кэш несуществующих идентификаторов, загружает его и запускает перезагрузку.
+    При остановке отменяет предзагрузки страниц ленты.
+
+    Параметры:
+
+    app: Приложение
+    """
+    if settings.db.follow_graph_enabled:
+        await follow_graph.start()
+    if settings.db.like_buffer_enabled:
+        await like_buffer.start()
+    if settings.db.invalidation_bus_enabled:
+        await invalidation_bus.start()
+    if settings.db.feed_snapshot_enabled:
+        await feed_snapshot.start()
+    if settings.db.negative_cache_enabled:
+        await missing_users.start()
+        await missing_tweets.start()
+    try:
+        yield
+    finally:
+        await feed_prefetcher.stop()
+        if settings.db.negative_cache_enabled:
+            await missing_tweets.stop()
+            await missing_users.stop()
+        if settings.db.feed_snapshot_enabled:
+            await feed_snapshot.stop()
+        if settings.db.invalidation_bus_enabled:
+            await invalidation_bus.stop()
+        if settings.db.like_buffer_enabled:
+            await like_buffer.stop()
+        if settings.db.follow_graph_enabled:
+            await follow_graph.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     responses={
         401: {"model": ExceptionSchema},
         404: {"model": ExceptionSchema},
@@ -23,6 +79,35 @@ app = FastAPI(
 app.include_router(user_router, prefix="/api")
 app.include_router(tweet_router, prefix="/api")
 app.include_router(media_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+
+
+@app.middleware("http")
+async def collect_query_stats(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Собирает статистику запросов к базе данных, выполненных за время обработки запроса.
+
+    Параметры:
+
+    request: Запрос пользователя
+    call_next: Функция, передающая запрос дальше
+
+    Возвращает ответ приложения.
+    """
+    if not settings.db.query_stats:
+        return await call_next(request)
+    stats = QueryStats(request_name=f"{request.method} {request.url.path}")
+    token = current_query_stats.set(stats)
+    try:
+        return await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+        stats.report(
+            statement_budget=settings.db.statement_budget,
+            repeated_statement_limit=settings.db.repeated_statement_limit,
+        )
 
 
 @app.exception_handler(RequestValidationError)
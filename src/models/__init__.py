@@ -2,7 +2,15 @@
 Модуль с моделями SQLAlchemy.
 """
 
+from .archive import (
+    ArchivedLikeModel,
+    ArchivedTweetMediaAssociation,
+    ArchivedTweetModel,
+)
 from .base import Base
+from .follow_suggestion import FollowSuggestionModel
+from .like_counter_shard import LikeCounterShardModel
+from .like_version import LikeVersionModel
 from .media import MediaModel
 from .tweet_media_association import TweetMediaAssociation
 from .tweets import TweetModel
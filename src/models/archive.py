@@ -0,0 +1,98 @@
+"""
+Модуль с моделями архива старых твитов.
+Архивные таблицы повторяют структуру таблиц твитов, лайков и связей твитов с картинками,
+но не секционируются и читаются только при поиске твита по id.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import TEXT, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if TYPE_CHECKING:
+    from .media import MediaModel
+    from .users import UserModel
+
+
+class ArchivedTweetModel(Base):
+    """
+    Модель твита, перенесенного в архив.
+    """
+
+    __tablename__ = "archived_tweets"
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True)
+    )  # Дата создания твита
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )  # Дата переноса твита в архив
+    content: Mapped[str] = mapped_column(TEXT)  # Информация, содержащаяся в твите
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )  # Внешний ключ на автора твита
+
+    attachments: Mapped[list["MediaModel"]] = relationship(
+        secondary="archived_tweet_media_association",
+        viewonly=True,
+    )  # Картинки, относящиеся к твиту
+
+    author: Mapped["UserModel"] = relationship(viewonly=True)  # Автор твита
+
+    likes: Mapped[list["UserModel"]] = relationship(
+        secondary="archived_likes",
+        viewonly=True,
+    )  # Лайки твита
+
+
+class ArchivedLikeModel(Base):
+    """
+    Модель лайка твита, перенесенного в архив.
+    """
+
+    __tablename__ = "archived_likes"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "tweet_id",
+            name="idx_uniq_archived_user_tweet",
+        ),  # Ограничения на уникальность записей
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "users.id",
+            ondelete="CASCADE",
+        )
+    )  # Внешний ключ на пользователя
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "archived_tweets.id",
+            ondelete="CASCADE",
+        ),
+        index=True,
+    )  # Внешний ключ на архивный твит
+
+
+class ArchivedTweetMediaAssociation(Base):
+    """
+    Модель для связи архивного твита и картинки.
+    """
+
+    __tablename__ = "archived_tweet_media_association"
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "archived_tweets.id",
+            ondelete="CASCADE",
+        ),
+        index=True,
+    )  # Внешний ключ на архивный твит
+    media_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "medias.id",
+            ondelete="CASCADE",
+        ),
+        unique=True,
+    )  # Внешний ключ на картинку
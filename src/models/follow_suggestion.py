@@ -0,0 +1,38 @@
+"""
+Модуль с моделью рекомендации подписки.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class FollowSuggestionModel(Base):
+    """
+    Модель рекомендации подписки.
+    Рекомендации рассчитываются заданием по графу подписок и хранятся готовыми,
+    поэтому выдача рекомендаций читает только строки пользователя.
+    """
+
+    __tablename__ = "follow_suggestions"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "suggested_id",
+            name="idx_uniq_user_suggestion",
+        ),  # Пользователь рекомендуется один раз. Индекс также отдает рекомендации пользователя
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE")
+    )  # Пользователь, которому рекомендуется подписка
+    suggested_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )  # Рекомендуемый пользователь. Индекс нужен для каскадного удаления пользователя
+    score: Mapped[int]  # Сколько подписок пользователя подписаны на рекомендуемого
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )  # Время расчета. Устаревшие рекомендации удаляются в конце расчета
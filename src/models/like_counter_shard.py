@@ -0,0 +1,35 @@
+"""
+Модуль с моделью шарда счетчика лайков.
+"""
+
+from sqlalchemy import SmallInteger, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class LikeCounterShardModel(Base):
+    """
+    Модель шарда счетчика лайков популярного твита.
+    Лайки популярного твита меняют не строку твита, а одну из нескольких строк - шардов,
+    выбранную случайно, поэтому одновременные лайки не ждут блокировку одной строки.
+    Количество лайков твита равно like_count твита плюс сумма изменений в его шардах.
+    Лента сортируется по like_count и горячести твита, поэтому лайки популярного твита
+    попадают в порядок ленты, когда задание сверки счетчиков переносит шарды
+    в like_count и удаляет их, заодно удаляя шарды удаленных и перенесенных в архив твитов.
+    """
+
+    __tablename__ = "tweet_like_counter_shards"
+    __table_args__ = (
+        UniqueConstraint(
+            "tweet_id",
+            "shard",
+            name="idx_uniq_tweet_shard",
+        ),  # Один шард твита хранится в одной строке. Индекс также нужен для поиска шардов твита
+    )
+
+    tweet_id: Mapped[int]  # Ссылка на твит
+    shard: Mapped[int] = mapped_column(SmallInteger)  # Номер шарда
+    delta: Mapped[int] = mapped_column(
+        server_default="0"
+    )  # На сколько изменилось количество лайков
@@ -0,0 +1,40 @@
+"""
+Модуль с моделью номера последнего изменения лайка.
+"""
+
+from sqlalchemy import BigInteger, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class LikeVersionModel(Base):
+    """
+    Модель номера последнего записанного в базу изменения лайка пары (пользователь, твит).
+    Буфер лайков нумерует изменения, и изменение записывается в базу, только если его номер
+    больше сохраненного. Поэтому более старое изменение другого процесса или проигрывание
+    журнала упавшего процесса не отменяет более новое изменение.
+    Строки удаленного твита удаляет триггер удаления твита.
+    """
+
+    __tablename__ = "like_versions"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "tweet_id",
+            name="idx_uniq_like_version",
+        ),  # Одна пара хранится в одной строке
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "users.id",
+            ondelete="CASCADE",
+        )
+    )  # Внешний ключ на пользователя
+    tweet_id: Mapped[int] = mapped_column(
+        index=True
+    )  # Ссылка на твит. Индекс нужен для удаления строк удаленного твита
+    version: Mapped[int] = mapped_column(
+        BigInteger
+    )  # Номер последнего записанного изменения
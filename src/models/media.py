@@ -21,4 +21,6 @@ class MediaModel(Base):
     tweet: Mapped["TweetModel"] = relationship(
         back_populates="attachments",
         secondary="tweet_media_association",
+        primaryjoin="MediaModel.id == foreign(TweetMediaAssociation.media_id)",
+        secondaryjoin="TweetModel.id == foreign(TweetMediaAssociation.tweet_id)",
     )  # Твит, на который установлена эта картинка
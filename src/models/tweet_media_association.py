@@ -15,11 +15,8 @@ class TweetMediaAssociation(Base):
 
     __tablename__ = "tweet_media_association"
     tweet_id: Mapped[int] = mapped_column(
-        ForeignKey(
-            "tweets.id",
-            ondelete="CASCADE",
-        ),
-    )  # Внешний ключ на твит
+        index=True
+    )  # Ссылка на твит. Существование твита и каскадное удаление обеспечиваются триггерами
     media_id: Mapped[int] = mapped_column(
         ForeignKey(
             "medias.id",
@@ -2,11 +2,14 @@
 Модуль с моделями твита.
 """
 
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import TEXT, ForeignKey
+from sqlalchemy import DDL, TEXT, DateTime, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.core.ranking import HOT_SCORE_DEFAULT
+
 from .base import Base
 
 if TYPE_CHECKING:
@@ -17,16 +20,42 @@ if TYPE_CHECKING:
 class TweetModel(Base):
     """
     Модель твита.
+    Таблица секционирована по месяцам даты создания.
+    Первичный ключ секционированной таблицы должен включать ключ секционирования,
+    поэтому внешние ключи на твит заменены триггерами, см. миграцию partition_tweets_by_month.
     """
 
+    __table_args__ = (
+        Index("ix_tweets_hot", "hot_score", "id"),  # Лента по горячести
+        Index(
+            "ix_tweets_top", "like_count", "created_at", "id"
+        ),  # Лента по количеству лайков
+        Index("ix_tweets_new", "created_at", "id"),  # Лента по дате создания
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(
+        primary_key=True, autoincrement=True
+    )  # Идентификатор твита. Уникален, так как берется из последовательности
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )  # Дата создания твита и ключ секционирования
     content: Mapped[str] = mapped_column(TEXT)  # Информация, содержащаяся в твите
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE")
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
     )  # Внешний ключ на автора твита
+    like_count: Mapped[int] = mapped_column(
+        server_default="0"
+    )  # Количество лайков. Обновляется вместе с лайками и сверяется периодическим заданием
+    hot_score: Mapped[float] = mapped_column(
+        server_default=HOT_SCORE_DEFAULT
+    )  # Горячесть твита, см. src.core.ranking. Значение по умолчанию верно для даты создания по умолчанию
 
     attachments: Mapped[list["MediaModel"]] = relationship(
         back_populates="tweet",
         secondary="tweet_media_association",
+        primaryjoin="TweetModel.id == foreign(TweetMediaAssociation.tweet_id)",
+        secondaryjoin="MediaModel.id == foreign(TweetMediaAssociation.media_id)",
     )  # Картинки, относящиеся к твиту
 
     author: Mapped["UserModel"] = relationship(
@@ -35,4 +64,13 @@ class TweetModel(Base):
 
     likes: Mapped[list["UserModel"]] = relationship(
         secondary="likes",
+        primaryjoin="TweetModel.id == foreign(LikeModel.tweet_id)",
+        secondaryjoin="UserModel.id == foreign(LikeModel.user_id)",
     )  # Лайки твита
+
+
+event.listen(
+    TweetModel.__table__,
+    "after_create",
+    DDL("CREATE TABLE tweets_default PARTITION OF tweets DEFAULT"),
+)  # Секция для твитов, для месяца которых еще не создана своя секция
@@ -2,15 +2,19 @@
 Модуль с моделями, связывающими твит и пользователя.
 """
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import DDL, ForeignKey, UniqueConstraint, event
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
+LIKES_PARTITIONS = 16  # Количество секций таблицы лайков
+
 
 class LikeModel(Base):
     """
     Модель лайка.
+    Таблица секционирована по хэшу идентификатора твита,
+    поэтому все лайки одного твита лежат в одной секции.
     """
 
     __table_args__ = (
@@ -18,8 +22,12 @@ class LikeModel(Base):
             "user_id",
             "tweet_id",
             name="idx_uniq_user_tweet",
-        ),
-    )  # Ограничения на уникальность записей. Чтобы один пользователь не мог поставить более одного лайка твиту
+        ),  # Ограничения на уникальность записей. Чтобы один пользователь не мог поставить более одного лайка твиту
+        {"postgresql_partition_by": "HASH (tweet_id)"},
+    )
+    id: Mapped[int] = mapped_column(
+        primary_key=True, autoincrement=True
+    )  # Первичный ключ секционированной таблицы должен включать ключ секционирования
     user_id: Mapped[int] = mapped_column(
         ForeignKey(
             "users.id",
@@ -27,8 +35,18 @@ class LikeModel(Base):
         )
     )  # Внешний ключ на пользователя
     tweet_id: Mapped[int] = mapped_column(
-        ForeignKey(
-            "tweets.id",
-            ondelete="CASCADE",
-        )
-    )  # Внешний ключ на твит
+        primary_key=True,
+        index=True,
+    )  # Ссылка на твит и ключ секционирования. Индекс нужен для подсчета лайков твита.
+    # Существование твита и каскадное удаление обеспечиваются триггерами
+
+
+for remainder in range(LIKES_PARTITIONS):
+    event.listen(
+        LikeModel.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE likes_p{remainder} PARTITION OF likes "
+            f"FOR VALUES WITH (MODULUS {LIKES_PARTITIONS}, REMAINDER {remainder})"
+        ),
+    )  # Секции создаются вместе с таблицей при Base.metadata.create_all
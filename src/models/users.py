@@ -4,7 +4,7 @@
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -23,6 +23,12 @@ class UserModel(Base):
         unique=True
     )  # Токен пользователя. Является хэшем.
     # Должен быть уникальным для идентификации
+    followers_count: Mapped[int] = mapped_column(
+        server_default="0"
+    )  # Количество подписчиков. Меняется вместе с подписками, расхождения исправляет сверка
+    following_count: Mapped[int] = mapped_column(
+        server_default="0"
+    )  # Количество подписок
     tweets: Mapped[list["TweetModel"]] = relationship(
         back_populates="author"
     )  # Твиты, принадлежащие пользователю
@@ -51,9 +57,13 @@ class FollowerModel(Base):
             "user_id",
             "follower_id",
             name="idx_uniq_user_follower",
-        ),
-    )  # Ограничения на уникальность записей.
-    # Чтобы один пользователь не мог подписаться более одного раза на другого пользователя
+        ),  # Ограничения на уникальность записей.
+        # Чтобы один пользователь не мог подписаться более одного раза на другого пользователя.
+        # Индекс ограничения также отдает подписчиков пользователя по порядку
+        Index(
+            "ix_followers_follower_id_user_id", "follower_id", "user_id"
+        ),  # Индекс для постраничного поиска подписок пользователя
+    )
     user_id: Mapped[int] = mapped_column(
         ForeignKey(
             "users.id",
@@ -64,5 +74,5 @@ class FollowerModel(Base):
         ForeignKey(
             "users.id",
             ondelete="CASCADE",
-        )
+        ),
     )  # Внешний ключ на подписчика
@@ -0,0 +1,147 @@
+"""
+Модуль для работы с архивом старых твитов.
+"""
+
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.core.replicas import replica_read
+from src.models import (
+    ArchivedLikeModel,
+    ArchivedTweetMediaAssociation,
+    ArchivedTweetModel,
+    LikeModel,
+    TweetMediaAssociation,
+    TweetModel,
+)
+
+from .repository import ManagerRepository
+
+
+class ArchivedTweetRepository(ManagerRepository):
+    """
+    Класс - репозиторий для работы с архивом твитов.
+    """
+
+    model = ArchivedTweetModel
+
+    @classmethod
+    @replica_read
+    async def get_tweet_by_id(
+        cls, session: AsyncSession, tweet_id: int
+    ) -> ArchivedTweetModel | None:
+        """
+        Получает архивный твит по id. Присоединяет к нему автора, картинки, лайки.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+
+        Возвращает твит или None.
+        """
+        query = (
+            select(cls.model)
+            .filter(cls.model.id == tweet_id)
+            .options(selectinload(cls.model.author))
+            .options(selectinload(cls.model.attachments))
+            .options(selectinload(cls.model.likes))
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    @replica_read
+    async def get_tweets_by_ids(
+        cls, session: AsyncSession, tweet_ids: Sequence[int]
+    ) -> Sequence[ArchivedTweetModel]:
+        """
+        Получает архивные твиты по списку id. Присоединяет к ним авторов, картинки, лайки.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_ids: Идентификаторы твитов
+
+        Возвращает найденные твиты в произвольном порядке.
+        """
+        query = (
+            select(cls.model)
+            .filter(cls.model.id.in_(tweet_ids))
+            .options(selectinload(cls.model.author))
+            .options(selectinload(cls.model.attachments))
+            .options(selectinload(cls.model.likes))
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @classmethod
+    async def archive_tweets_batch(
+        cls, session: AsyncSession, cutoff: datetime, batch_size: int
+    ) -> int:
+        """
+        Переносит в архив пачку твитов, созданных раньше cutoff, вместе с их лайками
+        и связями с картинками без коммита.
+        Твиты пачки блокируются, поэтому лайк, поставленный во время переноса,
+        дождется конца транзакции и получит ошибку внешнего ключа.
+        Твиты, заблокированные другими транзакциями, пропускаются до следующего запуска.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        cutoff: Твиты, созданные раньше этой даты, переносятся в архив
+        batch_size: Максимальное количество твитов в пачке
+
+        Возвращает количество перенесенных твитов.
+        """
+        ids_query = (
+            select(TweetModel.id)
+            .filter(TweetModel.created_at < cutoff)
+            .order_by(TweetModel.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (await session.execute(ids_query)).scalars().all()
+        if not ids:
+            return 0
+        tweets_filter = (
+            TweetModel.id.in_(ids),
+            TweetModel.created_at < cutoff,
+        )  # Ограничение по дате оставляет в плане только секции старых месяцев
+        await session.execute(
+            insert(cls.model).from_select(
+                ["id", "created_at", "content", "user_id"],
+                select(
+                    TweetModel.id,
+                    TweetModel.created_at,
+                    TweetModel.content,
+                    TweetModel.user_id,
+                ).filter(*tweets_filter),
+            )
+        )
+        await session.execute(
+            insert(ArchivedLikeModel).from_select(
+                ["id", "user_id", "tweet_id"],
+                select(LikeModel.id, LikeModel.user_id, LikeModel.tweet_id).filter(
+                    LikeModel.tweet_id.in_(ids)
+                ),
+            )
+        )
+        await session.execute(
+            insert(ArchivedTweetMediaAssociation).from_select(
+                ["id", "tweet_id", "media_id"],
+                select(
+                    TweetMediaAssociation.id,
+                    TweetMediaAssociation.tweet_id,
+                    TweetMediaAssociation.media_id,
+                ).filter(TweetMediaAssociation.tweet_id.in_(ids)),
+            )
+        )
+        await session.execute(
+            delete(TweetModel).filter(*tweets_filter)
+        )  # Лайки и связи с картинками удаляются триггером на таблице твитов
+        return len(ids)
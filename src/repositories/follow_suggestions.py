@@ -0,0 +1,124 @@
+"""
+Модуль для работы с таблицей рекомендаций подписок.
+"""
+
+from typing import Sequence
+
+from sqlalchemy import Integer, Row, delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.core.replicas import replica_read
+from src.core.suggestions import Suggestions
+from src.models import FollowerModel, FollowSuggestionModel, UserModel
+
+from .repository import ManagerRepository
+
+
+class FollowSuggestionRepository(ManagerRepository):
+    """
+    Класс - репозиторий для работы с таблицей рекомендаций подписок.
+    """
+
+    model = FollowSuggestionModel
+
+    @classmethod
+    @replica_read
+    async def get_suggestions(
+        cls, session: AsyncSession, user_id: int, limit: int
+    ) -> Sequence[Row[tuple[int, str, int]]]:
+        """
+        Получает рекомендации пользователя по убыванию балла.
+        Пользователи, на которых он подписался после расчета, пропускаются.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+        limit: Количество рекомендаций
+
+        Возвращает id, имена и баллы рекомендуемых пользователей.
+        """
+        query = (
+            select(UserModel.id, UserModel.name, cls.model.score)
+            .join(cls.model, cls.model.suggested_id == UserModel.id)
+            .filter(
+                cls.model.user_id == user_id,
+                ~exists().where(
+                    FollowerModel.user_id == cls.model.suggested_id,
+                    FollowerModel.follower_id == user_id,
+                ),
+            )
+            .order_by(cls.model.score.desc(), cls.model.suggested_id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    @classmethod
+    async def replace(
+        cls, session: AsyncSession, suggestions: list[tuple[int, Suggestions]]
+    ) -> None:
+        """
+        Заменяет рекомендации пачки пользователей без коммита.
+        Рекомендации удаленных с момента расчета пользователей пропускаются,
+        а оставшиеся пользователи блокируются от удаления до конца транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        suggestions: Пары (пользователь, рекомендации)
+        """
+        if not suggestions:
+            return
+        await session.execute(
+            delete(cls.model).filter(
+                cls.model.user_id.in_([user_id for user_id, _ in suggestions])
+            )
+        )
+        rows = [
+            (user_id, suggested_id, score)
+            for user_id, user_suggestions in suggestions
+            for suggested_id, score in user_suggestions
+        ]
+        if not rows:
+            return
+        source = (
+            func.unnest(
+                literal([row[0] for row in rows], ARRAY(Integer)),
+                literal([row[1] for row in rows], ARRAY(Integer)),
+                literal([row[2] for row in rows], ARRAY(Integer)),
+            )
+            .table_valued("user_id", "suggested_id", "score")
+            .render_derived(name="suggestions")
+        )
+        suggested = aliased(UserModel)
+        query = (
+            select(source.c.user_id, source.c.suggested_id, source.c.score)
+            .join(UserModel, UserModel.id == source.c.user_id)
+            .join(suggested, suggested.id == source.c.suggested_id)
+            .with_for_update(key_share=True, read=True, of=[UserModel, suggested])
+        )
+        await session.execute(
+            insert(cls.model).from_select(["user_id", "suggested_id", "score"], query)
+        )
+
+    @classmethod
+    async def delete_without_following(cls, session: AsyncSession) -> int:
+        """
+        Удаляет рекомендации пользователей, которые ни на кого не подписаны, без коммита.
+        Такие пользователи не попадают в расчет, и их старые рекомендации иначе остались бы.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+
+        Возвращает количество удаленных рекомендаций.
+        """
+        result = await session.execute(
+            delete(cls.model).filter(
+                ~exists().where(FollowerModel.follower_id == cls.model.user_id)
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,94 @@
+"""
+Модуль для работы с таблицей шардов счетчиков лайков.
+"""
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.ranking import hot_score_expression
+from src.models import LikeCounterShardModel, TweetModel
+
+from .repository import ManagerRepository
+
+
+class LikeCounterShardRepository(ManagerRepository):
+    """
+    Класс - репозиторий для работы с таблицей шардов счетчиков лайков.
+    """
+
+    model = LikeCounterShardModel
+
+    @classmethod
+    async def add(
+        cls, session: AsyncSession, tweet_id: int, shard: int, delta: int
+    ) -> None:
+        """
+        Изменяет количество лайков твита в одном шарде без коммита.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+        shard: Номер шарда
+        delta: На сколько изменить количество лайков
+        """
+        stmt = insert(cls.model).values(tweet_id=tweet_id, shard=shard, delta=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.model.tweet_id, cls.model.shard],
+            set_={"delta": cls.model.delta + stmt.excluded.delta},
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    async def fold(cls, session: AsyncSession, batch_size: int) -> int:
+        """
+        Переносит шарды пачки твитов в количество лайков и горячесть твитов
+        и удаляет их одним запросом без коммита.
+        Твиты блокируются по возрастанию идентификатора, как при пакетном изменении счетчиков.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Количество твитов в пачке
+
+        Возвращает количество твитов, шарды которых были перенесены.
+        """
+        ids_query = (
+            select(cls.model.tweet_id)
+            .distinct()
+            .order_by(cls.model.tweet_id)
+            .limit(batch_size)
+        )
+        ids = (await session.execute(ids_query)).scalars().all()
+        if not ids:
+            return 0
+        lock_query = (
+            select(TweetModel.id)
+            .filter(TweetModel.id.in_(ids))
+            .order_by(TweetModel.id)
+            .with_for_update(key_share=True)
+        )
+        await session.execute(lock_query)
+        folded = (
+            delete(cls.model)
+            .filter(cls.model.tweet_id.in_(ids))
+            .returning(cls.model.tweet_id, cls.model.delta)
+            .cte("folded")
+        )
+        sums = (
+            select(folded.c.tweet_id, func.sum(folded.c.delta).label("delta"))
+            .group_by(folded.c.tweet_id)
+            .subquery("sums")
+        )
+        like_count = TweetModel.like_count + sums.c.delta
+        stmt = (
+            update(TweetModel)
+            .filter(TweetModel.id == sums.c.tweet_id)
+            .values(
+                like_count=like_count,
+                hot_score=hot_score_expression(like_count, TweetModel.created_at),
+            )
+        )
+        await session.execute(stmt)
+        return len(ids)
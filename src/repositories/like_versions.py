@@ -0,0 +1,65 @@
+"""
+Модуль для работы с таблицей номеров изменений лайков.
+"""
+
+from sqlalchemy import BigInteger, Integer, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import LikeVersionModel, TweetModel, UserModel
+
+from .repository import ManagerRepository
+
+
+class LikeVersionRepository(ManagerRepository):
+    """
+    Класс - репозиторий для работы с таблицей номеров изменений лайков.
+    """
+
+    model = LikeVersionModel
+
+    @classmethod
+    async def advance(
+        cls, session: AsyncSession, versions: dict[tuple[int, int], int]
+    ) -> set[tuple[int, int]]:
+        """
+        Сохраняет номера изменений пар одним запросом без коммита,
+        если они больше уже сохраненных. Строки пар блокируются до конца транзакции
+        в порядке пар, поэтому одновременные записи одной пары выполняются по очереди.
+        Пары несуществующих твитов и пользователей пропускаются, а твиты и пользователи
+        блокируются от удаления до конца транзакции, как при вставке лайков.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        versions: Номера изменений пар (пользователь, твит)
+
+        Возвращает пары, изменения которых новее сохраненных и должны быть записаны.
+        """
+        if not versions:
+            return set()
+        keys = sorted(versions)
+        source = (
+            func.unnest(
+                literal([user_id for user_id, _ in keys], ARRAY(Integer)),
+                literal([tweet_id for _, tweet_id in keys], ARRAY(Integer)),
+                literal([versions[key] for key in keys], ARRAY(BigInteger)),
+            )
+            .table_valued("user_id", "tweet_id", "version")
+            .render_derived(name="versions")
+        )
+        query = (
+            select(source.c.user_id, source.c.tweet_id, source.c.version)
+            .join(TweetModel, TweetModel.id == source.c.tweet_id)
+            .join(UserModel, UserModel.id == source.c.user_id)
+            .order_by(source.c.user_id, source.c.tweet_id)
+            .with_for_update(read=True, key_share=True, of=[TweetModel, UserModel])
+        )
+        stmt = insert(cls.model).from_select(["user_id", "tweet_id", "version"], query)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.model.user_id, cls.model.tweet_id],
+            set_={"version": stmt.excluded.version},
+            where=cls.model.version < stmt.excluded.version,
+        ).returning(cls.model.user_id, cls.model.tweet_id)
+        result = await session.execute(stmt)
+        return {(user_id, tweet_id) for user_id, tweet_id in result}
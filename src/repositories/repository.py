@@ -3,11 +3,12 @@
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Any, Optional
 
 from fastapi import HTTPException, status
 from fastapi.exceptions import RequestValidationError
-from sqlalchemy import delete, func, insert, select
+from sqlalchemy import BigInteger, Text, cast, delete, func, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -119,6 +120,37 @@ class AbstractRepository(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_id_watermark(self, session: AsyncSession) -> tuple[int, int, int]:
+        """
+        Получает наибольший идентификатор записи в таблице и границы снимка транзакций.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+
+        Возвращает идентификатор или 0, если таблица пуста,
+        наименьший идентификатор выполняющейся транзакции
+        и идентификатор, который получит следующая транзакция.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_ids(
+        self, session: AsyncSession, batch_size: int
+    ) -> AsyncIterator[list[int]]:
+        """
+        Читает идентификаторы всех записей серверным курсором пачками.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Сколько идентификаторов читается за одно обращение к курсору
+
+        Возвращает асинхронный итератор пачек идентификаторов.
+        """
+        raise NotImplementedError
+
 
 class ManagerRepository(AbstractRepository):
     """
@@ -210,7 +242,9 @@ class ManagerRepository(AbstractRepository):
         cls, session: AsyncSession, data: dict
     ) -> Optional[model]:
         """
-        Ищет объект в базе данных.
+        Ищет объект в базе данных. Запрос всегда выполняется на основной базе:
+        по нему проверяется токен, и только что созданный пользователь
+        должен находиться, даже если реплики отстают.
 
         Параметры:
 
@@ -254,3 +288,48 @@ class ManagerRepository(AbstractRepository):
         """
         query = select(func.count(cls.model.id))
         return await session.scalar(query)
+
+    @classmethod
+    async def get_id_watermark(cls, session: AsyncSession) -> tuple[int, int, int]:
+        """
+        Получает наибольший идентификатор записи в таблице и границы снимка транзакций
+        одним запросом. Когда наименьшая выполняющаяся транзакция станет не меньше
+        следующей транзакции снимка, все записи с идентификатором не больше наибольшего
+        будут закоммичены или откачены.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+
+        Возвращает идентификатор или 0, если таблица пуста,
+        наименьший идентификатор выполняющейся транзакции
+        и идентификатор, который получит следующая транзакция.
+        """
+        snapshot = func.pg_current_snapshot()
+        query = select(
+            func.coalesce(func.max(cls.model.id), 0),
+            cast(cast(func.pg_snapshot_xmin(snapshot), Text), BigInteger),
+            cast(cast(func.pg_snapshot_xmax(snapshot), Text), BigInteger),
+        )
+        result = await session.execute(query)
+        return result.tuples().one()
+
+    @classmethod
+    async def stream_ids(
+        cls, session: AsyncSession, batch_size: int
+    ) -> AsyncIterator[list[int]]:
+        """
+        Читает идентификаторы всех записей серверным курсором пачками,
+        не загружая таблицу в память целиком.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Сколько идентификаторов читается за одно обращение к курсору
+
+        Возвращает асинхронный итератор пачек идентификаторов.
+        """
+        query = select(cls.model.id).execution_options(yield_per=batch_size)
+        result = await session.stream_scalars(query)
+        async for object_ids in result.partitions():
+            yield list(object_ids)
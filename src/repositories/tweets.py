@@ -4,14 +4,28 @@
 
 from typing import Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import ColumnElement, Integer, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.models import LikeModel, TweetModel
+from src.core.ranking import FeedSort, hot_score_expression
+from src.core.replicas import replica_read
+from src.models import LikeCounterShardModel, LikeModel, TweetModel
 
 from .repository import ManagerRepository
 
+FEED_ORDER = {
+    FeedSort.HOT: (TweetModel.hot_score.desc(), TweetModel.id.desc()),
+    FeedSort.TOP: (
+        TweetModel.like_count.desc(),
+        TweetModel.created_at.desc(),
+        TweetModel.id.desc(),
+    ),
+    FeedSort.NEW: (TweetModel.created_at.desc(), TweetModel.id.desc()),
+}  # Сортировки ленты. Каждой соответствует индекс модели твита
+HOT_SCORE_TOLERANCE = 1e-9  # Горячесть по умолчанию считается в numeric и может отличаться в последнем бите
+
 
 class TweetRepository(ManagerRepository):
     """
@@ -21,31 +35,271 @@ class TweetRepository(ManagerRepository):
     model = TweetModel
 
     @classmethod
+    @replica_read
     async def get_user_tweets(
-        cls, session: AsyncSession, offset: int | None, limit: int | None
+        cls,
+        session: AsyncSession,
+        offset: int | None,
+        limit: int | None,
+        sort: FeedSort = FeedSort.TOP,
     ) -> Sequence[TweetModel]:
         """
         Получает все существующие твиты. Присоединяет к ним авторов, картинки, лайки.
-        Сортирует по количеству лайков и id.
 
         Параметры:
 
         session: Сессия для асинхронной работы с базой данных
         offset: с какого твита нужно показывать оставшиеся
         limit: ограничение количество твитов
+        sort: Порядок твитов. По умолчанию по количеству лайков, дате создания и id
 
         Возвращает твиты.
         """
         query = (
             select(cls.model)
-            .outerjoin(LikeModel, LikeModel.tweet_id == cls.model.id)
             .options(selectinload(cls.model.author))
             .options(selectinload(cls.model.attachments))
             .options(selectinload(cls.model.likes))
-            .group_by(cls.model.id)
-            .order_by(func.count(LikeModel.id).desc(), cls.model.id.desc())
+            .order_by(*FEED_ORDER[sort])
         )
         if offset and limit:
             query = query.offset((offset - 1) * limit).limit(limit)
         result = await session.execute(query)
         return result.scalars().all()
+
+    @classmethod
+    @replica_read
+    async def get_user_tweet_ids(
+        cls,
+        session: AsyncSession,
+        offset: int | None,
+        limit: int | None,
+        sort: FeedSort = FeedSort.TOP,
+    ) -> Sequence[int]:
+        """
+        Получает идентификаторы твитов страницы ленты без связанных данных.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        offset: с какого твита нужно показывать оставшиеся
+        limit: ограничение количество твитов
+        sort: Порядок твитов. По умолчанию по количеству лайков, дате создания и id
+
+        Возвращает идентификаторы твитов по порядку.
+        """
+        query = select(cls.model.id).order_by(*FEED_ORDER[sort])
+        if offset and limit:
+            query = query.offset((offset - 1) * limit).limit(limit)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @classmethod
+    @replica_read
+    async def get_tweet_by_id(
+        cls, session: AsyncSession, tweet_id: int
+    ) -> TweetModel | None:
+        """
+        Получает твит по id. Присоединяет к нему автора, картинки, лайки.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+
+        Возвращает твит или None.
+        """
+        query = (
+            select(cls.model)
+            .filter(cls.model.id == tweet_id)
+            .options(selectinload(cls.model.author))
+            .options(selectinload(cls.model.attachments))
+            .options(selectinload(cls.model.likes))
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    @replica_read
+    async def get_tweets_by_ids(
+        cls, session: AsyncSession, tweet_ids: Sequence[int]
+    ) -> Sequence[TweetModel]:
+        """
+        Получает твиты по списку id. Присоединяет к ним авторов, картинки, лайки.
+        Количество запросов не зависит от количества твитов.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_ids: Идентификаторы твитов
+
+        Возвращает найденные твиты в произвольном порядке.
+        """
+        query = (
+            select(cls.model)
+            .filter(cls.model.id.in_(tweet_ids))
+            .options(selectinload(cls.model.author))
+            .options(selectinload(cls.model.attachments))
+            .options(selectinload(cls.model.likes))
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    @staticmethod
+    def get_shards_sum(tweet_id: ColumnElement[int]) -> ColumnElement[int]:
+        """
+        Возвращает выражение SQL с суммой изменений количества лайков твита в шардах счетчика.
+
+        Параметры:
+
+        tweet_id: Выражение с идентификатором твита
+        """
+        return func.coalesce(
+            select(func.sum(LikeCounterShardModel.delta))
+            .filter(LikeCounterShardModel.tweet_id == tweet_id)
+            .scalar_subquery(),
+            0,
+        )
+
+    @classmethod
+    async def change_like_count(
+        cls, session: AsyncSession, tweet_id: int, delta: int
+    ) -> None:
+        """
+        Изменяет количество лайков твита и пересчитывает его горячесть без коммита.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+        delta: На сколько изменить количество лайков
+        """
+        like_count = cls.model.like_count + delta
+        stmt = (
+            update(cls.model)
+            .filter(cls.model.id == tweet_id)
+            .values(
+                like_count=like_count,
+                hot_score=hot_score_expression(like_count, cls.model.created_at),
+            )
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    async def change_like_counts(
+        cls, session: AsyncSession, deltas: dict[int, int]
+    ) -> None:
+        """
+        Изменяет количество лайков и горячесть нескольких твитов одним запросом без коммита.
+        Твиты блокируются по возрастанию идентификатора, чтобы пачки из разных процессов
+        не блокировали друг друга взаимно.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        deltas: Словарь, где ключ - идентификатор твита, значение - на сколько изменить количество лайков
+        """
+        ids = sorted(tweet_id for tweet_id, delta in deltas.items() if delta)
+        if not ids:
+            return
+        lock_query = (
+            select(cls.model.id)
+            .filter(cls.model.id.in_(ids))
+            .order_by(cls.model.id)
+            .with_for_update(key_share=True)
+        )
+        await session.execute(lock_query)
+        changes = (
+            func.unnest(
+                literal(ids, ARRAY(Integer)),
+                literal([deltas[tweet_id] for tweet_id in ids], ARRAY(Integer)),
+            )
+            .table_valued("id", "delta")
+            .render_derived(name="changes")
+        )
+        like_count = cls.model.like_count + changes.c.delta
+        stmt = (
+            update(cls.model)
+            .filter(cls.model.id == changes.c.id)
+            .values(
+                like_count=like_count,
+                hot_score=hot_score_expression(like_count, cls.model.created_at),
+            )
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    async def reconcile_like_counts(
+        cls, session: AsyncSession, after_id: int, batch_size: int
+    ) -> tuple[int | None, int]:
+        """
+        Сверяет количество лайков и горячесть пачки твитов с таблицей лайков без коммита.
+        Лайки, учтенные в шардах счетчика, вычитаются из ожидаемого количества.
+        Твиты пачки сначала блокируются, поэтому подсчет видит все лайки, чьи транзакции
+        успели изменить счетчик, а более поздние лайки изменят уже исправленное значение.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        after_id: Идентификатор твита, после которого начинается пачка
+        batch_size: Количество твитов в пачке
+
+        Возвращает идентификатор последнего твита пачки или None, если твитов больше нет,
+        и количество исправленных твитов.
+        """
+        ids_query = (
+            select(cls.model.id)
+            .filter(cls.model.id > after_id)
+            .order_by(cls.model.id)
+            .limit(batch_size)
+            .with_for_update(key_share=True)
+        )
+        ids = (await session.execute(ids_query)).scalars().all()
+        if not ids:
+            return None, 0
+        like_count = (
+            select(func.count(LikeModel.id))
+            .filter(LikeModel.tweet_id == cls.model.id)
+            .scalar_subquery()
+        ) - cls.get_shards_sum(cls.model.id)
+        hot_score = hot_score_expression(like_count, cls.model.created_at)
+        stmt = (
+            update(cls.model)
+            .filter(
+                cls.model.id.in_(ids),
+                or_(
+                    cls.model.like_count != like_count,
+                    func.abs(cls.model.hot_score - hot_score) > HOT_SCORE_TOLERANCE,
+                ),
+            )
+            .values(like_count=like_count, hot_score=hot_score)
+        )
+        result = await session.execute(stmt)
+        return ids[-1], result.rowcount
+
+    @classmethod
+    async def create_partitions(cls, session: AsyncSession, months_ahead: int) -> int:
+        """
+        Создает секции таблицы твитов на текущий и следующие месяцы, если их еще нет,
+        и переносит в них твиты этих месяцев из секции по умолчанию.
+        Одновременные вызовы выполняются по очереди под advisory-блокировкой,
+        поэтому следующий видит секции, созданные предыдущим.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        months_ahead: На сколько месяцев вперед нужно создать секции
+
+        Возвращает количество созданных секций.
+        """
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(func.hashtext("create_tweets_partitions"))
+            )
+        )
+        result = await session.execute(
+            select(func.create_tweets_partitions(months_ahead))
+        )
+        created = result.scalar_one()
+        await session.commit()
+        return created
@@ -2,14 +2,102 @@
 Модуль для работы с таблицей лайков.
 """
 
-from src.models import LikeModel
+from typing import Sequence
+
+from sqlalchemy import Integer, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.selectable import TableValuedAlias
+
+from src.models import LikeModel, TweetModel, UserModel
 
 from .repository import ManagerRepository
 
 
+def unnest_pairs(pairs: Sequence[tuple[int, int]]) -> TableValuedAlias:
+    """
+    Возвращает таблицу из пар (пользователь, твит), переданных одним параметром на колонку.
+
+    Параметры:
+
+    pairs: Пары идентификаторов пользователя и твита
+    """
+    user_ids = [user_id for user_id, _ in pairs]
+    tweet_ids = [tweet_id for _, tweet_id in pairs]
+    return (
+        func.unnest(
+            literal(user_ids, ARRAY(Integer)), literal(tweet_ids, ARRAY(Integer))
+        )
+        .table_valued("user_id", "tweet_id")
+        .render_derived(name="pairs")
+    )
+
+
 class LikeRepository(ManagerRepository):
     """
     Класс - репозиторий для работы с таблицей лайков.
     """
 
     model = LikeModel
+
+    @classmethod
+    async def insert_many(
+        cls, session: AsyncSession, pairs: Sequence[tuple[int, int]]
+    ) -> list[int]:
+        """
+        Ставит лайки одним запросом без коммита.
+        Уже существующие лайки и лайки удаленных твитов или пользователей пропускаются.
+        Твиты и пользователи блокируются от удаления до конца транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        pairs: Пары идентификаторов пользователя и твита
+
+        Возвращает идентификаторы твитов для каждого поставленного лайка.
+        """
+        if not pairs:
+            return []
+        source = unnest_pairs(pairs)
+        query = (
+            select(source.c.user_id, source.c.tweet_id)
+            .join(TweetModel, TweetModel.id == source.c.tweet_id)
+            .join(UserModel, UserModel.id == source.c.user_id)
+            .with_for_update(read=True, key_share=True, of=[TweetModel, UserModel])
+        )
+        stmt = (
+            insert(cls.model)
+            .from_select(["user_id", "tweet_id"], query)
+            .on_conflict_do_nothing()
+            .returning(cls.model.tweet_id)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars())
+
+    @classmethod
+    async def delete_many(
+        cls, session: AsyncSession, pairs: Sequence[tuple[int, int]]
+    ) -> list[int]:
+        """
+        Снимает лайки одним запросом без коммита. Несуществующие лайки пропускаются.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        pairs: Пары идентификаторов пользователя и твита
+
+        Возвращает идентификаторы твитов для каждого снятого лайка.
+        """
+        if not pairs:
+            return []
+        source = unnest_pairs(pairs)
+        stmt = (
+            delete(cls.model)
+            .filter(
+                cls.model.user_id == source.c.user_id,
+                cls.model.tweet_id == source.c.tweet_id,
+            )
+            .returning(cls.model.tweet_id)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars())
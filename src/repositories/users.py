@@ -2,12 +2,13 @@
 Модуль для работы с таблицей пользователей.
 """
 
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import Row, select
+from sqlalchemy import Integer, Row, and_, case, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import load_only, selectinload
 
+from src.core.replicas import replica_read
 from src.models import FollowerModel, UserModel
 
 from .repository import ManagerRepository
@@ -21,24 +22,167 @@ class UserRepository(ManagerRepository):
     model = UserModel
 
     @classmethod
-    async def get_user_followers_and_following(
+    @replica_read
+    async def get_user_with_counts(
         cls, session: AsyncSession, user_id: int
-    ) -> UserModel | None:
-        query = (
-            select(UserModel)
-            .options(
-                load_only(UserModel.id, UserModel.name),
-                selectinload(UserModel.followers).load_only(
-                    UserModel.id, UserModel.name
-                ),
-                selectinload(UserModel.following).load_only(
-                    UserModel.id, UserModel.name
+    ) -> Row[tuple[int, str, int, int]] | None:
+        """
+        Получает пользователя вместе с количеством подписчиков и подписок,
+        хранящимся в его строке.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+
+        Возвращает id, имя, количество подписчиков и количество подписок пользователя
+        или None, если пользователь не найден.
+        """
+        query = select(
+            cls.model.id,
+            cls.model.name,
+            cls.model.followers_count,
+            cls.model.following_count,
+        ).filter(cls.model.id == user_id)
+        result = await session.execute(query)
+        return result.one_or_none()
+
+    @classmethod
+    @replica_read
+    async def get_names(
+        cls, session: AsyncSession, user_ids: list[int]
+    ) -> Sequence[Row[tuple[int, str]]]:
+        """
+        Получает id и имена пользователей в порядке переданных id.
+        Отсутствующие пользователи пропускаются.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_ids: Идентификаторы пользователей
+
+        Возвращает id и имена пользователей.
+        """
+        if not user_ids:
+            return []
+        query = select(cls.model.id, cls.model.name).filter(cls.model.id.in_(user_ids))
+        rows = {row.id: row for row in (await session.execute(query)).all()}
+        return [rows[user_id] for user_id in user_ids if user_id in rows]
+
+    @classmethod
+    async def change_follow_counts(
+        cls, session: AsyncSession, user_id: int, follower_id: int, delta: int
+    ) -> None:
+        """
+        Изменяет количество подписчиков пользователя и количество подписок подписчика
+        одним запросом без коммита.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя, на которого подписываются
+        follower_id: Идентификатор подписчика
+        delta: 1 при подписке, -1 при отписке
+        """
+        stmt = (
+            update(cls.model)
+            .filter(cls.model.id.in_([user_id, follower_id]))
+            .values(
+                followers_count=cls.model.followers_count
+                + case((cls.model.id == user_id, delta), else_=0),
+                following_count=cls.model.following_count
+                + case((cls.model.id == follower_id, delta), else_=0),
+            )
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    async def add_following(
+        cls, session: AsyncSession, follower_id: int, user_ids: list[int]
+    ) -> None:
+        """
+        Увеличивает количество подписчиков пачки пользователей
+        и количество подписок подписчика на размер пачки без коммита.
+        Пользователи сначала блокируются по возрастанию идентификатора,
+        поэтому одновременные подписки на пересекающиеся пачки не взаимоблокируются.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        follower_id: Идентификатор подписчика
+        user_ids: Идентификаторы пользователей, на которых подписчик подписался
+        """
+        if not user_ids:
+            return
+        lock_query = (
+            select(cls.model.id)
+            .filter(cls.model.id.in_([follower_id, *user_ids]))
+            .order_by(cls.model.id)
+            .with_for_update(key_share=True)
+        )
+        await session.execute(lock_query)
+        stmt = (
+            update(cls.model)
+            .filter(cls.model.id.in_([follower_id, *user_ids]))
+            .values(
+                followers_count=cls.model.followers_count
+                + case((cls.model.id.in_(user_ids), 1), else_=0),
+                following_count=cls.model.following_count
+                + case((cls.model.id == follower_id, len(user_ids)), else_=0),
+            )
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    async def reconcile_follow_counts(
+        cls, session: AsyncSession, after_id: int, batch_size: int
+    ) -> tuple[int | None, int]:
+        """
+        Сверяет количество подписчиков и подписок пачки пользователей с таблицей подписчиков
+        без коммита. Пользователи пачки сначала блокируются, как при сверке счетчиков лайков.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        after_id: Идентификатор пользователя, после которого начинается пачка
+        batch_size: Количество пользователей в пачке
+
+        Возвращает идентификатор последнего пользователя пачки или None,
+        если пользователей больше нет, и количество исправленных пользователей.
+        """
+        ids_query = (
+            select(cls.model.id)
+            .filter(cls.model.id > after_id)
+            .order_by(cls.model.id)
+            .limit(batch_size)
+            .with_for_update(key_share=True)
+        )
+        ids = (await session.execute(ids_query)).scalars().all()
+        if not ids:
+            return None, 0
+        followers_count = (
+            select(func.count(FollowerModel.id))
+            .filter(FollowerModel.user_id == cls.model.id)
+            .scalar_subquery()
+        )
+        following_count = (
+            select(func.count(FollowerModel.id))
+            .filter(FollowerModel.follower_id == cls.model.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(cls.model)
+            .filter(
+                cls.model.id.in_(ids),
+                or_(
+                    cls.model.followers_count != followers_count,
+                    cls.model.following_count != following_count,
                 ),
             )
-            .filter(UserModel.id == user_id)
+            .values(followers_count=followers_count, following_count=following_count)
         )
-        result = await session.execute(query)
-        return result.scalars().one_or_none()
+        result = await session.execute(stmt)
+        return ids[-1], result.rowcount
 
 
 class UserFollowerRepository(ManagerRepository):
@@ -49,45 +193,167 @@ class UserFollowerRepository(ManagerRepository):
     model = FollowerModel
 
     @classmethod
+    @replica_read
     async def get_followers_user(
-        cls, session: AsyncSession, user_id: int
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        after_id: int = 0,
+        limit: int | None = None,
     ) -> Sequence[Row[tuple[int, str]]]:
         """
-        Получает подписчиков пользователя по id.
+        Получает подписчиков пользователя по id в порядке возрастания их id.
+        Страница читается из индекса (user_id, follower_id) начиная с after_id,
+        поэтому ее стоимость не зависит от номера страницы.
 
         Параметры:
 
         session: Сессия для асинхронной работы с базой данных
         user_id: Идентификатор пользователя
+        after_id: Идентификатор подписчика, после которого начинается страница
+        limit: Количество подписчиков на странице. Если не передано, возвращаются все
 
         Возвращает id и имена подписчиков пользователя.
         """
         query = (
             select(UserModel.id, UserModel.name)
             .join(cls.model, cls.model.follower_id == UserModel.id)
-            .filter(cls.model.user_id == user_id)
+            .filter(cls.model.user_id == user_id, cls.model.follower_id > after_id)
+            .order_by(cls.model.follower_id)
+            .limit(limit)
         )
         result = await session.execute(query)
         return result.all()
 
     @classmethod
+    @replica_read
     async def get_following_user(
-        cls, session: AsyncSession, user_id: int
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        after_id: int = 0,
+        limit: int | None = None,
     ) -> Sequence[Row[tuple[int, str]]]:
         """
-        Получает юзеров, у которых в подписчиках есть пользователь с идентификатором user_id.
+        Получает юзеров, у которых в подписчиках есть пользователь с идентификатором user_id,
+        в порядке возрастания их id. Страница читается из индекса (follower_id, user_id).
 
         Параметры:
 
         session: Сессия для работы с асинхронной базой данных
         user_id: Идентификатор пользователя
+        after_id: Идентификатор юзера, после которого начинается страница
+        limit: Количество юзеров на странице. Если не передано, возвращаются все
 
         Возвращает id и имена юзеров, на которых подписан пользователь с идентификатором user_id.
         """
         query = (
             select(UserModel.id, UserModel.name)
             .join(cls.model, cls.model.user_id == UserModel.id)
-            .filter(cls.model.follower_id == user_id)
+            .filter(cls.model.follower_id == user_id, cls.model.user_id > after_id)
+            .order_by(cls.model.user_id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    @classmethod
+    async def stream_edges(
+        cls, session: AsyncSession, by_follower: bool, batch_size: int
+    ) -> AsyncIterator[tuple[int, int]]:
+        """
+        Читает все подписки серверным курсором пачками, не загружая таблицу в память целиком.
+        Подписки читаются из индекса в порядке возрастания пары.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        by_follower: True - пары (подписчик, пользователь), False - пары (пользователь, подписчик)
+        batch_size: Сколько подписок читается за одно обращение к курсору
+
+        Возвращает асинхронный итератор пар.
+        """
+        columns = (
+            (cls.model.follower_id, cls.model.user_id)
+            if by_follower
+            else (cls.model.user_id, cls.model.follower_id)
+        )
+        query = (
+            select(*columns).order_by(*columns).execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(query)
+        async for node, target in result:
+            yield node, target
+
+    @classmethod
+    @replica_read
+    async def get_relationships(
+        cls, session: AsyncSession, user_id: int, other_ids: list[int]
+    ) -> Sequence[Row[tuple[int, int]]]:
+        """
+        Получает подписки между пользователем и пачкой других пользователей одним запросом.
+        Подписки пользователя ищутся по индексу (follower_id, user_id),
+        подписчики - по индексу (user_id, follower_id).
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+        other_ids: Идентификаторы других пользователей
+
+        Возвращает пары (пользователь, подписчик) найденных подписок.
+        """
+        query = select(cls.model.user_id, cls.model.follower_id).filter(
+            or_(
+                and_(
+                    cls.model.follower_id == user_id,
+                    cls.model.user_id.in_(other_ids),
+                ),
+                and_(
+                    cls.model.user_id == user_id,
+                    cls.model.follower_id.in_(other_ids),
+                ),
+            )
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    @classmethod
+    async def create_many(
+        cls, session: AsyncSession, follower_id: int, user_ids: list[int]
+    ) -> Sequence[Row[tuple[int, bool]]]:
+        """
+        Подписывает пользователя на пачку пользователей одним запросом без коммита.
+        Существующие пользователи выбираются и блокируются от удаления до конца транзакции,
+        а подписки вставляются с пропуском уже существующих.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        follower_id: Идентификатор подписчика
+        user_ids: Идентификаторы пользователей, на которых нужно подписаться
+
+        Возвращает id существующих пользователей, кроме самого подписчика,
+        и признак того, что подписка на них была создана.
+        """
+        targets = (
+            select(UserModel.id)
+            .filter(UserModel.id.in_(user_ids), UserModel.id != follower_id)
+            .with_for_update(read=True, key_share=True)
+            .cte("targets")
+        )
+        inserted = (
+            insert(cls.model)
+            .from_select(
+                ["user_id", "follower_id"],
+                select(targets.c.id, literal(follower_id, Integer)),
+            )
+            .on_conflict_do_nothing()
+            .returning(cls.model.user_id)
+            .cte("inserted")
+        )
+        query = select(targets.c.id, inserted.c.user_id.is_not(None)).outerjoin(
+            inserted, inserted.c.user_id == targets.c.id
         )
         result = await session.execute(query)
         return result.all()
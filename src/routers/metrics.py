@@ -0,0 +1,20 @@
+"""
+Модуль с контроллером метрик.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """
+    Отдает метрики процесса в текстовом формате Prometheus.
+
+    Возвращает строку со всеми метриками.
+    """
+    return metrics.render()
@@ -2,18 +2,24 @@
 Модуль с контроллерами твитов.
 """
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.db_helper import db_helper
+from src.core.ranking import FeedSort
 from src.dependencies.users import get_user
 from src.schemas.generic import ResultSchema
-from src.schemas.tweets import TweetInResultSchema, TweetInSchema, TweetsOutputSchema
+from src.schemas.tweets import (
+    TweetInResultSchema,
+    TweetInSchema,
+    TweetOutputSchema,
+    TweetsOutputSchema,
+)
 from src.services.tweet_service import TweetService
 from src.services.user_service import UserFollowerService
 from src.services.user_tweet_service import LikeService
 from src.types.path import FromOneToMlnPath
-from src.types.query import FromOneToMlnQuery
+from src.types.query import FromOneToMlnQuery, IdsQuery
 
 router = APIRouter(prefix="/tweets", tags=["/tweets"])
 
@@ -46,8 +52,9 @@ async def create_tweet_user(
 async def get_tweets_user(
     offset: FromOneToMlnQuery = None,
     limit: FromOneToMlnQuery = None,
+    sort: FeedSort = FeedSort.TOP,
     session: AsyncSession = Depends(db_helper.get_async_session),
-) -> TweetsOutputSchema:
+) -> TweetsOutputSchema | Response:
     """
     Получает все существующие твиты.
 
@@ -56,14 +63,55 @@ async def get_tweets_user(
     session: Сессия для асинхронной работы с базой данных
     offset: с какого твита нужно показывать оставшиеся
     limit: ограничение количество твитов
+    sort: Порядок твитов: hot - по горячести, top - по количеству лайков, new - по дате создания
 
     Возвращает словарь со всеми твитами и статусом операции.
     """
     return await TweetService.get_tweets_user(
-        session=session, offset=offset, limit=limit
+        session=session, offset=offset, limit=limit, sort=sort
     )
 
 
+@router.get(
+    "/lookup", response_model=TweetsOutputSchema, dependencies=[Depends(get_user)]
+)
+async def get_tweets_by_ids(
+    ids: IdsQuery,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+) -> TweetsOutputSchema:
+    """
+    Получает твиты по списку id, в том числе перенесенные в архив.
+
+    Параметры:
+
+    ids: Идентификаторы твитов через запятую
+    session: Сессия для асинхронной работы с базой данных
+
+    Возвращает словарь с твитами в порядке переданных id и статусом операции.
+    """
+    return await TweetService.get_tweets_by_ids(session=session, tweet_ids=ids)
+
+
+@router.get(
+    "/{tweet_id}", response_model=TweetOutputSchema, dependencies=[Depends(get_user)]
+)
+async def get_tweet_by_id(
+    tweet_id: FromOneToMlnPath,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+) -> TweetOutputSchema:
+    """
+    Получает твит по id, в том числе перенесенный в архив.
+
+    Параметры:
+
+    tweet_id: Идентификатор твита
+    session: Сессия для асинхронной работы с базой данных
+
+    Возвращает словарь с твитом и статусом операции.
+    """
+    return await TweetService.get_tweet(session=session, tweet_id=tweet_id)
+
+
 @router.delete("/{tweet_id}", response_model=ResultSchema)
 async def delete_tweet_user(
     tweet_id: FromOneToMlnPath,
@@ -10,9 +10,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.db_helper import db_helper
 from src.dependencies.users import get_user
 from src.schemas.generic import ResultSchema
-from src.schemas.users import UserCreatedSchema, UserInSchema, UserProfileSchema
+from src.schemas.users import (
+    BulkFollowInSchema,
+    BulkFollowSchema,
+    RelationshipsSchema,
+    SuggestionsSchema,
+    UserCreatedSchema,
+    UserInSchema,
+    UserProfileSchema,
+    UsersPageSchema,
+)
+from src.services.suggestion_service import SuggestionService
 from src.services.user_service import UserFollowerService, UserService
 from src.types.path import FromOneToMlnPath
+from src.types.query import FromOneToMlnQuery, IdsQuery, PageLimitQuery
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -53,6 +64,70 @@ async def get_my_info(
     return await UserService.get_user_profile(session=session, user_id=user.id)
 
 
+@router.get("/me/suggestions", response_model=SuggestionsSchema)
+async def get_my_suggestions(
+    session: AsyncSession = Depends(db_helper.get_async_session),
+    user=Depends(get_user),
+) -> dict[str, bool | list[dict[str, Any]]]:
+    """
+    Отдает рекомендации подписок пользователя, который отправил запрос.
+    Рекомендации рассчитываются заданием по расписанию.
+
+    Параметры:
+
+    session: Сессия для асинхронной работы с базой данных
+    user: Пользователь, отправивший запрос
+
+    Возвращает словарь с рекомендуемыми пользователями и статусом операции.
+    """
+    return await SuggestionService.get_suggestions(session=session, user_id=user.id)
+
+
+@router.post("/me/follow/bulk", response_model=BulkFollowSchema)
+async def subscribe_to_users(
+    data: BulkFollowInSchema,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+    user=Depends(get_user),
+) -> dict[str, bool | int | list[dict[str, Any]]]:
+    """
+    Подписывает пользователя, отправившего запрос, на пачку пользователей в одной транзакции.
+
+    Параметры:
+
+    data: Идентификаторы пользователей, на которых нужно подписаться
+    session: Сессия для асинхронной работы с базой данных
+    user: Пользователь, отправивший запрос
+
+    Возвращает словарь с количеством созданных подписок, результатом по каждому id
+    и статусом операции.
+    """
+    return await UserFollowerService.subscribe_to_users(
+        session=session, follower_id=user.id, user_ids=data.ids
+    )
+
+
+@router.get("/relationships", response_model=RelationshipsSchema)
+async def get_relationships(
+    ids: IdsQuery,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+    user=Depends(get_user),
+) -> dict[str, bool | list[dict[str, int | bool]]]:
+    """
+    Отдает отношения пользователя, отправившего запрос, к пачке пользователей одним запросом к базе.
+
+    Параметры:
+
+    ids: Идентификаторы пользователей через запятую
+    session: Сессия для асинхронной работы с базой данных
+    user: Пользователь, отправивший запрос
+
+    Возвращает словарь с отношениями в порядке переданных id и статусом операции.
+    """
+    return await UserFollowerService.get_relationships(
+        session=session, user_id=user.id, other_ids=ids
+    )
+
+
 @router.delete("/{user_id}/follow", response_model=ResultSchema)
 async def subscribe_to_user_by_id(
     user_id: FromOneToMlnPath,
@@ -91,3 +166,51 @@ async def get_user_info(
     Возвращает словарь с данными о пользователе и статусом операции.
     """
     return await UserService.get_user_profile(session=session, user_id=user_id)
+
+
+@router.get("/{user_id}/followers", response_model=UsersPageSchema)
+async def get_user_followers(
+    user_id: FromOneToMlnPath,
+    after: FromOneToMlnQuery = None,
+    limit: PageLimitQuery = None,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+) -> dict[str, bool | list[dict[str, Any]] | int | None]:
+    """
+    Получает страницу подписчиков пользователя по его id.
+
+    Параметры:
+
+    user_id: Идентификатор пользователя
+    after: Идентификатор подписчика, после которого начинается страница
+    limit: Количество подписчиков на странице
+    session: Сессия для асинхронной работы с базой данных
+
+    Возвращает словарь с подписчиками, значением after для следующей страницы и статусом операции.
+    """
+    return await UserFollowerService.get_users_page(
+        session=session, user_id=user_id, after_id=after, limit=limit, followers=True
+    )
+
+
+@router.get("/{user_id}/following", response_model=UsersPageSchema)
+async def get_user_following(
+    user_id: FromOneToMlnPath,
+    after: FromOneToMlnQuery = None,
+    limit: PageLimitQuery = None,
+    session: AsyncSession = Depends(db_helper.get_async_session),
+) -> dict[str, bool | list[dict[str, Any]] | int | None]:
+    """
+    Получает страницу пользователей, на которых подписан пользователь с переданным id.
+
+    Параметры:
+
+    user_id: Идентификатор пользователя
+    after: Идентификатор пользователя, после которого начинается страница
+    limit: Количество пользователей на странице
+    session: Сессия для асинхронной работы с базой данных
+
+    Возвращает словарь с пользователями, значением after для следующей страницы и статусом операции.
+    """
+    return await UserFollowerService.get_users_page(
+        session=session, user_id=user_id, after_id=after, limit=limit, followers=False
+    )
@@ -57,3 +57,11 @@ class TweetsOutputSchema(ResultSchema):
     """
 
     tweets: list[TweetContentSchema]
+
+
+class TweetOutputSchema(ResultSchema):
+    """
+    Схема, возвращающаяся при предоставлении данных о твите.
+    """
+
+    tweet: TweetContentSchema
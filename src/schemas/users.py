@@ -2,10 +2,13 @@
 Модуль со схемами пользователей.
 """
 
+from enum import Enum
 from typing import Annotated
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.core.settings import settings
+
 from .generic import ResultSchema
 
 
@@ -32,10 +35,14 @@ class UserInSchema(BaseModel):
 class UserOutputSchema(UserInfoSchema):
     """
     Вложенная схема, возвращающаяся при предоставлении данных о пользователе.
+    Списки подписчиков и подписок содержат только первую страницу,
+    остальные страницы отдаются отдельными запросами.
     """
 
     followers: list[UserInfoSchema]
     following: list[UserInfoSchema]
+    followers_count: int
+    following_count: int
 
 
 class UserSchema(UserInfoSchema):
@@ -63,6 +70,92 @@ class UserProfileSchema(ResultSchema):
     user: UserOutputSchema
 
 
+class UsersPageSchema(ResultSchema):
+    """
+    Схема, возвращающаяся при предоставлении страницы подписчиков или подписок.
+    """
+
+    users: list[UserInfoSchema]
+    next_after: (
+        int | None
+    )  # Значение after для следующей страницы. None, если страница последняя
+
+
+class SuggestedUserSchema(UserInfoSchema):
+    """
+    Схема рекомендуемого пользователя.
+    """
+
+    score: int  # Сколько подписок пользователя подписаны на рекомендуемого
+
+
+class SuggestionsSchema(ResultSchema):
+    """
+    Схема, возвращающаяся при предоставлении рекомендаций подписок.
+    """
+
+    users: list[SuggestedUserSchema]
+
+
+class RelationshipSchema(BaseModel):
+    """
+    Схема отношения пользователя, отправившего запрос, к другому пользователю.
+    """
+
+    id: int
+    following: bool  # Подписан ли пользователь на другого пользователя
+    followed_by: bool  # Подписан ли другой пользователь на пользователя
+
+
+class RelationshipsSchema(ResultSchema):
+    """
+    Схема, возвращающаяся при предоставлении отношений к пачке пользователей.
+    """
+
+    relationships: list[RelationshipSchema]
+
+
+class BulkFollowInSchema(BaseModel):
+    """
+    Схема для фильтрации данных при подписке на пачку пользователей.
+    """
+
+    ids: Annotated[
+        list[Annotated[int, Field(ge=1, le=10**6)]],
+        Field(min_length=1, max_length=settings.db.batch_ids_limit),
+    ]
+    model_config = ConfigDict(extra="forbid")
+
+
+class FollowStatus(str, Enum):
+    """
+    Результат подписки на одного пользователя из пачки.
+    """
+
+    FOLLOWED = "followed"  # Подписка создана
+    ALREADY_FOLLOWING = "already_following"  # Подписка уже была
+    NOT_FOUND = "not_found"  # Пользователь не существует
+    SELF = "self"  # Подписаться на себя нельзя
+
+
+class FollowResultSchema(BaseModel):
+    """
+    Схема результата подписки на одного пользователя из пачки.
+    """
+
+    id: int
+    status: FollowStatus
+
+
+class BulkFollowSchema(ResultSchema):
+    """
+    Схема, возвращающаяся после подписки на пачку пользователей.
+    """
+
+    followed: int  # Сколько подписок создано
+    results: list[FollowResultSchema]  # Результаты в порядке переданных id без повторов
+
+
 class LikeSchema(BaseModel):
     """
     Схема лайка.
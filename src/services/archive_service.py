@@ -0,0 +1,41 @@
+"""
+Модуль с сервисами, управляющими архивом твитов.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.archive import ArchivedTweetRepository
+
+
+class ArchiveService:
+    """
+    Сервис по переносу старых твитов в архив.
+    """
+
+    @classmethod
+    async def archive_old_tweets(
+        cls, session: AsyncSession, cutoff: datetime, batch_size: int
+    ) -> int:
+        """
+        Переносит в архив все твиты, созданные раньше cutoff.
+        Каждая пачка переносится в отдельной транзакции, чтобы не держать блокировки долго.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        cutoff: Твиты, созданные раньше этой даты, переносятся в архив
+        batch_size: Сколько твитов переносится за одну транзакцию
+
+        Возвращает количество перенесенных твитов.
+        """
+        total = 0
+        while True:
+            moved = await ArchivedTweetRepository.archive_tweets_batch(
+                session=session, cutoff=cutoff, batch_size=batch_size
+            )
+            await session.commit()
+            total += moved
+            if moved < batch_size:
+                return total
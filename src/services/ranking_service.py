@@ -0,0 +1,59 @@
+"""
+Модуль с сервисами, управляющими ранжированием ленты.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.like_counter_shards import LikeCounterShardRepository
+from src.repositories.tweets import TweetRepository
+
+
+class RankingService:
+    """
+    Сервис по сверке количества лайков и горячести твитов.
+    """
+
+    @classmethod
+    async def fold_like_counters(cls, session: AsyncSession, batch_size: int) -> int:
+        """
+        Переносит шарды счетчиков лайков популярных твитов в количество лайков и горячесть,
+        по которым сортируется лента. Каждая пачка переносится в отдельной транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Шарды скольких твитов переносятся за одну транзакцию
+
+        Возвращает количество твитов, шарды которых были перенесены.
+        """
+        total = 0
+        while folded := await LikeCounterShardRepository.fold(
+            session=session, batch_size=batch_size
+        ):
+            await session.commit()
+            total += folded
+        return total
+
+    @classmethod
+    async def sweep(cls, session: AsyncSession, batch_size: int) -> int:
+        """
+        Сверяет количество лайков и горячесть всех твитов с таблицей лайков.
+        Счетчики расходятся, например, когда лайки удаляются каскадно вместе с пользователем.
+        Каждая пачка сверяется в отдельной транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Сколько твитов сверяется за одну транзакцию
+
+        Возвращает количество исправленных твитов.
+        """
+        total = 0
+        after_id = 0
+        while after_id is not None:
+            after_id, fixed = await TweetRepository.reconcile_like_counts(
+                session=session, after_id=after_id, batch_size=batch_size
+            )
+            await session.commit()
+            total += fixed
+        return total
@@ -0,0 +1,86 @@
+"""
+Модуль с сервисами, управляющими рекомендациями подписок.
+"""
+
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.follow_graph import CompressedRows
+from src.core.settings import settings
+from src.core.suggestions import compute_suggestions
+from src.repositories.follow_suggestions import FollowSuggestionRepository
+from src.repositories.users import UserFollowerRepository
+from src.schemas.users import SuggestedUserSchema
+
+
+class SuggestionService:
+    """
+    Сервис по расчету и выдаче рекомендаций подписок.
+    """
+
+    @classmethod
+    async def get_suggestions(
+        cls, session: AsyncSession, user_id: int
+    ) -> dict[str, bool | list[dict[str, Any]]]:
+        """
+        Получает рассчитанные рекомендации подписок пользователя.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+
+        Возвращает словарь с рекомендуемыми пользователями и статусом операции.
+        """
+        rows = await FollowSuggestionRepository.get_suggestions(
+            session=session, user_id=user_id, limit=settings.db.suggestions_limit
+        )
+        users = [SuggestedUserSchema.model_validate(row).model_dump() for row in rows]
+        return {"result": True, "users": users}
+
+    @classmethod
+    async def precompute(cls, session: AsyncSession, workers: int) -> int:
+        """
+        Рассчитывает рекомендации всех пользователей, у которых есть подписки.
+        Граф подписок читается из базы один раз, рекомендации считаются в пуле процессов,
+        а каждая пачка пользователей записывается в отдельной транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        workers: Количество процессов пула
+
+        Возвращает количество пользователей, рекомендации которых были рассчитаны.
+        """
+        rows = await CompressedRows.build(
+            UserFollowerRepository.stream_edges(
+                session=session,
+                by_follower=True,
+                batch_size=settings.db.follow_graph_load_batch_size,
+            )
+        )
+        await session.commit()
+        user_ids = [
+            user_id
+            for user_id in range(len(rows.offsets) - 1)
+            if rows.offsets[user_id] != rows.offsets[user_id + 1]
+        ]
+        total = 0
+        async for suggestions in compute_suggestions(
+            rows=rows,
+            user_ids=user_ids,
+            workers=workers,
+            chunk_size=settings.db.suggestions_batch_size,
+            limit=settings.db.suggestions_limit,
+            fanout_cap=settings.db.suggestions_fanout_cap,
+            candidate_cap=settings.db.suggestions_candidate_cap,
+        ):
+            await FollowSuggestionRepository.replace(
+                session=session, suggestions=suggestions
+            )
+            await session.commit()
+            total += len(suggestions)
+        await FollowSuggestionRepository.delete_without_following(session=session)
+        await session.commit()
+        return total
@@ -2,14 +2,32 @@
 Модуль с сервисами, управляющими твитами.
 """
 
+from collections.abc import AsyncIterator
+from functools import partial
+
+from fastapi import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.db_helper import db_helper
+from src.core.feed_cache import feed_cache, get_page_key
+from src.core.feed_prefetch import feed_prefetcher
+from src.core.feed_snapshot import SnapshotOrder, feed_snapshot
+from src.core.invalidation_bus import invalidation_bus
+from src.core.negative_cache import NegativeCache, Watermark
+from src.core.ranking import FeedSort
+from src.core.settings import settings
+from src.core.single_flight import single_flight
 from src.exceptions.errors import PICTURE_NOT_FOUND_ERROR, TWEET_NOT_CREATED_ERROR
 from src.exceptions.http_exceptions import TWEET_NOT_FOUND_EXCEPTION
 from src.exceptions.request_exceptions import LARGE_NUMBER_EXCEPTION
+from src.repositories.archive import ArchivedTweetRepository
 from src.repositories.tweet_media_repository import TweetMediaRepository
 from src.repositories.tweets import TweetRepository
-from src.schemas.tweets import TweetContentSchema, TweetsOutputSchema
+from src.schemas.tweets import (
+    TweetContentSchema,
+    TweetOutputSchema,
+    TweetsOutputSchema,
+)
 
 from .media_service import MediaService
 
@@ -21,21 +39,76 @@ class TweetService:
 
     @classmethod
     async def get_tweets_user(
-        cls, session: AsyncSession, offset: int | None, limit: int | None
+        cls,
+        session: AsyncSession,
+        offset: int | None,
+        limit: int | None,
+        sort: FeedSort = FeedSort.TOP,
+    ) -> TweetsOutputSchema | Response:
+        """
+        Получает все твиты. Если включен снимок ленты и страница есть в снимке,
+        отдает ее из снимка. Если включен кэш ленты, собирает ответ из кэша,
+        а если включена предзагрузка, загружает в кэш следующую страницу в фоне.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        offset: с какого твита нужно показывать оставшиеся
+        limit: ограничение количество твитов
+        sort: Порядок твитов
+
+        Возвращает словарь со всеми твитами и статусом операции.
+        """
+        if settings.db.feed_snapshot_enabled:
+            page = feed_snapshot.get_page(offset=offset, limit=limit, sort=sort)
+            if page is not None:
+                return Response(content=page, media_type="application/json")
+        if not settings.db.feed_cache_enabled:
+            return await cls.load_tweets_user(
+                session=session, offset=offset, limit=limit, sort=sort
+            )
+        prefetch = settings.db.feed_prefetch_enabled and offset and limit
+        if prefetch and offset > 1:
+            feed_prefetcher.record_request(get_page_key(offset, limit, sort))
+        response = await cls.get_cached_tweets_user(
+            session=session, offset=offset, limit=limit, sort=sort
+        )
+        if prefetch:
+            feed_prefetcher.start(
+                key=get_page_key(offset + 1, limit, sort),
+                load=partial(
+                    cls.get_cached_tweets_user,
+                    offset=offset + 1,
+                    limit=limit,
+                    sort=sort,
+                ),
+            )
+        return response
+
+    @classmethod
+    @single_flight("feed", key=get_page_key)
+    async def load_tweets_user(
+        cls,
+        session: AsyncSession,
+        offset: int | None,
+        limit: int | None,
+        sort: FeedSort,
     ) -> TweetsOutputSchema:
         """
-        Получает все твиты.
+        Читает страницу ленты из базы.
+        Одновременные запросы одной страницы выполняются один раз.
 
         Параметры:
 
         session: Сессия для асинхронной работы с базой данных
         offset: с какого твита нужно показывать оставшиеся
         limit: ограничение количество твитов
+        sort: Порядок твитов
 
         Возвращает словарь со всеми твитами и статусом операции.
         """
         tweets = await TweetRepository.get_user_tweets(
-            session=session, offset=offset, limit=limit
+            session=session, offset=offset, limit=limit, sort=sort
         )
         tweet_models = [
             TweetContentSchema.model_validate(tweet, from_attributes=True)
@@ -43,6 +116,161 @@ class TweetService:
         ]
         return TweetsOutputSchema(result=True, tweets=tweet_models)
 
+    @classmethod
+    @single_flight("feed", key=get_page_key)
+    async def get_cached_tweets_user(
+        cls,
+        session: AsyncSession,
+        offset: int | None,
+        limit: int | None,
+        sort: FeedSort,
+    ) -> Response:
+        """
+        Собирает страницу ленты из кэша: порядок твитов берется из кэша страниц,
+        а JSON каждого твита - из кэша твитов. Из базы читаются только недостающие твиты.
+        Устаревший порядок отдается сразу и обновляется в фоне.
+        Одновременные запросы одной страницы, в том числе предзагрузка, выполняются один раз.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        offset: с какого твита нужно показывать оставшиеся
+        limit: ограничение количество твитов
+        sort: Порядок твитов
+
+        Возвращает ответ с JSON со всеми твитами и статусом операции.
+        """
+        key = get_page_key(offset=offset, limit=limit, sort=sort)
+        tweet_ids = await feed_cache.pages.get(
+            key=key,
+            session=session,
+            load=lambda session: TweetRepository.get_user_tweet_ids(
+                session=session, offset=offset, limit=limit, sort=sort
+            ),
+        )
+        versions = {
+            tweet_id: feed_cache.get_version(tweet_id) for tweet_id in tweet_ids
+        }
+        fragments = {}
+        for tweet_id, version in versions.items():
+            fragment = feed_cache.get_fragment(tweet_id, version)
+            if fragment is not None:
+                fragments[tweet_id] = fragment
+        missing_ids = [tweet_id for tweet_id in tweet_ids if tweet_id not in fragments]
+        if missing_ids:
+            for tweet in await TweetRepository.get_tweets_by_ids(
+                session=session, tweet_ids=missing_ids
+            ):
+                fragment = (
+                    TweetContentSchema.model_validate(tweet, from_attributes=True)
+                    .model_dump_json()
+                    .encode()
+                )
+                feed_cache.set_fragment(tweet.id, versions[tweet.id], fragment)
+                fragments[tweet.id] = fragment
+        tweets = b",".join(
+            fragments[tweet_id] for tweet_id in tweet_ids if tweet_id in fragments
+        )  # Твиты, удаленные после чтения порядка страницы, пропускаются
+        return Response(
+            content=b'{"result":true,"tweets":[' + tweets + b"]}",
+            media_type="application/json",
+        )
+
+    @classmethod
+    async def get_feed_snapshot(
+        cls, session: AsyncSession, size: int
+    ) -> tuple[dict[FeedSort, SnapshotOrder], dict[int, bytes]]:
+        """
+        Читает первые твиты ленты в каждом порядке для снимка ленты.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        size: Сколько первых твитов каждого порядка попадает в снимок
+
+        Возвращает порядки твитов и JSON каждого твита по идентификатору.
+        """
+        orders = {}
+        for sort in FeedSort:
+            # Лишний твит показывает, что в снимок попали не все твиты ленты
+            tweet_ids = await TweetRepository.get_user_tweet_ids(
+                session=session, offset=1, limit=size + 1, sort=sort
+            )
+            orders[sort] = (tweet_ids[:size], len(tweet_ids) <= size)
+        tweet_ids = sorted({tweet_id for ids, _ in orders.values() for tweet_id in ids})
+        fragments = {
+            tweet.id: TweetContentSchema.model_validate(tweet, from_attributes=True)
+            .model_dump_json()
+            .encode()
+            for tweet in await TweetRepository.get_tweets_by_ids(
+                session=session, tweet_ids=tweet_ids
+            )
+        }
+        return orders, fragments
+
+    @classmethod
+    async def get_tweet(cls, session: AsyncSession, tweet_id: int) -> TweetOutputSchema:
+        """
+        Получает твит по id. Если твита нет среди актуальных, ищет его в архиве.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+
+        Возвращает словарь с твитом и статусом операции.
+        """
+        tweet = await TweetRepository.get_tweet_by_id(
+            session=session, tweet_id=tweet_id
+        )
+        if tweet is None:
+            tweet = await ArchivedTweetRepository.get_tweet_by_id(
+                session=session, tweet_id=tweet_id
+            )
+        if tweet is None:
+            raise TWEET_NOT_FOUND_EXCEPTION
+        return TweetOutputSchema(
+            result=True,
+            tweet=TweetContentSchema.model_validate(tweet, from_attributes=True),
+        )
+
+    @classmethod
+    async def get_tweets_by_ids(
+        cls, session: AsyncSession, tweet_ids: list[int]
+    ) -> TweetsOutputSchema:
+        """
+        Получает твиты по списку id, в том числе перенесенные в архив.
+        Архив читается только для твитов, не найденных среди актуальных,
+        поэтому количество запросов не зависит от количества твитов.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_ids: Идентификаторы твитов
+
+        Возвращает словарь с твитами в порядке переданных id без повторов
+        и статусом операции. Несуществующие твиты пропускаются.
+        """
+        tweet_ids = list(dict.fromkeys(tweet_ids))
+        tweets = {
+            tweet.id: tweet
+            for tweet in await TweetRepository.get_tweets_by_ids(
+                session=session, tweet_ids=tweet_ids
+            )
+        }
+        missing_ids = [tweet_id for tweet_id in tweet_ids if tweet_id not in tweets]
+        if missing_ids:
+            for tweet in await ArchivedTweetRepository.get_tweets_by_ids(
+                session=session, tweet_ids=missing_ids
+            ):
+                tweets[tweet.id] = tweet
+        tweet_models = [
+            TweetContentSchema.model_validate(tweets[tweet_id], from_attributes=True)
+            for tweet_id in tweet_ids
+            if tweet_id in tweets
+        ]
+        return TweetsOutputSchema(result=True, tweets=tweet_models)
+
     @classmethod
     async def add_media_to_tweet(
         cls,
@@ -94,7 +322,10 @@ class TweetService:
         )
 
         await cls.add_media_to_tweet(session, tweet_id=tweet_id, media_ids=media_ids)
+        await invalidation_bus.publish(session, "feed")
         await session.commit()
+        feed_cache.invalidate_pages()
+        missing_tweets.add_existing(tweet_id)
         return {"result": True, "tweet_id": tweet_id}
 
     @classmethod
@@ -103,6 +334,8 @@ class TweetService:
     ) -> dict[str, bool]:
         """
         Удаляет твит, картинки твита из базы и сервера.
+        Если включен кэш несуществующих идентификаторов и твита точно нет,
+        вызывается исключение без запроса к базе.
 
         Параметры:
 
@@ -112,6 +345,8 @@ class TweetService:
 
         Возвращает словарь со статусом операции.
         """
+        if settings.db.negative_cache_enabled and missing_tweets.is_missing(tweet_id):
+            raise TWEET_NOT_FOUND_EXCEPTION
         data = {"id": tweet_id, "user_id": user_id}
         if not await TweetRepository.check_exists_object_by_params(
             session=session, data=data
@@ -120,7 +355,50 @@ class TweetService:
         await MediaService.delete_media_from_disk_by_tweet_id(
             session=session, tweet_id=tweet_id
         )
+        await invalidation_bus.publish(session, "tweet", [tweet_id])
         result = await TweetRepository.delete_object_by_params(
             session=session, data=data
         )
+        feed_cache.invalidate_tweets([tweet_id])
+        missing_tweets.add_missing(tweet_id)
         return {"result": result}
+
+
+async def load_tweet_watermark() -> Watermark:
+    """
+    Читает наибольший идентификатор твита и границы снимка транзакций
+    для кэша несуществующих твитов.
+    """
+    async with db_helper.session_factory() as session:
+        return await TweetRepository.get_id_watermark(session=session)
+
+
+async def count_tweets() -> int:
+    """
+    Читает количество твитов, на которое рассчитывается фильтр Блума.
+    """
+    async with db_helper.session_factory() as session:
+        return await TweetRepository.count_number_objects(session=session)
+
+
+async def load_tweet_ids() -> AsyncIterator[list[int]]:
+    """
+    Читает пачки идентификаторов всех твитов для фильтра Блума в отдельной сессии.
+    """
+    async with db_helper.session_factory() as session:
+        async for tweet_ids in TweetRepository.stream_ids(
+            session=session, batch_size=settings.db.negative_cache_load_batch_size
+        ):
+            yield tweet_ids
+
+
+missing_tweets = NegativeCache(
+    name="tweet",
+    max_entries=settings.db.negative_cache_size,
+    ttl=settings.db.negative_cache_ttl,
+    reload_interval=settings.db.negative_cache_reload_interval,
+    load_watermark=load_tweet_watermark,
+    load_ids=load_tweet_ids if settings.db.negative_cache_bloom_enabled else None,
+    count_ids=count_tweets,
+    error_rate=settings.db.negative_cache_bloom_error_rate,
+)
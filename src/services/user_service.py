@@ -2,10 +2,19 @@
 Модуль с сервисами, управляющими пользователями.
 """
 
-from typing import Any
+from functools import partial
+from typing import Any, AsyncIterator, Sequence
 
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.db_helper import db_helper
+from src.core.follow_graph import FollowGraph
+from src.core.invalidation_bus import invalidation_bus
+from src.core.negative_cache import NegativeCache, Watermark
+from src.core.settings import settings
+from src.core.single_flight import single_flight
+from src.core.swr_cache import SwrCache
 from src.exceptions.errors import (
     SUBSCRIPTION_EXISTS_ERROR,
     SUBSCRIPTION_NOT_EXISTS_ERROR,
@@ -15,7 +24,12 @@ from src.exceptions.errors import (
 from src.exceptions.http_exceptions import USER_NOT_EXISTS_EXCEPTION
 from src.exceptions.request_exceptions import INCOMPATIBLE_DATA_EXCEPTION
 from src.repositories.users import UserFollowerRepository, UserRepository
-from src.schemas.users import UserOutputSchema, UserSchema
+from src.schemas.users import (
+    FollowStatus,
+    UserInfoSchema,
+    UserOutputSchema,
+    UserSchema,
+)
 
 from .utils import get_hash_token
 
@@ -47,6 +61,7 @@ class UserService:
             },
             exception_detail=USER_NOT_CREATED_ERROR,
         )
+        missing_users.add_existing(result)
         return {"result": True, "id": result, "name": user_data["name"]}
 
     @classmethod
@@ -71,11 +86,41 @@ class UserService:
         return result
 
     @classmethod
+    @single_flight("profile", key=lambda user_id: user_id)
     async def get_user_profile(
         cls, session: AsyncSession, user_id: int
     ) -> dict[str, bool | dict[str, list[dict[str, Any]] | Any]]:
         """
-        Получает информацию о профиле пользователя.
+        Получает информацию о профиле пользователя. Если включен кэш профилей,
+        берет ее из кэша, а устаревший профиль отдает сразу и обновляет в фоне.
+        Одновременные запросы профиля одного пользователя выполняются один раз.
+        Если включен кэш несуществующих идентификаторов и пользователя точно нет,
+        вызывается исключение без запроса к базе.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+
+        Возвращает словарь с данными о пользователе и статусом операции.
+        """
+        if settings.db.negative_cache_enabled and missing_users.is_missing(user_id):
+            raise USER_NOT_EXISTS_EXCEPTION
+        if settings.db.profile_cache_enabled:
+            return await profile_cache.get(
+                key=user_id,
+                session=session,
+                load=partial(cls.load_user_profile, user_id=user_id),
+            )
+        return await cls.load_user_profile(session=session, user_id=user_id)
+
+    @classmethod
+    async def load_user_profile(
+        cls, session: AsyncSession, user_id: int
+    ) -> dict[str, bool | dict[str, list[dict[str, Any]] | Any]]:
+        """
+        Читает из базы информацию о профиле пользователя:
+        количество подписчиков и подписок и первые страницы их списков.
 
         Параметры:
 
@@ -84,13 +129,30 @@ class UserService:
 
         Возвращает словарь с данными о пользователе и статусом операции.
         """
-        user = await UserRepository.get_user_followers_and_following(
+        user = await UserRepository.get_user_with_counts(
             session=session, user_id=user_id
         )
         if not user:
+            missing_users.add_missing(user_id)
             raise USER_NOT_EXISTS_EXCEPTION
-        model_json = UserOutputSchema.model_validate(
-            user, from_attributes=True
+        followers = await UserFollowerService.get_page_rows(
+            session=session,
+            user_id=user_id,
+            after_id=0,
+            limit=settings.db.follow_page_size,
+            followers=True,
+        )
+        following = await UserFollowerService.get_page_rows(
+            session=session,
+            user_id=user_id,
+            after_id=0,
+            limit=settings.db.follow_page_size,
+            followers=False,
+        )
+        model_json = UserOutputSchema(
+            **user._asdict(),
+            followers=[UserInfoSchema.model_validate(row) for row in followers],
+            following=[UserInfoSchema.model_validate(row) for row in following],
         ).model_dump()
         return {"result": True, "user": model_json}
 
@@ -120,6 +182,7 @@ class UserFollowerService:
     ) -> dict[str, bool]:
         """
         Подписывает пользователя с идентификатором user_id на пользователя с идентификатором follower_id.
+        Количество подписчиков и подписок меняется в той же транзакции.
 
         Параметры:
 
@@ -135,15 +198,80 @@ class UserFollowerService:
             data={"user_id": user_id, "follower_id": follower_id},
             exception_detail=SUBSCRIPTION_EXISTS_ERROR,
             exception_foreign_constraint_detail=USER_NOT_FOUND_ERROR,
+            commit_need=False,
+        )
+        await UserRepository.change_follow_counts(
+            session=session, user_id=user_id, follower_id=follower_id, delta=1
         )
+        await invalidation_bus.publish(session, "profile", [user_id, follower_id])
+        await invalidation_bus.publish(session, "follow", [[follower_id, user_id, 1]])
+        await session.commit()
+        profile_cache.drop(user_id)
+        profile_cache.drop(follower_id)
+        if settings.db.follow_graph_enabled:
+            follow_graph.update(
+                follower_id=follower_id, user_id=user_id, is_following=True
+            )
         return {"result": bool(result)}
 
+    @classmethod
+    async def subscribe_to_users(
+        cls, session: AsyncSession, follower_id: int, user_ids: list[int]
+    ) -> dict[str, bool | int | list[dict[str, int | FollowStatus]]]:
+        """
+        Подписывает пользователя на пачку пользователей в одной транзакции:
+        пользователи проверяются и подписки создаются одним запросом,
+        количество подписчиков и подписок меняется вторым.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        follower_id: Идентификатор подписчика
+        user_ids: Идентификаторы пользователей, на которых нужно подписаться
+
+        Возвращает словарь с количеством созданных подписок, результатом по каждому id
+        в порядке переданных id без повторов и статусом операции.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        rows = await UserFollowerRepository.create_many(
+            session=session, follower_id=follower_id, user_ids=user_ids
+        )
+        followed = [user_id for user_id, inserted in rows if inserted]
+        await UserRepository.add_following(
+            session=session, follower_id=follower_id, user_ids=followed
+        )
+        await invalidation_bus.publish(session, "profile", [follower_id, *followed])
+        await invalidation_bus.publish(
+            session, "follow", [[follower_id, user_id, 1] for user_id in followed]
+        )
+        await session.commit()
+        for user_id in [follower_id, *followed]:
+            profile_cache.drop(user_id)
+        if settings.db.follow_graph_enabled:
+            for user_id in followed:
+                follow_graph.update(
+                    follower_id=follower_id, user_id=user_id, is_following=True
+                )
+        statuses = {
+            user_id: (
+                FollowStatus.FOLLOWED if inserted else FollowStatus.ALREADY_FOLLOWING
+            )
+            for user_id, inserted in rows
+        }
+        statuses[follower_id] = FollowStatus.SELF
+        results = [
+            {"id": user_id, "status": statuses.get(user_id, FollowStatus.NOT_FOUND)}
+            for user_id in user_ids
+        ]
+        return {"result": True, "followed": len(followed), "results": results}
+
     @classmethod
     async def unsubscribe_from_user(
         cls, session: AsyncSession, user_id: int, follower_id: int
     ) -> dict[str, bool]:
         """
         Отписывает пользователя с идентификатором user_id от пользователя с идентификатором follower_id.
+        Количество подписчиков и подписок меняется в той же транзакции.
 
         Параметры:
 
@@ -158,5 +286,280 @@ class UserFollowerService:
             session=session,
             data={"user_id": user_id, "follower_id": follower_id},
             exception_detail=SUBSCRIPTION_NOT_EXISTS_ERROR,
+            commit_need=False,
         )
+        await UserRepository.change_follow_counts(
+            session=session, user_id=user_id, follower_id=follower_id, delta=-1
+        )
+        await invalidation_bus.publish(session, "profile", [user_id, follower_id])
+        await invalidation_bus.publish(session, "follow", [[follower_id, user_id, 0]])
+        await session.commit()
+        profile_cache.drop(user_id)
+        profile_cache.drop(follower_id)
+        if settings.db.follow_graph_enabled:
+            follow_graph.update(
+                follower_id=follower_id, user_id=user_id, is_following=False
+            )
         return {"result": bool(result)}
+
+    @classmethod
+    async def get_relationships(
+        cls, session: AsyncSession, user_id: int, other_ids: list[int]
+    ) -> dict[str, bool | list[dict[str, int | bool]]]:
+        """
+        Получает, подписан ли пользователь на каждого из переданных пользователей
+        и подписан ли каждый из них на пользователя.
+        Если индекс графа подписок загружен, ответ строится по нему без обращения к базе.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+        other_ids: Идентификаторы других пользователей
+
+        Возвращает словарь с отношениями в порядке переданных id без повторов
+        и статусом операции. Для несуществующих пользователей оба флага ложны.
+        """
+        other_ids = list(dict.fromkeys(other_ids))
+        if settings.db.follow_graph_enabled and follow_graph.loaded:
+            following = {
+                other_id
+                for other_id in other_ids
+                if follow_graph.is_following(follower_id=user_id, user_id=other_id)
+            }
+            followed_by = {
+                other_id
+                for other_id in other_ids
+                if follow_graph.is_following(follower_id=other_id, user_id=user_id)
+            }
+        else:
+            rows = await UserFollowerRepository.get_relationships(
+                session=session, user_id=user_id, other_ids=other_ids
+            )
+            following = {row.user_id for row in rows if row.follower_id == user_id}
+            followed_by = {row.follower_id for row in rows if row.user_id == user_id}
+        relationships = [
+            {
+                "id": other_id,
+                "following": other_id in following,
+                "followed_by": other_id in followed_by,
+            }
+            for other_id in other_ids
+        ]
+        return {"result": True, "relationships": relationships}
+
+    @classmethod
+    async def get_page_rows(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        after_id: int,
+        limit: int,
+        followers: bool,
+    ) -> Sequence[Row[tuple[int, str]]]:
+        """
+        Получает id и имена подписчиков или подписок пользователя в порядке возрастания id.
+        Если индекс графа подписок загружен, id берутся из него, а из базы читаются только имена.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+        after_id: Идентификатор пользователя, после которого начинается страница
+        limit: Количество пользователей на странице
+        followers: True - подписчики, False - подписки
+
+        Возвращает id и имена пользователей.
+        """
+        if settings.db.follow_graph_enabled and follow_graph.loaded:
+            get_ids = (
+                follow_graph.get_followers if followers else follow_graph.get_following
+            )
+            return await UserRepository.get_names(
+                session=session,
+                user_ids=get_ids(user_id=user_id, after_id=after_id, limit=limit),
+            )
+        get_page = (
+            UserFollowerRepository.get_followers_user
+            if followers
+            else UserFollowerRepository.get_following_user
+        )
+        return await get_page(
+            session=session, user_id=user_id, after_id=after_id, limit=limit
+        )
+
+    @classmethod
+    async def get_users_page(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        after_id: int | None,
+        limit: int | None,
+        followers: bool,
+    ) -> dict[str, bool | list[dict[str, Any]] | int | None]:
+        """
+        Получает страницу подписчиков или подписок пользователя.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        user_id: Идентификатор пользователя
+        after_id: Идентификатор пользователя, после которого начинается страница
+        limit: Количество пользователей на странице
+        followers: True - страница подписчиков, False - страница подписок
+
+        Возвращает словарь с пользователями, значением after для следующей страницы
+        и статусом операции.
+        """
+        limit = limit or settings.db.follow_page_size
+        rows = await cls.get_page_rows(
+            session=session,
+            user_id=user_id,
+            after_id=after_id or 0,
+            limit=limit + 1,
+            followers=followers,
+        )
+        if not rows and not await UserRepository.check_exists_object_by_params(
+            session=session, data={"id": user_id}
+        ):
+            raise USER_NOT_EXISTS_EXCEPTION
+        users = [
+            UserInfoSchema.model_validate(row).model_dump() for row in rows[:limit]
+        ]
+        next_after = users[-1]["id"] if len(rows) > limit else None
+        return {"result": True, "users": users, "next_after": next_after}
+
+    @classmethod
+    async def sweep_follow_counts(cls, session: AsyncSession, batch_size: int) -> int:
+        """
+        Сверяет количество подписчиков и подписок всех пользователей с таблицей подписчиков.
+        Счетчики расходятся, например, когда подписки удаляются каскадно вместе с пользователем.
+        Каждая пачка сверяется в отдельной транзакции.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        batch_size: Сколько пользователей сверяется за одну транзакцию
+
+        Возвращает количество исправленных пользователей.
+        """
+        total = 0
+        after_id = 0
+        while after_id is not None:
+            after_id, fixed = await UserRepository.reconcile_follow_counts(
+                session=session, after_id=after_id, batch_size=batch_size
+            )
+            await session.commit()
+            total += fixed
+        return total
+
+
+async def load_follow_graph(by_follower: bool) -> AsyncIterator[tuple[int, int]]:
+    """
+    Читает подписки для индекса графа подписок в отдельной сессии.
+
+    Параметры:
+
+    by_follower: True - пары (подписчик, пользователь), False - пары (пользователь, подписчик)
+    """
+    async with db_helper.session_factory() as session:
+        async for edge in UserFollowerRepository.stream_edges(
+            session=session,
+            by_follower=by_follower,
+            batch_size=settings.db.follow_graph_load_batch_size,
+        ):
+            yield edge
+
+
+async def load_user_watermark() -> Watermark:
+    """
+    Читает наибольший идентификатор пользователя и границы снимка транзакций
+    для кэша несуществующих пользователей.
+    """
+    async with db_helper.session_factory() as session:
+        return await UserRepository.get_id_watermark(session=session)
+
+
+async def count_users() -> int:
+    """
+    Читает количество пользователей, на которое рассчитывается фильтр Блума.
+    """
+    async with db_helper.session_factory() as session:
+        return await UserRepository.count_number_objects(session=session)
+
+
+async def load_user_ids() -> AsyncIterator[list[int]]:
+    """
+    Читает пачки идентификаторов всех пользователей для фильтра Блума в отдельной сессии.
+    """
+    async with db_helper.session_factory() as session:
+        async for user_ids in UserRepository.stream_ids(
+            session=session, batch_size=settings.db.negative_cache_load_batch_size
+        ):
+            yield user_ids
+
+
+follow_graph = FollowGraph(
+    reload_interval=settings.db.follow_graph_reload_interval,
+    load=load_follow_graph,
+)
+profile_cache = SwrCache(
+    name="profile",
+    soft_ttl=settings.db.profile_cache_ttl,
+    hard_ttl=settings.db.profile_cache_hard_ttl,
+    stale_if_error=settings.db.cache_stale_if_error,
+    max_entries=settings.db.profile_cache_size,
+    session_factory=db_helper.session_factory,
+)
+
+
+def invalidate_profiles(user_ids: list[int]) -> None:
+    """
+    Делает профили пользователей в кэше устаревшими по уведомлению другого процесса.
+
+    Параметры:
+
+    user_ids: Идентификаторы пользователей
+    """
+    for user_id in user_ids:
+        profile_cache.invalidate(user_id)
+
+
+def apply_follow_edges(edges: list[list[int]]) -> None:
+    """
+    Учитывает в графе подписок подписки и отписки из уведомления другого процесса.
+
+    Параметры:
+
+    edges: Тройки (подписчик, пользователь, 1 при подписке и 0 при отписке)
+    """
+    if not settings.db.follow_graph_enabled:
+        return
+    for follower_id, user_id, is_following in edges:
+        follow_graph.update(
+            follower_id=follower_id, user_id=user_id, is_following=bool(is_following)
+        )
+
+
+def reload_follow_graph() -> None:
+    """
+    Перезагружает граф подписок в фоне после потери уведомлений.
+    """
+    if settings.db.follow_graph_enabled:
+        follow_graph.schedule_reload()
+
+
+invalidation_bus.subscribe("profile", invalidate_profiles)
+invalidation_bus.subscribe("follow", apply_follow_edges)
+invalidation_bus.subscribe_flush(profile_cache.clear)
+invalidation_bus.subscribe_flush(reload_follow_graph)
+missing_users = NegativeCache(
+    name="user",
+    max_entries=settings.db.negative_cache_size,
+    ttl=settings.db.negative_cache_ttl,
+    reload_interval=settings.db.negative_cache_reload_interval,
+    load_watermark=load_user_watermark,
+    load_ids=load_user_ids if settings.db.negative_cache_bloom_enabled else None,
+    count_ids=count_users,
+    error_rate=settings.db.negative_cache_bloom_error_rate,
+)
@@ -2,27 +2,75 @@
 Модуль с сервисами, управляющими взаимодействием пользователей и твитов.
 """
 
+from collections import Counter
+from random import randrange
+
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.db_helper import db_helper
+from src.core.feed_cache import feed_cache
+from src.core.hot_tweets import hot_tweets
+from src.core.invalidation_bus import invalidation_bus
+from src.core.like_buffer import LikeBuffer, LikeChanges
+from src.core.settings import settings
 from src.exceptions.errors import (
     LIKE_EXISTS_ERROR,
     LIKE_NOT_EXISTS_ERROR,
     TWEET_NOT_FOUND_ERROR,
 )
+from src.exceptions.http_exceptions import (
+    LIKE_NOT_EXISTS_EXCEPTION,
+    TWEET_NOT_FOUND_EXCEPTION,
+)
+from src.repositories.like_counter_shards import LikeCounterShardRepository
+from src.repositories.like_versions import LikeVersionRepository
+from src.repositories.tweets import TweetRepository
 from src.repositories.user_tweet_repository import LikeRepository
 
+from .tweet_service import missing_tweets
+
 
 class LikeService:
     """
     Сервис по управлению лайками.
     """
 
+    @classmethod
+    async def change_like_count(
+        cls, session: AsyncSession, tweet_id: int, delta: int
+    ) -> None:
+        """
+        Изменяет количество лайков твита без коммита.
+        Счетчик популярного твита меняется в случайном шарде, остальных - в строке твита.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита
+        delta: На сколько изменить количество лайков
+        """
+        if hot_tweets.record_like(tweet_id):
+            await LikeCounterShardRepository.add(
+                session=session,
+                tweet_id=tweet_id,
+                shard=randrange(settings.db.like_counter_shards),
+                delta=delta,
+            )
+        else:
+            await TweetRepository.change_like_count(
+                session=session, tweet_id=tweet_id, delta=delta
+            )
+
     @classmethod
     async def like_tweet(
         cls, session: AsyncSession, tweet_id: int, user_id: int
     ) -> dict[str, bool]:
         """
-        Ставит лайк твиту.
+        Ставит лайк твиту и увеличивает количество лайков твита в той же транзакции.
+        Если включен буфер лайков, только записывает лайк в журнал буфера.
+        Если включен кэш несуществующих идентификаторов и твита точно нет,
+        вызывается исключение без запроса к базе.
 
         Параметры:
 
@@ -33,12 +81,27 @@ class LikeService:
 
         Возвращает словарь со статусом операции.
         """
-        result = await LikeRepository.create_object(
-            session=session,
-            data={"tweet_id": tweet_id, "user_id": user_id},
-            exception_detail=LIKE_EXISTS_ERROR,
-            exception_foreign_constraint_detail=TWEET_NOT_FOUND_ERROR,
-        )
+        if settings.db.like_buffer_enabled:
+            await like_buffer.enqueue(user_id=user_id, tweet_id=tweet_id, liked=True)
+            return {"result": True}
+        if settings.db.negative_cache_enabled and missing_tweets.is_missing(tweet_id):
+            raise TWEET_NOT_FOUND_EXCEPTION
+        try:
+            result = await LikeRepository.create_object(
+                session=session,
+                data={"tweet_id": tweet_id, "user_id": user_id},
+                exception_detail=LIKE_EXISTS_ERROR,
+                exception_foreign_constraint_detail=TWEET_NOT_FOUND_ERROR,
+                commit_need=False,
+            )
+        except HTTPException as exc:
+            if exc.status_code == status.HTTP_404_NOT_FOUND:
+                missing_tweets.add_missing(tweet_id)
+            raise
+        await cls.change_like_count(session=session, tweet_id=tweet_id, delta=1)
+        await invalidation_bus.publish(session, "tweet", [tweet_id])
+        await session.commit()
+        feed_cache.invalidate_tweets([tweet_id])
         return {"result": bool(result)}
 
     @classmethod
@@ -46,7 +109,10 @@ class LikeService:
         cls, session: AsyncSession, tweet_id: int, user_id: int
     ) -> dict[str, bool]:
         """
-        Убирает лайк с твита.
+        Убирает лайк с твита и уменьшает количество лайков твита в той же транзакции.
+        Если включен буфер лайков, только записывает снятие лайка в журнал буфера.
+        Если включен кэш несуществующих идентификаторов и твита точно нет,
+        вызывается исключение без запроса к базе.
 
         Параметры:
 
@@ -57,9 +123,73 @@ class LikeService:
 
         Возвращает словарь со статусом операции.
         """
+        if settings.db.like_buffer_enabled:
+            await like_buffer.enqueue(user_id=user_id, tweet_id=tweet_id, liked=False)
+            return {"result": True}
+        if settings.db.negative_cache_enabled and missing_tweets.is_missing(tweet_id):
+            raise LIKE_NOT_EXISTS_EXCEPTION
         result = await LikeRepository.delete_object_by_params(
             session=session,
             data={"tweet_id": tweet_id, "user_id": user_id},
             exception_detail=LIKE_NOT_EXISTS_ERROR,
+            commit_need=False,
         )
+        await cls.change_like_count(session=session, tweet_id=tweet_id, delta=-1)
+        await invalidation_bus.publish(session, "tweet", [tweet_id])
+        await session.commit()
+        feed_cache.invalidate_tweets([tweet_id])
         return {"result": bool(result)}
+
+    @classmethod
+    async def apply_like_changes(
+        cls, session: AsyncSession, changes: LikeChanges
+    ) -> None:
+        """
+        Записывает накопленные изменения лайков в базу одной транзакцией.
+        Записываются только изменения новее уже записанных для своей пары,
+        поэтому более старое изменение из другого процесса или из журнала упавшего
+        процесса не отменяет новое. Количество лайков твитов меняется только
+        на реально поставленные и снятые лайки.
+
+        Параметры:
+
+        session: Сессия для асинхронной работы с базой данных
+        changes: Итоговое состояние пар (пользователь, твит)
+        """
+        newer = await LikeVersionRepository.advance(
+            session=session,
+            versions={key: version for key, (_, version) in changes.items()},
+        )
+        deltas = Counter()
+        liked = [key for key in sorted(newer) if changes[key][0]]
+        for tweet_id in await LikeRepository.insert_many(session=session, pairs=liked):
+            deltas[tweet_id] += 1
+        unliked = [key for key in sorted(newer) if not changes[key][0]]
+        for tweet_id in await LikeRepository.delete_many(
+            session=session, pairs=unliked
+        ):
+            deltas[tweet_id] -= 1
+        await TweetRepository.change_like_counts(session=session, deltas=deltas)
+        tweet_ids = {tweet_id for _, tweet_id in changes}
+        await invalidation_bus.publish(session, "tweet", sorted(tweet_ids))
+        await session.commit()
+        feed_cache.invalidate_tweets(tweet_ids)
+
+
+async def apply_buffered_likes(changes: LikeChanges) -> None:
+    """
+    Записывает изменения лайков из буфера в базу в отдельной сессии.
+
+    Параметры:
+
+    changes: Итоговое состояние пар (пользователь, твит)
+    """
+    async with db_helper.session_factory() as session:
+        await LikeService.apply_like_changes(session=session, changes=changes)
+
+
+like_buffer = LikeBuffer(
+    directory=settings.db.like_buffer_directory,
+    flush_interval=settings.db.like_buffer_flush_interval,
+    apply=apply_buffered_likes,
+)
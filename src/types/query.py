@@ -5,5 +5,27 @@
 from typing import Annotated, TypeAlias
 
 from fastapi import Query
+from pydantic import BeforeValidator, Field
+
+from src.core.settings import settings
+
+
+def split_ids(value: list[str]) -> list[str]:
+    """
+    Разбивает значения параметра, перечисленные через запятую.
+    Параметр можно передать как ids=1,2,3 или как ids=1&ids=2,3.
+
+    Параметры:
+
+    value: Значения параметра
+    """
+    return [part for item in value for part in item.split(",") if part]
+
 
 FromOneToMlnQuery: TypeAlias = Annotated[int | None, Query(ge=1, le=10**6)]
+PageLimitQuery: TypeAlias = Annotated[int | None, Query(ge=1, le=1000)]
+IdsQuery: TypeAlias = Annotated[
+    list[Annotated[int, Field(ge=1, le=10**6)]],
+    BeforeValidator(split_ids),
+    Query(min_length=1, max_length=settings.db.batch_ids_limit),
+]
@@ -0,0 +1,4 @@
+"""
+Модуль с нагрузочными замерами.
+Замеры не запускаются вместе с тестами, их нужно вызывать вручную.
+"""
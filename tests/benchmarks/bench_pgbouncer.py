@@ -0,0 +1,108 @@
+"""
+Замер пропускной способности чтений с кэшем подготовленных запросов asyncpg и без него.
+
+Запуск из директории, в которой находятся src и .env:
+
+python -m benchmarks.bench_pgbouncer --requests 2000 --concurrency 20
+python -m benchmarks.bench_pgbouncer --host pgbouncer_test --port 6432
+
+Режим совместимости с PgBouncer отключает кэш подготовленных запросов,
+поэтому каждый запрос заново разбирается и планируется базой.
+Замер показывает, во сколько это обходится.
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+
+from sqlalchemy.engine import make_url
+
+from src.core.db_helper import DBHelper
+from src.core.settings import settings
+from src.repositories.tweets import TweetRepository
+from src.repositories.users import UserRepository
+
+
+async def run_requests(db_helper: DBHelper, requests: int) -> None:
+    """
+    Выполняет чтения ленты и профиля, каждое в своей транзакции.
+
+    Параметры:
+
+    db_helper: Помощник для работы с базой данных
+    requests: Количество чтений
+    """
+    for number in range(requests):
+        async with db_helper.session_factory() as session:
+            if number % 2:
+                await TweetRepository.get_user_tweets(
+                    session=session, offset=1, limit=10
+                )
+            else:
+                await UserRepository.get_user_with_counts(session=session, user_id=1)
+
+
+async def measure(
+    url: str, pgbouncer_transaction_mode: bool, requests: int, concurrency: int
+) -> float:
+    """
+    Замеряет количество чтений в секунду.
+
+    Параметры:
+
+    url: Строка для подключения к базе данных
+    pgbouncer_transaction_mode: Включен ли режим совместимости с PgBouncer
+    requests: Общее количество чтений
+    concurrency: Количество параллельных клиентов
+
+    Возвращает количество чтений в секунду.
+    """
+    db_helper = DBHelper(
+        url=url,
+        query_stats=False,
+        pgbouncer_transaction_mode=pgbouncer_transaction_mode,
+    )
+    await run_requests(db_helper, requests=concurrency)  # Прогрев пула соединений
+    start = perf_counter()
+    await asyncio.gather(
+        *(
+            run_requests(db_helper, requests=requests // concurrency)
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = perf_counter() - start
+    await db_helper.engine.dispose()
+    return requests / elapsed
+
+
+async def main() -> None:
+    """
+    Запускает замеры и выводит результаты.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=settings.db.DB_HOST)
+    parser.add_argument("--port", type=int, default=settings.db.DB_PORT)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    url = (
+        make_url(settings.db.database_url)
+        .set(host=args.host, port=args.port)
+        .render_as_string(hide_password=False)
+    )
+    modes = [False, True]
+    if args.port != settings.db.DB_PORT or args.host != settings.db.DB_HOST:
+        # Без режима совместимости PgBouncer в режиме транзакций не работает
+        modes = [True]
+    for mode in modes:
+        throughput = await measure(
+            url=url,
+            pgbouncer_transaction_mode=mode,
+            requests=args.requests,
+            concurrency=args.concurrency,
+        )
+        print(f"pgbouncer_transaction_mode={mode}: {throughput:.0f} reads/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Замер расчета рекомендаций подписок на синтетическом графе со степенным распределением.
+
+Запуск из директории, в которой находятся src и .env:
+
+python -m benchmarks.bench_suggestions --users 100000 --workers 4
+
+Количество подписок пользователя и популярность пользователя распределены по закону Парето,
+как в настоящих социальных графах: большинство подписано на несколько человек,
+а немногие знаменитости собирают большую часть подписчиков.
+Замер показывает скорость расчета с ограничением строк и без него
+и время расчета всех пользователей в пуле процессов.
+"""
+
+import argparse
+import asyncio
+import random
+from collections.abc import AsyncIterator
+from itertools import accumulate
+from time import perf_counter
+
+from src.core.follow_graph import CompressedRows
+from src.core.settings import settings
+from src.core.suggestions import compute_suggestions, suggest
+
+
+async def generate_edges(
+    users: int, alpha: float, max_degree: int, seed: int
+) -> AsyncIterator[tuple[int, int]]:
+    """
+    Генерирует подписки синтетического графа по возрастанию пары (подписчик, пользователь).
+
+    Параметры:
+
+    users: Количество пользователей
+    alpha: Показатель распределения Парето. Чем меньше, тем тяжелее хвост
+    max_degree: Максимальное количество подписок пользователя
+    seed: Начальное значение генератора случайных чисел
+    """
+    rng = random.Random(seed)
+    popularity = list(accumulate(rng.paretovariate(alpha) for _ in range(users)))
+    for follower_id in range(1, users + 1):
+        degree = min(int(rng.paretovariate(alpha)), max_degree, users - 1)
+        targets = set(
+            rng.choices(range(1, users + 1), cum_weights=popularity, k=degree)
+        )
+        targets.discard(follower_id)
+        for user_id in sorted(targets):
+            yield follower_id, user_id
+
+
+def measure_single(
+    rows: CompressedRows,
+    user_ids: list[int],
+    fanout_cap: int,
+    candidate_cap: int,
+) -> float:
+    """
+    Замеряет количество пользователей, рассчитанных за секунду в одном процессе.
+
+    Параметры:
+
+    rows: Строки подписок
+    user_ids: Идентификаторы пользователей
+    fanout_cap: Сколько подписок пользователя учитывается
+    candidate_cap: Сколько подписок каждой подписки пользователя учитывается
+    """
+    start = perf_counter()
+    for user_id in user_ids:
+        suggest(rows, user_id, settings.db.suggestions_limit, fanout_cap, candidate_cap)
+    return len(user_ids) / (perf_counter() - start)
+
+
+async def main() -> None:
+    """
+    Запускает замеры и выводит результаты.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--alpha", type=float, default=0.8)
+    parser.add_argument("--max-degree", type=int, default=5000)
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=settings.db.suggestions_workers)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    rows = await CompressedRows.build(
+        generate_edges(args.users, args.alpha, args.max_degree, args.seed)
+    )
+    elapsed = perf_counter() - start
+    size = rows.offsets.itemsize * len(rows.offsets)
+    size += rows.targets.itemsize * len(rows.targets)
+    print(
+        f"graph: {args.users} users, {len(rows.targets)} edges,"
+        f" {size / 2**20:.1f} MiB, built in {elapsed:.1f} s"
+    )
+    user_ids = [
+        user_id
+        for user_id in range(len(rows.offsets) - 1)
+        if rows.offsets[user_id] != rows.offsets[user_id + 1]
+    ]
+    sample = random.Random(args.seed).sample(user_ids, min(args.sample, len(user_ids)))
+    for name, fanout_cap, candidate_cap in (
+        (
+            "capped",
+            settings.db.suggestions_fanout_cap,
+            settings.db.suggestions_candidate_cap,
+        ),
+        ("uncapped", args.users, args.users),
+    ):
+        rate = measure_single(rows, sample, fanout_cap, candidate_cap)
+        print(f"{name}: {rate:.0f} users/s in one process")
+
+    start = perf_counter()
+    computed = 0
+    async for suggestions in compute_suggestions(
+        rows=rows,
+        user_ids=user_ids,
+        workers=args.workers,
+        chunk_size=settings.db.suggestions_batch_size,
+        limit=settings.db.suggestions_limit,
+        fanout_cap=settings.db.suggestions_fanout_cap,
+        candidate_cap=settings.db.suggestions_candidate_cap,
+    ):
+        computed += len(suggestions)
+    elapsed = perf_counter() - start
+    print(
+        f"pool of {args.workers}: {computed} users in {elapsed:.1f} s,"
+        f" {computed / elapsed:.0f} users/s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
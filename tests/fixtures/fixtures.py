@@ -21,6 +21,8 @@ USER = {
         "name": "user1",
         "followers": [],
         "following": [],
+        "followers_count": 0,
+        "following_count": 0,
     },
 }
 
@@ -44,6 +46,8 @@ PROFILE_DATA = {
         "name": "user2",
         "followers": [{"id": 1, "name": "user1"}],
         "following": [{"id": 1, "name": "user1"}],
+        "followers_count": 1,
+        "following_count": 1,
     },
 }
 
@@ -100,3 +104,15 @@ METHOD_NOT_ALLOWED = {
     "error_type": "HTTPException",
     "error_messages": "Method Not Allowed",
 }
+
+
+class FakeClock:
+    """
+    Часы, время которых сдвигается вручную.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
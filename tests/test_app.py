@@ -289,6 +289,8 @@ class TestUsers:
         """
         cls.user1_info["user"]["followers"].append(FOLLOWER)
         cls.user1_info["user"]["following"].extend(FOLLOWING)
+        cls.user1_info["user"]["followers_count"] = 1
+        cls.user1_info["user"]["following_count"] = len(FOLLOWING)
         await cls.test_get_me_info(ac)
 
     @classmethod
@@ -330,6 +332,7 @@ class TestUsers:
         ac: Клиент для асинхронного взаимодействия с приложением
         """
         cls.user1_info["user"]["following"].pop(-1)
+        cls.user1_info["user"]["following_count"] -= 1
         await cls.test_get_me_info(ac)
 
     @classmethod
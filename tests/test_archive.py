@@ -0,0 +1,157 @@
+"""
+Модуль с тестами переноса старых твитов в архив.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.archive import ArchivedTweetRepository
+from src.repositories.medias import MediaRepository
+from src.repositories.tweet_media_repository import TweetMediaRepository
+from src.repositories.tweets import TweetRepository
+from src.repositories.user_tweet_repository import LikeRepository
+from src.services.archive_service import ArchiveService
+
+CUTOFF = datetime.now(timezone.utc) - timedelta(days=365)
+
+
+@pytest.fixture()
+async def old_tweet(async_session: AsyncSession) -> AsyncGenerator[int, None]:
+    """
+    Создает твит старше года с лайком и картинкой. После теста удаляет его из архива.
+
+    Возвращает идентификатор твита.
+    """
+    tweet_id = await TweetRepository.create_object(
+        session=async_session,
+        data={
+            "content": "old tweet",
+            "user_id": 1,
+            "created_at": CUTOFF - timedelta(days=30),
+        },
+    )
+    media_id = await MediaRepository.create_object(
+        session=async_session, data={"attachment": "old.png"}
+    )
+    await TweetMediaRepository.create_object(
+        session=async_session, data={"tweet_id": tweet_id, "media_id": media_id}
+    )
+    await LikeRepository.create_object(
+        session=async_session, data={"tweet_id": tweet_id, "user_id": 2}
+    )
+    yield tweet_id
+    await ArchivedTweetRepository.delete_object_by_params(
+        session=async_session, data={"id": tweet_id}
+    )
+    await MediaRepository.delete_object_by_params(
+        session=async_session, data={"id": media_id}
+    )
+
+
+class TestArchive:
+    """
+    Класс с тестами, нацеленными на архив твитов.
+    """
+
+    @classmethod
+    async def test_archive_old_tweets(
+        cls, ac: AsyncClient, async_session: AsyncSession, old_tweet: int
+    ) -> None:
+        """
+        Переносит старые твиты в архив пачками по одному твиту.
+        Проверяет, что старый твит исчез из ленты, но доступен по id вместе с лайками и картинками,
+        а новые твиты остались на месте.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        async_session: Сессия для асинхронной работы с базой данных
+        old_tweet: Идентификатор старого твита
+        """
+        moved = await ArchiveService.archive_old_tweets(
+            session=async_session, cutoff=CUTOFF, batch_size=1
+        )
+        assert moved == 1
+        assert not await TweetRepository.check_exists_object_by_params(
+            session=async_session, data={"id": old_tweet}
+        )
+        assert not await LikeRepository.check_exists_object_by_params(
+            session=async_session, data={"tweet_id": old_tweet}
+        )
+
+        response = await ac.get("/api/tweets", headers={"api-key": "test"})
+        assert old_tweet not in [tweet["id"] for tweet in response.json()["tweets"]]
+
+        response = await ac.get(f"/api/tweets/{old_tweet}", headers={"api-key": "test"})
+        assert response.status_code == 200
+        assert response.json() == {
+            "result": True,
+            "tweet": {
+                "id": old_tweet,
+                "content": "old tweet",
+                "attachments": ["old.png"],
+                "author": {"id": 1, "name": "user1"},
+                "likes": [{"user_id": 2, "name": "user2"}],
+            },
+        }
+
+    @classmethod
+    async def test_get_tweet_from_hot_table(cls, ac: AsyncClient) -> None:
+        """
+        Проверяет, что актуальный твит доступен по id, а несуществующий возвращает 404.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        response = await ac.get("/api/tweets", headers={"api-key": "test"})
+        tweet = response.json()["tweets"][0]
+        response = await ac.get(
+            f"/api/tweets/{tweet['id']}", headers={"api-key": "test"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": True, "tweet": tweet}
+
+        response = await ac.get("/api/tweets/999999", headers={"api-key": "test"})
+        assert response.status_code == 404
+
+    @classmethod
+    async def test_lookup_tweets(
+        cls, ac: AsyncClient, async_session: AsyncSession, old_tweet: int
+    ) -> None:
+        """
+        Запрашивает пачку твитов из архива и актуальной таблицы с повтором и несуществующим id.
+        Проверяет, что твиты возвращаются в порядке запроса без повторов,
+        а несуществующий пропускается.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        async_session: Сессия для асинхронной работы с базой данных
+        old_tweet: Идентификатор старого твита
+        """
+        await ArchiveService.archive_old_tweets(
+            session=async_session, cutoff=CUTOFF, batch_size=1
+        )
+        response = await ac.get("/api/tweets", headers={"api-key": "test"})
+        tweet = response.json()["tweets"][0]
+        response = await ac.get(
+            "/api/tweets/lookup",
+            params={"ids": f"{tweet['id']},999999,{old_tweet},{tweet['id']}"},
+            headers={"api-key": "test"},
+        )
+        assert response.status_code == 200
+        tweets = response.json()["tweets"]
+        assert [item["id"] for item in tweets] == [tweet["id"], old_tweet]
+        assert tweets[0] == tweet
+        assert tweets[1]["likes"] == [{"user_id": 2, "name": "user2"}]
+
+        response = await ac.get(
+            "/api/tweets/lookup", params={"ids": "0"}, headers={"api-key": "test"}
+        )
+        assert response.status_code == 422
@@ -0,0 +1,151 @@
+"""
+Модуль с тестами кэша ленты в памяти процесса.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncGenerator
+
+import pytest
+from fixtures.fixtures import FakeClock
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.feed_cache import FEED_CACHE_REQUESTS, FeedCache, feed_cache
+from src.core.settings import settings
+from src.core.swr_cache import SwrCache
+
+
+def make_feed_cache(clock: FakeClock) -> FeedCache:
+    """
+    Создает кэш ленты на два твита.
+
+    Параметры:
+
+    clock: Часы кэша
+    """
+    pages = SwrCache(
+        name="test",
+        soft_ttl=1,
+        hard_ttl=10,
+        stale_if_error=0,
+        max_entries=10,
+        session_factory=lambda: nullcontext(None),
+        clock=clock,
+    )
+    return FeedCache(max_fragments=2, fragment_ttl=10, pages=pages, clock=clock)
+
+
+@pytest.fixture()
+async def enabled_feed_cache(
+    monkeypatch: pytest.MonkeyPatch, async_session: AsyncSession
+) -> AsyncGenerator[FeedCache, None]:
+    """
+    Включает кэш ленты и очищает его до и после теста.
+    Фоновые обновления порядка страниц выполняются в сессии теста и дожидаются после теста.
+    """
+    monkeypatch.setattr(settings.db, "feed_cache_enabled", True)
+    monkeypatch.setattr(
+        feed_cache.pages, "session_factory", lambda: nullcontext(async_session)
+    )
+    feed_cache.clear()
+    yield feed_cache
+    await asyncio.gather(*feed_cache.pages.refreshing.values())
+    feed_cache.clear()
+
+
+class TestFeedCache:
+    """
+    Класс с тестами, нацеленными на кэш ленты.
+    """
+
+    @classmethod
+    def test_versions_and_expiration(cls) -> None:
+        """
+        Проверяет, что JSON, сохраненный под версией, полученной до сброса твита,
+        не отдается после сброса, JSON устаревает, а давно не запрошенные твиты вытесняются.
+        """
+        clock = FakeClock()
+        cache = make_feed_cache(clock)
+        version = cache.get_version(1)
+        cache.invalidate_tweets([1])
+        cache.set_fragment(1, version, b"stale")
+        assert cache.get_fragment(1, cache.get_version(1)) is None
+
+        cache.set_fragment(1, cache.get_version(1), b"first")
+        cache.set_fragment(2, cache.get_version(2), b"second")
+        assert cache.get_fragment(1, cache.get_version(1)) == b"first"
+        cache.set_fragment(3, cache.get_version(3), b"third")
+        assert cache.get_fragment(2, cache.get_version(2)) is None
+        assert cache.get_fragment(1, cache.get_version(1)) == b"first"
+        clock.now = 10
+        assert cache.get_fragment(1, cache.get_version(1)) is None
+
+    @classmethod
+    def test_clear_on_versions_overflow(cls) -> None:
+        """
+        Проверяет, что при переполнении версий кэш очищается,
+        а версии, выданные до очистки, больше не совпадают с текущими.
+        """
+        cache = make_feed_cache(FakeClock())
+        old_versions = {tweet_id: cache.get_version(tweet_id) for tweet_id in (1, 2)}
+        cache.invalidate_tweets([1, 2])
+        cache.set_fragment(1, cache.get_version(1), b"first")
+        cache.invalidate_tweets([3])
+        assert not cache.fragments and not cache.versions
+        for tweet_id, version in old_versions.items():
+            assert cache.get_version(tweet_id) != version
+
+    @classmethod
+    async def test_feed_from_cache(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        ac: AsyncClient,
+        enabled_feed_cache: FeedCache,
+    ) -> None:
+        """
+        Проверяет, что лента из кэша совпадает с лентой из базы,
+        после лайка меняется только лайкнутый твит, остальные отдаются из памяти,
+        а новый твит сразу попадает в ленту автора.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        ac: Клиент для асинхронного взаимодействия с приложением
+        enabled_feed_cache: Включенный кэш ленты
+        """
+        headers = {"api-key": "test"}
+        response = await ac.post(
+            "/api/tweets", json={"tweet_data": "cached tweet"}, headers=headers
+        )
+        tweet_id = response.json()["tweet_id"]
+        monkeypatch.setattr(settings.db, "feed_cache_enabled", False)
+        expected = (await ac.get("/api/tweets", headers=headers)).json()
+        monkeypatch.setattr(settings.db, "feed_cache_enabled", True)
+        assert len(expected["tweets"]) > 1
+        for _ in range(2):
+            response = await ac.get("/api/tweets", headers=headers)
+            assert response.status_code == 200
+            assert response.json() == expected
+
+        hits = FEED_CACHE_REQUESTS.get(result="hit")
+        await ac.post(f"/api/tweets/{tweet_id}/likes", headers=headers)
+        response = await ac.get("/api/tweets", headers=headers)
+        tweets = {tweet["id"]: tweet for tweet in response.json()["tweets"]}
+        assert tweets[tweet_id]["likes"] == [{"user_id": 1, "name": "user1"}]
+        assert (
+            FEED_CACHE_REQUESTS.get(result="hit") == hits + len(expected["tweets"]) - 1
+        )
+
+        await ac.delete(f"/api/tweets/{tweet_id}", headers=headers)
+        response = await ac.get("/api/tweets", headers=headers)
+        assert tweet_id not in [tweet["id"] for tweet in response.json()["tweets"]]
+
+        response = await ac.post(
+            "/api/tweets", json={"tweet_data": "new cached tweet"}, headers=headers
+        )
+        new_tweet_id = response.json()["tweet_id"]
+        response = await ac.get("/api/tweets", headers=headers)
+        assert new_tweet_id in [tweet["id"] for tweet in response.json()["tweets"]]
+        await ac.delete(f"/api/tweets/{new_tweet_id}", headers=headers)
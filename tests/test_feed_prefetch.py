@@ -0,0 +1,128 @@
+"""
+Модуль с тестами предзагрузки следующей страницы ленты.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+from contextlib import nullcontext
+
+import pytest
+from fixtures.fixtures import FakeClock
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.feed_cache import feed_cache, get_page_key
+from src.core.feed_prefetch import (
+    FEED_PREFETCH_REQUESTS,
+    FEED_PREFETCHES,
+    FeedPrefetcher,
+    feed_prefetcher,
+)
+from src.core.ranking import FeedSort
+from src.core.settings import settings
+
+
+class TestFeedPrefetch:
+    """
+    Класс с тестами, нацеленными на предзагрузку страниц ленты.
+    """
+
+    @classmethod
+    async def test_budget_and_hits(cls) -> None:
+        """
+        Проверяет, что предзагрузки сверх бюджета и при занятом пуле пропускаются,
+        одна страница не загружается дважды, а запрос считается попаданием,
+        если страница загружается сейчас или была загружена не раньше ttl секунд назад.
+        """
+        clock, busy = FakeClock(), False
+        prefetcher = FeedPrefetcher(
+            max_concurrency=1,
+            max_pages=10,
+            ttl=10,
+            session_factory=lambda: nullcontext(None),
+            is_busy=lambda: busy,
+            clock=clock,
+        )
+        release = asyncio.Event()
+        loads = []
+
+        async def load(session: AsyncSession | None) -> None:
+            loads.append(session)
+            await release.wait()
+
+        budget = FEED_PREFETCHES.get(result="budget")
+        hits = FEED_PREFETCH_REQUESTS.get(result="hit")
+        misses = FEED_PREFETCH_REQUESTS.get(result="miss")
+        prefetcher.start("page 2", load)
+        prefetcher.start("page 2", load)
+        prefetcher.start("page 3", load)
+        assert FEED_PREFETCHES.get(result="budget") == budget + 1
+        prefetcher.record_request("page 2")
+        release.set()
+        await asyncio.gather(*prefetcher.tasks.values())
+        assert len(loads) == 1
+
+        busy_count = FEED_PREFETCHES.get(result="busy")
+        busy = True
+        prefetcher.start("page 3", load)
+        assert FEED_PREFETCHES.get(result="busy") == busy_count + 1
+        busy = False
+        prefetcher.start("page 3", load)
+        await asyncio.gather(*prefetcher.tasks.values())
+        prefetcher.record_request("page 3")
+        prefetcher.start("page 4", load)
+        await asyncio.gather(*prefetcher.tasks.values())
+        clock.now = 10
+        prefetcher.record_request("page 4")
+        assert FEED_PREFETCH_REQUESTS.get(result="hit") == hits + 2
+        assert FEED_PREFETCH_REQUESTS.get(result="miss") == misses + 1
+
+    @classmethod
+    async def test_prefetch_next_page(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+        ac: AsyncClient,
+    ) -> None:
+        """
+        Включает кэш ленты и предзагрузку. Проверяет, что после ответа на страницу
+        следующая страница загружается в кэш и отдается из него такой же, как из базы.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        headers = {"api-key": "test"}
+        tweet_ids = []
+        for text in ("first prefetch tweet", "second prefetch tweet"):
+            response = await ac.post(
+                "/api/tweets", json={"tweet_data": text}, headers=headers
+            )
+            tweet_ids.append(response.json()["tweet_id"])
+        params = {"offset": 2, "limit": 1, "sort": FeedSort.NEW.value}
+        expected = (await ac.get("/api/tweets", params=params, headers=headers)).json()
+        assert expected["tweets"]
+
+        monkeypatch.setattr(settings.db, "feed_cache_enabled", True)
+        monkeypatch.setattr(settings.db, "feed_prefetch_enabled", True)
+        for target in (feed_cache.pages, feed_prefetcher):
+            monkeypatch.setattr(
+                target, "session_factory", lambda: nullcontext(async_session)
+            )
+        monkeypatch.setattr(feed_prefetcher, "is_busy", lambda: False)
+        feed_cache.clear()
+        hits = FEED_PREFETCH_REQUESTS.get(result="hit")
+        await ac.get("/api/tweets", params={**params, "offset": 1}, headers=headers)
+        await asyncio.gather(*feed_prefetcher.tasks.values())
+        assert get_page_key(2, 1, FeedSort.NEW) in feed_cache.pages.entries
+
+        response = await ac.get("/api/tweets", params=params, headers=headers)
+        assert response.json() == expected
+        assert FEED_PREFETCH_REQUESTS.get(result="hit") == hits + 1
+        await asyncio.gather(*feed_prefetcher.tasks.values())
+        await asyncio.gather(*feed_cache.pages.refreshing.values())
+        feed_cache.clear()
+        for tweet_id in tweet_ids:
+            await ac.delete(f"/api/tweets/{tweet_id}", headers=headers)
@@ -0,0 +1,143 @@
+"""
+Модуль с тестами снимка ленты в общем файле.
+Запускается после test_app.py и использует созданные там твиты.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.feed_snapshot import (
+    FEED_SNAPSHOT_REQUESTS,
+    FeedSnapshot,
+    feed_snapshot,
+    write_snapshot,
+)
+from src.core.ranking import FeedSort
+from src.core.settings import settings
+from src.services.tweet_service import TweetService
+
+
+def get_tweet_ids(page: bytes | None) -> list[int] | None:
+    """
+    Возвращает идентификаторы твитов страницы из снимка.
+
+    Параметры:
+
+    page: JSON страницы или None
+    """
+    if page is None:
+        return None
+    return [tweet["id"] for tweet in json.loads(page)["tweets"]]
+
+
+class TestFeedSnapshot:
+    """
+    Класс с тестами, нацеленными на снимок ленты.
+    """
+
+    @classmethod
+    def test_pages_and_swap(cls, tmp_path: Path) -> None:
+        """
+        Проверяет, что страницы внутри снимка собираются из JSON твитов, страницы за пределами
+        неполного снимка и старый снимок не отдаются, а замененный файл отображается заново.
+
+        Параметры:
+
+        tmp_path: Временная директория теста
+        """
+        path = str(tmp_path / "feed_snapshot.bin")
+        fragments = {
+            tweet_id: json.dumps({"id": tweet_id}).encode() for tweet_id in (1, 2, 3)
+        }
+        orders = {FeedSort.TOP: ([3, 1, 2], False), FeedSort.NEW: ([1, 4, 2], True)}
+        write_snapshot(path=path, orders=orders, fragments=fragments, built_at=100)
+        snapshot = FeedSnapshot(path=path, reload_interval=1, max_age=10)
+        snapshot.clock = lambda: 105
+        assert snapshot.get_page(offset=1, limit=2, sort=FeedSort.TOP) is None
+        snapshot.reload()
+
+        assert get_tweet_ids(snapshot.get_page(1, 2, FeedSort.TOP)) == [3, 1]
+        assert get_tweet_ids(snapshot.get_page(2, 2, FeedSort.TOP)) is None
+        assert get_tweet_ids(snapshot.get_page(None, None, FeedSort.TOP)) is None
+        assert get_tweet_ids(snapshot.get_page(2, 1, FeedSort.NEW)) == [2]
+        assert get_tweet_ids(snapshot.get_page(2, 2, FeedSort.NEW)) == []
+        assert get_tweet_ids(snapshot.get_page(None, None, FeedSort.NEW)) == [1, 2]
+        assert get_tweet_ids(snapshot.get_page(1, 2, FeedSort.HOT)) is None
+
+        write_snapshot(
+            path=path, orders={FeedSort.TOP: ([2], True)}, fragments=fragments
+        )
+        snapshot.clock = lambda: 115
+        assert snapshot.get_page(1, 2, FeedSort.TOP) is None
+        snapshot.reload()
+        snapshot.clock = lambda: 0
+        assert get_tweet_ids(snapshot.get_page(1, 2, FeedSort.TOP)) == [2]
+        assert list(tmp_path.iterdir()) == [tmp_path / "feed_snapshot.bin"]
+
+    @classmethod
+    async def test_serve_feed_from_snapshot(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        ac: AsyncClient,
+    ) -> None:
+        """
+        Создает два твита, строит снимок из базы на один твит каждого порядка и включает его.
+        Проверяет, что страницы из снимка совпадают со страницами из базы,
+        а страницы за его пределами читаются из базы.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        tmp_path: Временная директория теста
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        headers = {"api-key": "test"}
+        tweet_ids = []
+        for text in ("first snapshot tweet", "second snapshot tweet"):
+            response = await ac.post(
+                "/api/tweets", json={"tweet_data": text}, headers=headers
+            )
+            tweet_ids.append(response.json()["tweet_id"])
+        expected = {}
+        for sort in FeedSort:
+            for offset in (1, 2):
+                response = await ac.get(
+                    "/api/tweets",
+                    params={"offset": offset, "limit": 1, "sort": sort.value},
+                    headers=headers,
+                )
+                assert response.status_code == 200
+                assert response.json()["tweets"]
+                expected[sort, offset] = response.json()
+
+        orders, fragments = await TweetService.get_feed_snapshot(
+            session=async_session, size=1
+        )
+        path = str(tmp_path / "feed_snapshot.bin")
+        write_snapshot(path=path, orders=orders, fragments=fragments)
+        monkeypatch.setattr(settings.db, "feed_snapshot_enabled", True)
+        monkeypatch.setattr(feed_snapshot, "path", path)
+        monkeypatch.setattr(feed_snapshot, "view", None)
+        monkeypatch.setattr(feed_snapshot, "file_id", None)
+        feed_snapshot.reload()
+
+        hits = FEED_SNAPSHOT_REQUESTS.get(result="hit")
+        misses = FEED_SNAPSHOT_REQUESTS.get(result="miss")
+        for (sort, offset), page in expected.items():
+            response = await ac.get(
+                "/api/tweets",
+                params={"offset": offset, "limit": 1, "sort": sort.value},
+                headers=headers,
+            )
+            assert response.json() == page
+        assert FEED_SNAPSHOT_REQUESTS.get(result="hit") == hits + len(FeedSort)
+        assert FEED_SNAPSHOT_REQUESTS.get(result="miss") == misses + len(FeedSort)
+        for tweet_id in tweet_ids:
+            await ac.delete(f"/api/tweets/{tweet_id}", headers=headers)
@@ -0,0 +1,224 @@
+"""
+Модуль с тестами графа подписок в памяти процесса.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import asyncpg
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.follow_graph import FollowGraph
+from src.core.invalidation_bus import InvalidationBus, get_listen_url, invalidation_bus
+from src.core.settings import settings
+from src.repositories.users import UserFollowerRepository
+from src.services import user_service
+from src.services.user_service import (
+    UserFollowerService,
+    apply_follow_edges,
+    follow_graph,
+    reload_follow_graph,
+)
+
+# Пары (подписчик, пользователь)
+EDGES = [(1, 2), (1, 3), (1, 7), (2, 1), (3, 1), (3, 7), (7, 3)]
+
+
+def make_graph(edges: list[tuple[int, int]]) -> FollowGraph:
+    """
+    Создает граф подписок, загружающий переданные пары.
+
+    Параметры:
+
+    edges: Пары (подписчик, пользователь)
+    """
+
+    async def load(by_follower: bool) -> AsyncIterator[tuple[int, int]]:
+        pairs = edges if by_follower else [(user, follower) for follower, user in edges]
+        for pair in sorted(pairs):
+            yield pair
+
+    return FollowGraph(reload_interval=60, load=load)
+
+
+class TestFollowGraph:
+    """
+    Класс с тестами, нацеленными на граф подписок в памяти процесса.
+    """
+
+    @classmethod
+    async def test_queries(cls) -> None:
+        """
+        Проверяет проверку подписки и страницы соседей
+        до и после изменений, а также пользователей, которых нет в массивах.
+        """
+        graph = make_graph(EDGES)
+        await graph.reload()
+        assert graph.is_following(1, 7)
+        assert not graph.is_following(7, 1)
+        assert not graph.is_following(100, 1)
+        assert graph.get_following(1) == [2, 3, 7]
+        assert graph.get_following(1, after_id=2, limit=1) == [3]
+        assert graph.get_followers(7) == [1, 3]
+        assert graph.get_followers(100) == []
+
+        graph.update(follower_id=1, user_id=3, is_following=False)
+        graph.update(follower_id=1, user_id=5, is_following=True)
+        graph.update(follower_id=1, user_id=2, is_following=True)
+        graph.update(follower_id=100, user_id=1, is_following=True)
+        assert not graph.is_following(1, 3)
+        assert graph.get_following(1) == [2, 5, 7]
+        assert graph.get_following(1, after_id=2, limit=1) == [5]
+        assert graph.get_followers(3) == [7]
+        assert graph.get_followers(1) == [2, 3, 100]
+
+    @classmethod
+    async def test_keep_changes_made_during_reload(cls) -> None:
+        """
+        Имитирует подписку и отписку во время перезагрузки, которые не попали в прочитанные пары.
+        Проверяет, что после перезагрузки они не теряются, а старые изменения сбрасываются.
+        """
+        graph = make_graph(EDGES)
+        await graph.reload()
+        graph.update(follower_id=7, user_id=1, is_following=True)
+        load = graph.load
+
+        async def load_with_changes(
+            by_follower: bool,
+        ) -> AsyncIterator[tuple[int, int]]:
+            async for edge in load(by_follower):
+                yield edge
+            graph.update(follower_id=2, user_id=7, is_following=True)
+            graph.update(follower_id=3, user_id=7, is_following=False)
+
+        graph.load = load_with_changes
+        await graph.reload()
+        assert graph.pending is None
+        assert not graph.is_following(7, 1)
+        assert graph.get_followers(7) == [1, 2]
+        assert graph.get_following(3) == [1]
+
+    @classmethod
+    async def test_pages_from_graph(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+        ac: AsyncClient,
+    ) -> None:
+        """
+        Загружает граф из таблицы подписчиков и включает его.
+        Проверяет, что страницы совпадают со страницами из базы,
+        а подписка и отписка сразу меняют граф.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+
+        async def load(by_follower: bool) -> AsyncIterator[tuple[int, int]]:
+            async for edge in UserFollowerRepository.stream_edges(
+                session=async_session, by_follower=by_follower, batch_size=2
+            ):
+                yield edge
+
+        graph = FollowGraph(reload_interval=60, load=load)
+        await graph.reload()
+        await async_session.commit()
+        expected = {}
+        for user_id in (1, 2, 3, 4):
+            for kind in ("followers", "following"):
+                response = await ac.get(f"/api/users/{user_id}/{kind}")
+                expected[user_id, kind] = response.json()
+
+        for name in (
+            "following",
+            "followers",
+            "following_overlay",
+            "followers_overlay",
+        ):
+            monkeypatch.setattr(follow_graph, name, getattr(graph, name))
+        monkeypatch.setattr(follow_graph, "loaded", True)
+        monkeypatch.setattr(settings.db, "follow_graph_enabled", True)
+        for (user_id, kind), page in expected.items():
+            response = await ac.get(f"/api/users/{user_id}/{kind}")
+            assert response.json() == page
+
+        await UserFollowerService.subscribe_to_user(
+            session=async_session, user_id=4, follower_id=3
+        )
+        assert follow_graph.is_following(3, 4)
+        response = await ac.get("/api/users/4/followers", params={"after": 2})
+        assert 3 in [user["id"] for user in response.json()["users"]]
+        await UserFollowerService.unsubscribe_from_user(
+            session=async_session, user_id=4, follower_id=3
+        )
+        assert not follow_graph.is_following(3, 4)
+
+    @classmethod
+    async def test_changes_of_other_processes(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+    ) -> None:
+        """
+        Проверяет, что подписка и отписка публикуются в шину сбросов,
+        полученные подписки другого процесса меняют граф,
+        а полная очистка после подключения перезагружает его из базы.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        monkeypatch.setattr(settings.db, "invalidation_bus_enabled", True)
+        monkeypatch.setattr(settings.db, "follow_graph_enabled", True)
+        edges: list[list[int]] = []
+        received = asyncio.Event()
+
+        def on_edges(keys: list[list[int]]) -> None:
+            edges.extend(keys)
+            received.set()
+
+        listener = InvalidationBus(
+            channel=invalidation_bus.channel,
+            connect=lambda: asyncpg.connect(get_listen_url()),
+            reconnect_interval=0.05,
+            ping_interval=0.2,
+        )
+        connected = asyncio.Event()
+        listener.subscribe("follow", on_edges)
+        listener.subscribe_flush(connected.set)
+        await listener.start()
+        try:
+            await asyncio.wait_for(connected.wait(), 5)
+            await UserFollowerService.subscribe_to_user(
+                session=async_session, user_id=4, follower_id=3
+            )
+            await UserFollowerService.unsubscribe_from_user(
+                session=async_session, user_id=4, follower_id=3
+            )
+            while len(edges) < 2:
+                await asyncio.wait_for(received.wait(), 5)
+                received.clear()
+        finally:
+            await listener.stop()
+        assert edges == [[3, 4, 1], [3, 4, 0]]
+
+        graph = make_graph(EDGES)
+        monkeypatch.setattr(user_service, "follow_graph", graph)
+        reload_follow_graph()
+        assert not graph.background_reloads  # Незагруженный граф загрузится при запуске
+        await graph.reload()
+        apply_follow_edges([[3, 4, 1], [1, 2, 0]])
+        assert graph.is_following(3, 4)
+        assert not graph.is_following(1, 2)
+
+        reload_follow_graph()
+        await asyncio.gather(*graph.background_reloads)
+        assert not graph.is_following(3, 4)
+        assert graph.is_following(1, 2)
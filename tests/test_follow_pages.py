@@ -0,0 +1,273 @@
+"""
+Модуль с тестами постраничной выдачи подписчиков и подписок.
+"""
+
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.settings import settings
+from src.models import UserModel
+from src.repositories.users import UserRepository
+from src.services.user_service import UserFollowerService, UserService
+
+FOLLOWERS_COUNT = 5  # Сколько пользователей подписано на знаменитость
+
+
+@pytest.fixture()
+async def celebrity(async_session: AsyncSession) -> AsyncGenerator[dict, None]:
+    """
+    Создает знаменитость и ее подписчиков. Знаменитость подписана на первого подписчика.
+    После теста удаляет пользователей вместе с подписками.
+
+    Возвращает словарь с id знаменитости и id подписчиков.
+    """
+    celebrity = await UserService.create_user(
+        session=async_session, user_data={"name": "celebrity", "token": "celebrity"}
+    )
+    celebrity_id = celebrity["id"]
+    follower_ids = []
+    for number in range(FOLLOWERS_COUNT):
+        follower_id = await UserRepository.create_object(
+            session=async_session,
+            data={"name": f"fan{number}", "token": f"fan{number}"},
+        )
+        await UserFollowerService.subscribe_to_user(
+            session=async_session, user_id=celebrity_id, follower_id=follower_id
+        )
+        follower_ids.append(follower_id)
+    await UserFollowerService.subscribe_to_user(
+        session=async_session, user_id=follower_ids[0], follower_id=celebrity_id
+    )
+    yield {"id": celebrity_id, "followers": follower_ids}
+    await async_session.execute(
+        delete(UserModel).filter(UserModel.id.in_([celebrity_id, *follower_ids]))
+    )
+    await async_session.commit()
+
+
+class TestFollowPages:
+    """
+    Класс с тестами, нацеленными на страницы подписчиков и подписок.
+    """
+
+    @classmethod
+    async def test_profile_first_page(
+        cls, monkeypatch: pytest.MonkeyPatch, ac: AsyncClient, celebrity: dict
+    ) -> None:
+        """
+        Проверяет, что профиль содержит количество подписчиков и подписок
+        и только первую страницу подписчиков.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        ac: Клиент для асинхронного взаимодействия с приложением
+        celebrity: Идентификаторы знаменитости и ее подписчиков
+        """
+        monkeypatch.setattr(settings.db, "follow_page_size", 2)
+        response = await ac.get(f"/api/users/{celebrity['id']}")
+        assert response.status_code == 200
+        user = response.json()["user"]
+        assert user["followers_count"] == FOLLOWERS_COUNT
+        assert user["following_count"] == 1
+        assert [follower["id"] for follower in user["followers"]] == celebrity[
+            "followers"
+        ][:2]
+        assert [following["id"] for following in user["following"]] == celebrity[
+            "followers"
+        ][:1]
+
+    @classmethod
+    async def test_followers_pages(cls, ac: AsyncClient, celebrity: dict) -> None:
+        """
+        Проходит по всем страницам подписчиков, передавая next_after в следующий запрос.
+        Проверяет, что подписчики не повторяются и не теряются,
+        а у последней страницы next_after равен None.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        celebrity: Идентификаторы знаменитости и ее подписчиков
+        """
+        pages = []
+        params = {"limit": 2}
+        while True:
+            response = await ac.get(
+                f"/api/users/{celebrity['id']}/followers", params=params
+            )
+            assert response.status_code == 200
+            page = response.json()
+            pages.append([user["id"] for user in page["users"]])
+            if page["next_after"] is None:
+                break
+            params["after"] = page["next_after"]
+        followers = celebrity["followers"]
+        assert pages == [followers[:2], followers[2:4], followers[4:]]
+
+        response = await ac.get(f"/api/users/{followers[0]}/following")
+        assert response.json() == {
+            "result": True,
+            "users": [{"id": celebrity["id"], "name": "celebrity"}],
+            "next_after": None,
+        }
+
+    @classmethod
+    async def test_pages_of_missing_user(cls, ac: AsyncClient) -> None:
+        """
+        Проверяет, что для несуществующего пользователя возвращается 404,
+        а слишком большая страница отклоняется.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        response = await ac.get("/api/users/999999/following")
+        assert response.status_code == 404
+        response = await ac.get("/api/users/1/followers", params={"limit": 1001})
+        assert response.status_code == 422
+
+    @classmethod
+    async def test_relationships(
+        cls, monkeypatch: pytest.MonkeyPatch, ac: AsyncClient, celebrity: dict
+    ) -> None:
+        """
+        Проверяет отношения знаменитости к подписчикам, несуществующему пользователю и себе,
+        порядок ответа, пропуск повторов и ограничение количества id.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        ac: Клиент для асинхронного взаимодействия с приложением
+        celebrity: Идентификаторы знаменитости и ее подписчиков
+        """
+        first, second, *_ = celebrity["followers"]
+        headers = {"api-key": "celebrity"}
+        response = await ac.get(
+            "/api/users/relationships",
+            params={"ids": [f"{second},{first},999999", str(celebrity["id"]), first]},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "result": True,
+            "relationships": [
+                {"id": second, "following": False, "followed_by": True},
+                {"id": first, "following": True, "followed_by": True},
+                {"id": 999999, "following": False, "followed_by": False},
+                {"id": celebrity["id"], "following": False, "followed_by": False},
+            ],
+        }
+
+        for ids in ("1,a", "", ",".join(["1"] * (settings.db.batch_ids_limit + 1))):
+            response = await ac.get(
+                "/api/users/relationships", params={"ids": ids}, headers=headers
+            )
+            assert response.status_code == 422
+
+    @classmethod
+    async def test_bulk_follow(
+        cls, async_session: AsyncSession, ac: AsyncClient, celebrity: dict
+    ) -> None:
+        """
+        Подписывает знаменитость на пачку пользователей.
+        Проверяет результат по каждому id, пропуск повторов,
+        изменение счетчиков в той же транзакции и повторную подписку.
+
+        Параметры:
+
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        celebrity: Идентификаторы знаменитости и ее подписчиков
+        """
+        first, second, third, *_ = celebrity["followers"]
+        headers = {"api-key": "celebrity"}
+        ids = [second, first, 999999, celebrity["id"], third, second]
+        response = await ac.post(
+            "/api/users/me/follow/bulk", json={"ids": ids}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "result": True,
+            "followed": 2,
+            "results": [
+                {"id": second, "status": "followed"},
+                {"id": first, "status": "already_following"},
+                {"id": 999999, "status": "not_found"},
+                {"id": celebrity["id"], "status": "self"},
+                {"id": third, "status": "followed"},
+            ],
+        }
+        for user_id, counts in (
+            (celebrity["id"], (FOLLOWERS_COUNT, 3)),
+            (second, (1, 1)),
+            (first, (1, 1)),
+        ):
+            user = await UserRepository.get_user_with_counts(
+                session=async_session, user_id=user_id
+            )
+            assert (user.followers_count, user.following_count) == counts
+
+        response = await ac.post(
+            "/api/users/me/follow/bulk", json={"ids": [third]}, headers=headers
+        )
+        assert response.json()["followed"] == 0
+        response = await ac.post(
+            "/api/users/me/follow/bulk", json={"ids": []}, headers=headers
+        )
+        assert response.status_code == 422
+
+    @classmethod
+    async def test_sweep_fixes_follow_counts(
+        cls, async_session: AsyncSession, celebrity: dict
+    ) -> None:
+        """
+        Отписывает одного подписчика и удаляет другого вместе с его подписками.
+        Проверяет, что отписка меняет счетчики сразу, а расхождение после удаления
+        исправляет сверка.
+
+        Параметры:
+
+        async_session: Сессия для асинхронной работы с базой данных
+        celebrity: Идентификаторы знаменитости и ее подписчиков
+        """
+        first, second, *_ = celebrity["followers"]
+        await UserFollowerService.unsubscribe_from_user(
+            session=async_session, user_id=celebrity["id"], follower_id=second
+        )
+        await UserRepository.delete_object_by_params(
+            session=async_session, data={"id": first}
+        )
+        await async_session.execute(
+            update(UserModel)
+            .filter(UserModel.id == celebrity["followers"][-1])
+            .values(followers_count=100)
+        )
+        await async_session.commit()
+        user = await UserRepository.get_user_with_counts(
+            session=async_session, user_id=celebrity["id"]
+        )
+        assert (user.followers_count, user.following_count) == (FOLLOWERS_COUNT - 1, 1)
+
+        await UserFollowerService.sweep_follow_counts(
+            session=async_session, batch_size=1
+        )
+        counts = await async_session.execute(
+            select(UserModel.id, UserModel.followers_count, UserModel.following_count)
+            .filter(UserModel.id.in_([celebrity["id"], *celebrity["followers"]]))
+            .order_by(UserModel.id)
+        )
+        assert counts.all() == [
+            (celebrity["id"], FOLLOWERS_COUNT - 2, 0),
+            (second, 0, 0),
+            *[(follower_id, 0, 1) for follower_id in celebrity["followers"][2:]],
+        ]
+        assert (
+            await UserFollowerService.sweep_follow_counts(
+                session=async_session, batch_size=1
+            )
+            == 0
+        )
@@ -0,0 +1,162 @@
+"""
+Модуль с тестами шины сбросов кэшей между процессами.
+"""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+import asyncpg
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.invalidation_bus import InvalidationBus, get_listen_url
+from src.core.settings import settings
+
+
+class BusRecorder:
+    """
+    Обработчики шины, запоминающие полученные сбросы и полные очистки.
+    """
+
+    def __init__(self, bus: InvalidationBus) -> None:
+        self.keys: list[int] = []
+        self.flushes = 0
+        self.received = asyncio.Event()
+        self.flushed = asyncio.Event()
+        bus.subscribe("tweet", self.on_keys)
+        bus.subscribe_flush(self.on_flush)
+
+    def on_keys(self, keys: list[int]) -> None:
+        self.keys.extend(keys)
+        self.received.set()
+
+    def on_flush(self) -> None:
+        self.flushes += 1
+        self.flushed.set()
+
+
+def make_bus() -> InvalidationBus:
+    """
+    Создает шину, подключающуюся к тестовой базе и запоминающую свои соединения.
+    """
+    connections: list[asyncpg.Connection] = []
+
+    async def connect() -> asyncpg.Connection:
+        connections.append(await asyncpg.connect(get_listen_url()))
+        return connections[-1]
+
+    bus = InvalidationBus(
+        channel="test_invalidation",
+        connect=connect,
+        reconnect_interval=0.05,
+        ping_interval=0.2,
+    )
+    bus.connections = connections
+    return bus
+
+
+@pytest.fixture()
+async def buses(
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncGenerator[tuple[InvalidationBus, InvalidationBus], None]:
+    """
+    Включает шину и создает шины двух процессов. Останавливает их после теста.
+
+    Параметры:
+
+    monkeypatch: Фикстура для временной подмены атрибутов
+    """
+    monkeypatch.setattr(settings.db, "invalidation_bus_enabled", True)
+    publisher, listener = make_bus(), make_bus()
+    yield publisher, listener
+    await publisher.stop()
+    await listener.stop()
+
+
+async def wait(event: asyncio.Event) -> None:
+    """
+    Ждет события не дольше 5 секунд и сбрасывает его.
+
+    Параметры:
+
+    event: Событие
+    """
+    await asyncio.wait_for(event.wait(), 5)
+    event.clear()
+
+
+class TestInvalidationBus:
+    """
+    Класс с тестами, нацеленными на шину сбросов кэшей.
+    """
+
+    @classmethod
+    async def test_deliver_after_commit(
+        cls,
+        buses: tuple[InvalidationBus, InvalidationBus],
+        async_session: AsyncSession,
+    ) -> None:
+        """
+        Проверяет, что сброс получает только другой процесс и только после коммита,
+        а откаченный сброс не доставляется.
+
+        Параметры:
+
+        buses: Шины двух процессов
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        publisher, listener = buses
+        own, other = BusRecorder(publisher), BusRecorder(listener)
+        await publisher.start()
+        await listener.start()
+        await wait(own.flushed)
+        await wait(other.flushed)
+
+        await publisher.publish(async_session, "tweet", [1, 2])
+        await asyncio.sleep(0.1)
+        assert not other.keys
+        await async_session.commit()
+        await wait(other.received)
+        assert other.keys == [1, 2]
+
+        await publisher.publish(async_session, "tweet", [3])
+        await async_session.rollback()
+        await publisher.publish(async_session, "tweet", [4])
+        await async_session.commit()
+        await wait(other.received)
+        assert other.keys == [1, 2, 4]
+        assert not own.keys
+
+    @classmethod
+    async def test_reconnect(
+        cls,
+        buses: tuple[InvalidationBus, InvalidationBus],
+        async_session: AsyncSession,
+    ) -> None:
+        """
+        Обрывает соединение слушателя. Проверяет, что он переподключается,
+        очищает кэш целиком и снова получает сбросы.
+
+        Параметры:
+
+        buses: Шины двух процессов
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        publisher, listener = buses
+        other = BusRecorder(listener)
+        await listener.start()
+        await wait(other.flushed)
+
+        pid = listener.connections[-1].get_server_pid()
+        connection = await asyncpg.connect(get_listen_url())
+        try:
+            await connection.execute("SELECT pg_terminate_backend($1)", pid)
+        finally:
+            await connection.close()
+        await wait(other.flushed)
+        assert other.flushes == 2
+
+        await publisher.publish(async_session, "tweet", [5])
+        await async_session.commit()
+        await wait(other.received)
+        assert other.keys == [5]
@@ -0,0 +1,320 @@
+"""
+Модуль с тестами буфера лайков.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.like_buffer import LikeBuffer, LikeChanges
+from src.models import LikeModel, LikeVersionModel, TweetModel
+from src.repositories.tweets import TweetRepository
+from src.services.user_tweet_service import LikeService
+
+FLUSH_INTERVAL = 60_000  # Периодический сброс не должен срабатывать во время теста
+
+
+@pytest.fixture()
+async def tweet_id(async_session: AsyncSession) -> AsyncGenerator[int, None]:
+    """
+    Создает твит без лайков. После теста удаляет его вместе с лайками.
+
+    Возвращает идентификатор твита.
+    """
+    tweet_id = await TweetRepository.create_object(
+        session=async_session, data={"content": "buffered", "user_id": 1}
+    )
+    yield tweet_id
+    await TweetRepository.delete_object_by_params(
+        session=async_session, data={"id": tweet_id}
+    )
+
+
+@pytest.fixture()
+def apply_changes(
+    async_session: AsyncSession,
+) -> Callable[[LikeChanges], Awaitable[None]]:
+    """
+    Возвращает функцию, записывающую изменения лайков из буфера в тестовую базу.
+    """
+
+    async def apply(changes: LikeChanges) -> None:
+        await LikeService.apply_like_changes(session=async_session, changes=changes)
+
+    return apply
+
+
+async def get_likes(session: AsyncSession, tweet_id: int) -> tuple[list[int], int]:
+    """
+    Возвращает пользователей, лайкнувших твит, и количество лайков, сохраненное в твите.
+
+    Параметры:
+
+    session: Сессия для асинхронной работы с базой данных
+    tweet_id: Идентификатор твита
+    """
+    session.expire_all()
+    user_ids = await session.scalars(
+        select(LikeModel.user_id)
+        .filter(LikeModel.tweet_id == tweet_id)
+        .order_by(LikeModel.user_id)
+    )
+    like_count = await session.scalar(
+        select(TweetModel.like_count).filter(TweetModel.id == tweet_id)
+    )
+    return list(user_ids), like_count
+
+
+class TestLikeBuffer:
+    """
+    Класс с тестами, нацеленными на буфер лайков.
+    """
+
+    @classmethod
+    async def test_coalesce_changes(
+        cls,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        apply_changes: Callable[[LikeChanges], Awaitable[None]],
+        tweet_id: int,
+    ) -> None:
+        """
+        Ставит и снимает лайки одной пары несколько раз.
+        Проверяет, что в базу попадает только итоговое состояние пар одной пачкой,
+        а лайки несуществующего твита не сохраняются, в том числе номер их изменения,
+        и вместе со снятием несуществующего лайка не меняют счетчик.
+
+        Параметры:
+
+        tmp_path: Директория журнала
+        async_session: Сессия для асинхронной работы с базой данных
+        apply_changes: Функция, записывающая изменения лайков в базу
+        tweet_id: Идентификатор твита без лайков
+        """
+        batches = []
+
+        async def apply(changes: LikeChanges) -> None:
+            batches.append(changes)
+            await apply_changes(changes)
+
+        buffer = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply)
+        await buffer.start()
+        for user_id, liked in [(2, True), (2, False), (2, True), (3, True), (4, False)]:
+            await buffer.enqueue(user_id=user_id, tweet_id=tweet_id, liked=liked)
+        await buffer.enqueue(user_id=2, tweet_id=999999, liked=True)
+        assert await buffer.flush() == 4
+        assert [
+            {key: liked for key, (liked, _) in batch.items()} for batch in batches
+        ] == [
+            {
+                (2, tweet_id): True,
+                (3, tweet_id): True,
+                (4, tweet_id): False,
+                (2, 999999): True,
+            }
+        ]
+        assert await get_likes(async_session, tweet_id) == ([2, 3], 2)
+        versions = await async_session.scalars(
+            select(LikeVersionModel.tweet_id).filter(
+                LikeVersionModel.tweet_id == 999999
+            )
+        )
+        assert list(versions) == []
+
+        await buffer.stop()
+        assert os.listdir(tmp_path) == []
+
+    @classmethod
+    async def test_recover_after_crash(
+        cls,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        apply_changes: Callable[[LikeChanges], Awaitable[None]],
+        tweet_id: int,
+    ) -> None:
+        """
+        Записывает лайки в журнал и имитирует падение процесса до сброса в базу.
+        Проверяет, что сегменты работающего процесса не забираются,
+        сегменты упавшего процесса записываются в базу при следующем запуске,
+        недописанная последняя строка пропускается,
+        а повторная запись уже примененного журнала, в том числе более старого снятия
+        лайка, не меняет лайки и счетчик.
+
+        Параметры:
+
+        tmp_path: Директория журнала
+        async_session: Сессия для асинхронной работы с базой данных
+        apply_changes: Функция, записывающая изменения лайков в базу
+        tweet_id: Идентификатор твита без лайков
+        """
+        crashed = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await crashed.start()
+        await crashed.enqueue(user_id=2, tweet_id=tweet_id, liked=True)
+        await crashed.enqueue(user_id=3, tweet_id=tweet_id, liked=True)
+        os.write(crashed.segment.fd, f"1 4 {tweet_id} 1".encode())
+        (segment_name,) = os.listdir(tmp_path)
+
+        alive = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await alive.start()
+        assert alive.changes == {}
+        assert await get_likes(async_session, tweet_id) == ([], 0)
+        await alive.stop()
+
+        crashed.flush_task.cancel()
+        os.close(crashed.segment.fd)
+        recovered = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await recovered.start()
+        assert await get_likes(async_session, tweet_id) == ([2, 3], 2)
+        assert segment_name not in os.listdir(tmp_path)
+        await recovered.stop()
+
+        (tmp_path / segment_name).write_text(
+            f"1 2 {tweet_id} 1\n1 3 {tweet_id} 1\n0 2 {tweet_id} 2\n"
+        )
+        replayed = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await replayed.start()
+        assert await get_likes(async_session, tweet_id) == ([2, 3], 2)
+        await replayed.stop()
+        assert os.listdir(tmp_path) == []
+
+    @classmethod
+    async def test_keep_changes_after_failed_flush(
+        cls,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        apply_changes: Callable[[LikeChanges], Awaitable[None]],
+        tweet_id: int,
+    ) -> None:
+        """
+        Имитирует ошибку базы при сбросе.
+        Проверяет, что изменения и сегмент журнала сохраняются,
+        более новое изменение пары не перезаписывается старым,
+        а следующий сброс записывает все в базу.
+
+        Параметры:
+
+        tmp_path: Директория журнала
+        async_session: Сессия для асинхронной работы с базой данных
+        apply_changes: Функция, записывающая изменения лайков в базу
+        tweet_id: Идентификатор твита без лайков
+        """
+        failures = [ConnectionError("database is unavailable")]
+
+        async def apply(changes: LikeChanges) -> None:
+            if failures:
+                raise failures.pop()
+            await apply_changes(changes)
+
+        buffer = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply)
+        await buffer.start()
+        await buffer.enqueue(user_id=2, tweet_id=tweet_id, liked=True)
+        await buffer.enqueue(user_id=3, tweet_id=tweet_id, liked=True)
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        assert len(os.listdir(tmp_path)) == 2
+        assert await get_likes(async_session, tweet_id) == ([], 0)
+
+        await buffer.enqueue(user_id=3, tweet_id=tweet_id, liked=False)
+        assert await buffer.flush() == 2
+        assert await get_likes(async_session, tweet_id) == ([2], 1)
+        assert len(os.listdir(tmp_path)) == 1
+        await buffer.stop()
+        assert os.listdir(tmp_path) == []
+
+    @classmethod
+    async def test_apply_newest_change_across_workers(
+        cls,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        apply_changes: Callable[[LikeChanges], Awaitable[None]],
+        tweet_id: int,
+    ) -> None:
+        """
+        Ставит лайк в одном процессе и снимает его позже в другом,
+        который сбрасывает изменения первым.
+        Проверяет, что более старый лайк не восстанавливается ни сбросом первого процесса,
+        ни проигрыванием его журнала после падения.
+
+        Параметры:
+
+        tmp_path: Директория журнала
+        async_session: Сессия для асинхронной работы с базой данных
+        apply_changes: Функция, записывающая изменения лайков в базу
+        tweet_id: Идентификатор твита без лайков
+        """
+        first = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        second = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await first.start()
+        await second.start()
+        await first.enqueue(user_id=2, tweet_id=tweet_id, liked=True)
+        await first.enqueue(user_id=3, tweet_id=tweet_id, liked=True)
+        await second.enqueue(user_id=2, tweet_id=tweet_id, liked=False)
+        assert await second.flush() == 1
+        assert await first.flush() == 2
+        assert await get_likes(async_session, tweet_id) == ([3], 1)
+
+        (tmp_path / "crashed.journal").write_text(f"1 2 {tweet_id} 1\n")
+        await second.stop()
+        replayed = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await replayed.start()
+        assert await get_likes(async_session, tweet_id) == ([3], 1)
+        await replayed.stop()
+        await first.stop()
+        assert os.listdir(tmp_path) == []
+
+    @classmethod
+    async def test_close_segment_after_pending_fsync(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+        async_session: AsyncSession,
+        apply_changes: Callable[[LikeChanges], Awaitable[None]],
+        tweet_id: int,
+    ) -> None:
+        """
+        Замедляет fsync и записывает лайки во время сброса.
+        Проверяет, что сегмент не закрывается, пока выполняется его fsync,
+        и все лайки подтверждаются без ошибки.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        tmp_path: Директория журнала
+        async_session: Сессия для асинхронной работы с базой данных
+        apply_changes: Функция, записывающая изменения лайков в базу
+        tweet_id: Идентификатор твита без лайков
+        """
+        fsync = os.fsync
+
+        def slow_fsync(fd: int) -> None:
+            time.sleep(0.05)
+            fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        buffer = LikeBuffer(str(tmp_path), FLUSH_INTERVAL, apply_changes)
+        await buffer.start()
+        enqueued = [
+            asyncio.create_task(
+                buffer.enqueue(user_id=2, tweet_id=tweet_id, liked=True)
+            )
+        ]
+        await asyncio.sleep(0)
+        flushed = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0)
+        enqueued.append(
+            asyncio.create_task(
+                buffer.enqueue(user_id=3, tweet_id=tweet_id, liked=True)
+            )
+        )
+        await asyncio.gather(flushed, *enqueued)
+        await buffer.stop()
+        assert await get_likes(async_session, tweet_id) == ([2, 3], 2)
+        assert os.listdir(tmp_path) == []
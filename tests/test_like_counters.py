@@ -0,0 +1,110 @@
+"""
+Модуль с тестами шардированных счетчиков лайков.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+from typing import AsyncGenerator
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.hot_tweets import HotTweetDetector, hot_tweets
+from src.core.ranking import get_hot_score
+from src.models import LikeCounterShardModel, TweetModel
+from src.repositories.tweets import TweetRepository
+from src.services.ranking_service import RankingService
+from src.services.user_tweet_service import LikeService
+
+
+@pytest.fixture()
+async def tweet_id(async_session: AsyncSession) -> AsyncGenerator[int, None]:
+    """
+    Создает твит без лайков. После теста удаляет его вместе с лайками.
+
+    Возвращает идентификатор твита.
+    """
+    tweet_id = await TweetRepository.create_object(
+        session=async_session, data={"content": "viral", "user_id": 1}
+    )
+    yield tweet_id
+    await TweetRepository.delete_object_by_params(
+        session=async_session, data={"id": tweet_id}
+    )
+
+
+class TestLikeCounters:
+    """
+    Класс с тестами, нацеленными на шардированные счетчики лайков.
+    """
+
+    @classmethod
+    def test_promote_hot_tweet(cls) -> None:
+        """
+        Проверяет, что твит становится популярным после превышения частоты лайков,
+        остается популярным promotion_time секунд и не влияет на другие твиты.
+        """
+        now = [0.0]
+        detector = HotTweetDetector(
+            like_rate=1, window=2, promotion_time=5, clock=lambda: now[0]
+        )
+        assert not detector.record_like(1)
+        assert not detector.record_like(1)
+        assert detector.record_like(1)
+        assert not detector.record_like(2)
+
+        now[0] = 4
+        assert detector.record_like(1)
+        now[0] = 6
+        assert not detector.record_like(1)
+        assert detector.promoted == {}
+
+    @classmethod
+    async def test_sharded_like_count(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+        tweet_id: int,
+    ) -> None:
+        """
+        Ставит и снимает лайки популярному твиту.
+        Проверяет, что строка твита не меняется, изменения количества лайков копятся в шардах,
+        а перенос шардов обновляет количество лайков и горячесть твита и удаляет его шарды.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        tweet_id: Идентификатор твита без лайков
+        """
+        monkeypatch.setattr(hot_tweets, "like_rate", 0)
+        monkeypatch.setattr(hot_tweets, "promoted", {})
+        for user_id in (2, 3, 4):
+            await LikeService.like_tweet(
+                session=async_session, tweet_id=tweet_id, user_id=user_id
+            )
+        await LikeService.delete_like(
+            session=async_session, tweet_id=tweet_id, user_id=3
+        )
+        assert tweet_id in hot_tweets.promoted
+
+        like_count = await async_session.scalar(
+            select(TweetModel.like_count).filter(TweetModel.id == tweet_id)
+        )
+        assert like_count == 0
+        shards_query = select(
+            func.count(LikeCounterShardModel.id), func.sum(LikeCounterShardModel.delta)
+        ).filter(LikeCounterShardModel.tweet_id == tweet_id)
+        shards, delta = (await async_session.execute(shards_query)).one()
+        assert shards >= 1
+        assert delta == 2
+        assert await RankingService.sweep(session=async_session, batch_size=100) == 0
+
+        await RankingService.fold_like_counters(session=async_session, batch_size=1)
+        async_session.expire_all()
+        tweet = await async_session.scalar(
+            select(TweetModel).filter(TweetModel.id == tweet_id)
+        )
+        assert tweet.like_count == 2
+        assert abs(tweet.hot_score - get_hot_score(2, tweet.created_at)) < 1e-9
+        assert (await async_session.execute(shards_query)).one() == (0, None)
@@ -0,0 +1,251 @@
+"""
+Модуль с тестами кэша несуществующих идентификаторов.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+
+import pytest
+from fixtures.fixtures import FakeClock
+from httpx import AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.negative_cache import NEGATIVE_CACHE_REQUESTS, BloomFilter, NegativeCache
+from src.core.settings import settings
+from src.models import UserModel
+from src.repositories.tweets import TweetRepository
+from src.repositories.users import UserRepository
+from src.services.tweet_service import missing_tweets
+from src.services.user_service import missing_users
+
+
+def use_test_session(
+    monkeypatch: pytest.MonkeyPatch,
+    cache: NegativeCache,
+    repository: type[UserRepository] | type[TweetRepository],
+    session: AsyncSession,
+) -> None:
+    """
+    Подменяет загрузку кэша на чтение в сессии теста с фильтром Блума.
+    Состояние кэша восстанавливается после теста.
+
+    Параметры:
+
+    monkeypatch: Фикстура для временной подмены атрибутов
+    cache: Кэш несуществующих идентификаторов
+    repository: Репозиторий таблицы кэша
+    session: Сессия для асинхронной работы с базой данных
+    """
+
+    async def load_ids() -> AsyncIterator[list[int]]:
+        async for keys in repository.stream_ids(session=session, batch_size=100):
+            yield keys
+
+    monkeypatch.setattr(
+        cache, "load_watermark", lambda: repository.get_id_watermark(session=session)
+    )
+    monkeypatch.setattr(cache, "load_ids", load_ids)
+    monkeypatch.setattr(
+        cache, "count_ids", lambda: repository.count_number_objects(session=session)
+    )
+    for name, value in (
+        ("watermark", None),
+        ("candidates", []),
+        ("bloom", None),
+        ("entries", OrderedDict()),
+    ):
+        monkeypatch.setattr(cache, name, value)
+
+
+class TestNegativeCache:
+    """
+    Класс с тестами, нацеленными на кэш несуществующих идентификаторов.
+    """
+
+    @classmethod
+    def test_bloom_filter(cls) -> None:
+        """
+        Проверяет, что фильтр содержит все добавленные элементы,
+        а доля ложных срабатываний близка к заданной.
+        """
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for key in range(1000):
+            bloom.add(key)
+        assert all(key in bloom for key in range(1000))
+        false_positives = sum(key in bloom for key in range(1000, 11000))
+        assert false_positives < 300
+
+    @classmethod
+    async def test_missing_ids(cls) -> None:
+        """
+        Проверяет, что наибольший идентификатор становится границей только после завершения
+        транзакций, выполнявшихся при его чтении, кэш отвечает только за идентификаторы
+        не больше границы, отсутствующие в фильтре или недавно не найденные в базе,
+        а созданные во время перезагрузки идентификаторы попадают в новый фильтр.
+        """
+        clock = FakeClock()
+        cache: NegativeCache
+        watermarks = [(10, 5, 7), (12, 7, 9)]
+
+        async def load_watermark() -> tuple[int, int, int]:
+            return watermarks.pop(0)
+
+        async def load_ids() -> AsyncIterator[list[int]]:
+            yield [1, 2, 3]
+            yield [5, 10, 12]
+            cache.add_existing(4)
+
+        async def count_ids() -> int:
+            return 6
+
+        cache = NegativeCache(
+            name="test",
+            max_entries=2,
+            ttl=5,
+            reload_interval=60,
+            load_watermark=load_watermark,
+            load_ids=load_ids,
+            count_ids=count_ids,
+            clock=clock,
+        )
+        await cache.reload()
+        assert cache.watermark is None
+        assert not cache.is_missing(6)
+        await cache.reload()
+        assert (cache.watermark, cache.candidates) == (10, [(9, 12)])
+        assert cache.is_missing(6)
+        assert not any(cache.is_missing(key) for key in (1, 4, 10, 11))
+
+        cache.add_missing(5)
+        cache.add_missing(11)
+        assert cache.is_missing(5)
+        assert not cache.is_missing(11)
+        clock.now = 5
+        assert not cache.is_missing(5)
+
+        cache.add_missing(1)
+        cache.add_missing(2)
+        cache.add_missing(3)
+        cache.add_existing(2)
+        assert [cache.is_missing(key) for key in (1, 2, 3)] == [False, False, True]
+
+    @classmethod
+    async def test_short_circuit_requests(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+        ac: AsyncClient,
+    ) -> None:
+        """
+        Создает и удаляет пользователя и твит, загружает кэш с фильтром Блума.
+        Проверяет, что профиль удаленного пользователя, лайки и удаление удаленного твита
+        отвечают так же, как без кэша, но без запроса к базе, а новые id проверяются в базе.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        headers = {"api-key": "test"}
+        # Удаляются не последние созданные id, иначе они больше наибольшего
+        user_id, last_user_id = [
+            await UserRepository.create_object(
+                session=async_session, data={"name": name, "token": name}
+            )
+            for name in ("missing", "last")
+        ]
+        await UserRepository.delete_object_by_params(
+            session=async_session, data={"id": user_id}
+        )
+        tweet_id, last_tweet_id = [
+            (
+                await ac.post("/api/tweets", json={"tweet_data": text}, headers=headers)
+            ).json()["tweet_id"]
+            for text in ("missing tweet", "last tweet")
+        ]
+        await ac.delete(f"/api/tweets/{tweet_id}", headers=headers)
+        expected = [
+            (await ac.get(f"/api/users/{user_id}")).json(),
+            (await ac.post(f"/api/tweets/{tweet_id}/likes", headers=headers)).json(),
+            (await ac.delete(f"/api/tweets/{tweet_id}/likes", headers=headers)).json(),
+            (await ac.delete(f"/api/tweets/{tweet_id}", headers=headers)).json(),
+        ]
+
+        monkeypatch.setattr(settings.db, "negative_cache_enabled", True)
+        use_test_session(monkeypatch, missing_users, UserRepository, async_session)
+        use_test_session(monkeypatch, missing_tweets, TweetRepository, async_session)
+        await missing_users.reload()
+        await missing_tweets.reload()
+        bloom = {
+            name: NEGATIVE_CACHE_REQUESTS.get(name=name, result="bloom")
+            for name in ("user", "tweet")
+        }
+        responses = [
+            await ac.get(f"/api/users/{user_id}"),
+            await ac.post(f"/api/tweets/{tweet_id}/likes", headers=headers),
+            await ac.delete(f"/api/tweets/{tweet_id}/likes", headers=headers),
+            await ac.delete(f"/api/tweets/{tweet_id}", headers=headers),
+        ]
+        assert [response.status_code for response in responses] == [404] * 4
+        assert [response.json() for response in responses] == expected
+        assert (
+            NEGATIVE_CACHE_REQUESTS.get(name="user", result="bloom")
+            == bloom["user"] + 1
+        )
+        assert (
+            NEGATIVE_CACHE_REQUESTS.get(name="tweet", result="bloom")
+            == bloom["tweet"] + 3
+        )
+
+        unknown = NEGATIVE_CACHE_REQUESTS.get(name="user", result="unknown")
+        response = await ac.get(f"/api/users/{missing_users.watermark + 1}")
+        assert response.status_code == 404
+        assert NEGATIVE_CACHE_REQUESTS.get(name="user", result="unknown") == unknown + 1
+        assert (await ac.get("/api/users/1")).status_code == 200
+
+        await ac.delete(f"/api/tweets/{last_tweet_id}", headers=headers)
+        await UserRepository.delete_object_by_params(
+            session=async_session, data={"id": last_user_id}
+        )
+
+    @classmethod
+    async def test_watermark_waits_for_open_transactions(
+        cls, monkeypatch: pytest.MonkeyPatch, async_session: AsyncSession
+    ) -> None:
+        """
+        Создает пользователя в незакоммиченной транзакции, а затем пользователя
+        с большим id в закоммиченной. Проверяет, что пока первая транзакция выполняется,
+        граница не доходит до ее id, а после коммита кэш не считает его несуществующим.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        use_test_session(monkeypatch, missing_users, UserRepository, async_session)
+        async with AsyncSession(bind=async_session.bind) as open_session:
+            user_id = await UserRepository.create_object(
+                session=open_session,
+                data={"name": "slow", "token": "slow"},
+                commit_need=False,
+            )
+            last_user_id = await UserRepository.create_object(
+                session=async_session, data={"name": "fast", "token": "fast"}
+            )
+            await missing_users.reload()
+            await async_session.commit()
+            assert missing_users.watermark is None
+            assert not missing_users.is_missing(user_id)
+            await open_session.commit()
+
+        await missing_users.reload()
+        await async_session.commit()
+        assert missing_users.watermark == last_user_id
+        assert not missing_users.is_missing(user_id)
+        await async_session.execute(
+            delete(UserModel).filter(UserModel.id.in_([user_id, last_user_id]))
+        )
+        await async_session.commit()
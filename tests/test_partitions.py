@@ -0,0 +1,106 @@
+"""
+Модуль с тестами создания секций таблицы твитов.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db_helper import db_helper
+from src.core.settings import settings
+from src.jobs.partitions import create_partitions
+
+MONTHS_AHEAD = 5  # Секции создаются миграцией на 3 месяца вперед, тест создает еще две
+MONTH_NAMES = """
+SELECT 'tweets_' || to_char(
+    date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => month),
+    '"y"YYYY"m"MM'
+)
+FROM generate_series(4, :months_ahead) AS month
+"""  # Названия секций, которые создает тест
+
+
+class TestPartitions:
+    """
+    Класс с тестами, нацеленными на секции таблицы твитов.
+    """
+
+    @classmethod
+    async def test_split_default_partition(
+        cls, monkeypatch: pytest.MonkeyPatch, async_session: AsyncSession
+    ) -> None:
+        """
+        Добавляет твит с лайком в месяц без своей секции, поэтому твит попадает в секцию
+        по умолчанию. Запускает задание создания секций дважды одновременно.
+        Проверяет, что секции созданы один раз, а твит с лайком перенесен в секцию месяца.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        names = (
+            (
+                await async_session.execute(
+                    text(MONTH_NAMES), {"months_ahead": MONTHS_AHEAD}
+                )
+            )
+            .scalars()
+            .all()
+        )
+        tweet_id = (
+            await async_session.execute(
+                text(
+                    """
+                    INSERT INTO tweets (content, user_id, created_at)
+                    VALUES (
+                        'future tweet', 1,
+                        (
+                            date_trunc('month', now() AT TIME ZONE 'UTC')
+                            + make_interval(months => :months, days => 1)
+                        ) AT TIME ZONE 'UTC'
+                    )
+                    RETURNING id
+                    """
+                ),
+                {"months": MONTHS_AHEAD},
+            )
+        ).scalar_one()
+        await async_session.execute(
+            text("INSERT INTO likes (user_id, tweet_id) VALUES (1, :tweet_id)"),
+            {"tweet_id": tweet_id},
+        )
+        await async_session.commit()
+        monkeypatch.setattr(settings.db, "tweets_partitions_ahead", MONTHS_AHEAD)
+        partition_query = text(
+            "SELECT tableoid::regclass::text FROM tweets WHERE id = :id"
+        )
+        partition = await async_session.scalar(partition_query, {"id": tweet_id})
+        assert partition == "tweets_default"
+        # Чтение держит блокировку секции по умолчанию до конца транзакции
+        await async_session.commit()
+
+        try:
+            created = await asyncio.gather(create_partitions(), create_partitions())
+            assert sorted(created) == [0, len(names)]
+            assert await create_partitions() == 0
+        finally:
+            # Соединения пула задания привязаны к циклу событий теста
+            await db_helper.engine.dispose()
+
+        partition = await async_session.scalar(partition_query, {"id": tweet_id})
+        assert partition == names[-1]
+        likes = await async_session.scalar(
+            text("SELECT count(*) FROM likes WHERE tweet_id = :id"), {"id": tweet_id}
+        )
+        assert likes == 1
+
+        await async_session.execute(
+            text("DELETE FROM tweets WHERE id = :id"), {"id": tweet_id}
+        )
+        for name in names:
+            await async_session.execute(text(f"DROP TABLE {name}"))
+        await async_session.commit()
@@ -0,0 +1,95 @@
+"""
+Модуль с тестами работы через PgBouncer в режиме пула транзакций.
+Тесты выполняются, только если задана переменная окружения PGBOUNCER_HOST.
+"""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from src.core.db_helper import DBHelper
+from src.core.settings import settings
+from src.repositories.tweets import TweetRepository
+from src.repositories.users import UserRepository
+
+PGBOUNCER_HOST = os.getenv("PGBOUNCER_HOST")
+PGBOUNCER_PORT = int(os.getenv("PGBOUNCER_PORT", "6432"))
+
+pytestmark = pytest.mark.skipif(
+    PGBOUNCER_HOST is None, reason="PgBouncer is not configured"
+)
+
+
+@pytest.fixture()
+async def db_helper() -> DBHelper:
+    """
+    Возвращает помощника для работы с базой данных через PgBouncer.
+    """
+    url = (
+        make_url(settings.db.database_url)
+        .set(host=PGBOUNCER_HOST, port=PGBOUNCER_PORT)
+        .render_as_string(hide_password=False)
+    )
+    helper = DBHelper(url=url, pgbouncer_transaction_mode=True, name="pgbouncer")
+    yield helper
+    await helper.engine.dispose()
+
+
+class TestPgBouncer:
+    """
+    Класс с тестами, нацеленными на выполнение запросов через PgBouncer.
+    """
+
+    @classmethod
+    async def read_feed_and_profile(cls, db_helper: DBHelper, times: int) -> None:
+        """
+        Несколько раз читает ленту и профиль в отдельных транзакциях.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        times: Количество повторов
+        """
+        for _ in range(times):
+            async with db_helper.session_factory() as session:
+                await TweetRepository.get_user_tweets(
+                    session=session, offset=1, limit=10
+                )
+                await UserRepository.get_user_with_counts(session=session, user_id=1)
+
+    @classmethod
+    async def test_concurrent_reads(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что параллельные клиенты, делящие соединения с базой,
+        не конфликтуют из-за имен подготовленных запросов.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        await asyncio.gather(
+            *(cls.read_feed_and_profile(db_helper, times=10) for _ in range(10))
+        )
+
+    @classmethod
+    async def test_write_and_read_in_transaction(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что запись и чтение внутри одной транзакции выполняются через PgBouncer.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        async with db_helper.session_factory() as session:
+            user_id = await UserRepository.create_object(
+                session=session,
+                data={"name": "pgbouncer", "token": "pgbouncer"},
+                commit_need=False,
+            )
+            user = await UserRepository.get_object_by_params(
+                session=session, data={"id": user_id}
+            )
+            assert user.name == "pgbouncer"
+            await session.rollback()
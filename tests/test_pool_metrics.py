@@ -0,0 +1,91 @@
+"""
+Модуль с тестами метрик пула соединений.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError
+
+from src.core.db_helper import DBHelper
+from src.core.pool import POOL_CHECKED_OUT, POOL_CHECKOUT_WAIT, POOL_TIMEOUTS
+from src.core.settings import settings
+
+NAME = "pool-metrics"  # Название помощника теста в метках метрик
+POOL = f"{NAME}-primary"  # Название пула помощника теста в метках метрик
+
+
+@pytest.fixture()
+async def db_helper() -> DBHelper:
+    """
+    Возвращает помощника для работы с базой данных с пулом из одного соединения.
+    """
+    helper = DBHelper(
+        url=settings.db.database_url,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+        name=NAME,
+    )
+    yield helper
+    await helper.engine.dispose()
+
+
+class TestPoolMetrics:
+    """
+    Класс с тестами, нацеленными на метрики пула соединений.
+    """
+
+    @classmethod
+    async def test_pool_settings_applied(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что параметры пула передаются в двигатель.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        assert db_helper.engine.pool.size() == 1
+        assert db_helper.engine.pool.timeout() == 0.2
+
+    @classmethod
+    async def test_checkout_wait_and_timeouts(cls, db_helper: DBHelper) -> None:
+        """
+        Занимает единственное соединение и проверяет,
+        что второе ожидание соединения завершается тайм - аутом и попадает в метрики.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        observations = POOL_CHECKOUT_WAIT.get_count(pool=POOL)
+        timeouts = POOL_TIMEOUTS.get(pool=POOL)
+        async with db_helper.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            assert POOL_CHECKED_OUT.get(pool=POOL) == 1
+            with pytest.raises(TimeoutError):
+                async with db_helper.engine.connect():
+                    pass
+        assert POOL_CHECKED_OUT.get(pool=POOL) == 0
+        assert POOL_TIMEOUTS.get(pool=POOL) == timeouts + 1
+        assert POOL_CHECKOUT_WAIT.get_count(pool=POOL) == observations + 2
+
+    @classmethod
+    async def test_metrics_endpoint(cls, ac: AsyncClient, db_helper: DBHelper) -> None:
+        """
+        Делает запрос на получение метрик.
+        Проверяет, что метрики пула отдаются в формате Prometheus.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        db_helper: Помощник для работы с базой данных
+        """
+        async with db_helper.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        response = await ac.get("/api/metrics")
+        assert response.status_code == 200
+        assert "# TYPE db_pool_checkout_wait_seconds histogram" in response.text
+        assert f'db_pool_checked_out{{pool="{POOL}"}} 0' in response.text
+        assert f'db_pool_timeouts_total{{pool="{POOL}"}}' in response.text
+        assert 'db_pool_size{pool="primary"}' in response.text
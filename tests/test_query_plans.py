@@ -0,0 +1,626 @@
+"""
+Модуль с тестами планов запросов репозиториев.
+
+Внутри транзакции, которая в конце откатывается, база заполняется реалистичным набором данных.
+Затем вызываются методы репозиториев, а каждый выполненный ими запрос проверяется через
+EXPLAIN (FORMAT JSON). Тест падает, если планировщик выбирает последовательное сканирование таблицы
+или стоимость запроса выросла по сравнению с сохраненной в fixtures/query_plans.json.
+
+Чтобы перезаписать сохраненные стоимости, запустите тесты с переменной окружения UPDATE_QUERY_PLANS=1.
+"""
+
+import json
+import os
+from collections.abc import Awaitable, Callable
+from typing import Any, AsyncGenerator
+
+import pytest
+from sqlalchemy import NullPool, event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+
+from src.core.ranking import FeedSort
+from src.core.settings import settings
+from src.repositories.follow_suggestions import FollowSuggestionRepository
+from src.repositories.medias import MediaRepository
+from src.repositories.tweets import TweetRepository
+from src.repositories.user_tweet_repository import LikeRepository
+from src.repositories.users import UserFollowerRepository, UserRepository
+
+BASELINE_PATH = "fixtures/query_plans.json"
+COST_TOLERANCE = 1.5  # Во сколько раз может вырасти стоимость запроса
+COST_SLACK = 20  # Абсолютный запас стоимости для дешевых запросов
+
+USERS_COUNT = 20_000
+TWEETS_PER_USER = 2
+LIKES_PER_TWEET = 5
+FOLLOWING_PER_USER = 10
+FIRST_ID = 1_000_000  # Не пересекается с идентификаторами других тестов
+FOLLOW_PAGE_SIZE = 5  # Размер страницы подписчиков и подписок
+SUGGESTIONS_PER_USER = 5
+BULK_FOLLOW_SIZE = 50  # Количество пользователей в пачке подписок
+
+SEED_STATEMENTS = [
+    f"""
+    INSERT INTO users (id, name, token)
+    SELECT id, 'user' || id, 'token' || id
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS id
+    """,
+    f"""
+    INSERT INTO followers (id, user_id, follower_id)
+    SELECT
+        {FIRST_ID} + (u - {FIRST_ID}) * {FOLLOWING_PER_USER} + n,
+        {FIRST_ID} + (u - {FIRST_ID} + n * 37 + 1) % {USERS_COUNT},
+        u
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS u,
+        generate_series(0, {FOLLOWING_PER_USER - 1}) AS n
+    """,
+    f"""
+    INSERT INTO tweets (id, content, user_id, created_at)
+    SELECT
+        {FIRST_ID} + (u - {FIRST_ID}) * {TWEETS_PER_USER} + n,
+        'tweet ' || n || ' of user ' || u,
+        u,
+        date_trunc('month', now()) + (u - {FIRST_ID}) * interval '1 minute'
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS u,
+        generate_series(0, {TWEETS_PER_USER - 1}) AS n
+    """,
+    f"""
+    INSERT INTO likes (id, user_id, tweet_id)
+    SELECT
+        {FIRST_ID} + (t.id - {FIRST_ID}) * {LIKES_PER_TWEET} + n,
+        {FIRST_ID} + (t.id + n * 101) % {USERS_COUNT},
+        t.id
+    FROM tweets AS t, generate_series(0, {LIKES_PER_TWEET - 1}) AS n
+    WHERE t.id >= {FIRST_ID} AND (t.id + n) % 3 <> 0
+    """,
+    f"""
+    UPDATE tweets SET
+        like_count = counts.like_count,
+        hot_score = log(greatest(counts.like_count, 1)::double precision)
+            + (tweets.id - {FIRST_ID}) / 1000.0
+    FROM (
+        SELECT tweet_id, count(*) AS like_count FROM likes
+        WHERE tweet_id >= {FIRST_ID} GROUP BY tweet_id
+    ) AS counts
+    WHERE tweets.id = counts.tweet_id
+    """,
+    f"""
+    INSERT INTO medias (id, attachment)
+    SELECT id, 'upload_files/' || id || '.png'
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS id
+    """,
+    f"""
+    INSERT INTO tweet_media_association (id, tweet_id, media_id)
+    SELECT id, {FIRST_ID} + (id - {FIRST_ID}) * {TWEETS_PER_USER}, id
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS id
+    """,
+    f"""
+    INSERT INTO follow_suggestions (id, user_id, suggested_id, score)
+    SELECT
+        {FIRST_ID} + (u - {FIRST_ID}) * {SUGGESTIONS_PER_USER} + n,
+        u,
+        {FIRST_ID} + (u - {FIRST_ID} + n * 53 + 7) % {USERS_COUNT},
+        {SUGGESTIONS_PER_USER} - n
+    FROM generate_series({FIRST_ID}, {FIRST_ID + USERS_COUNT - 1}) AS u,
+        generate_series(0, {SUGGESTIONS_PER_USER - 1}) AS n
+    """,
+    # Выборка ANALYZE по умолчанию меньше набора данных, и от случайной выборки зависят
+    # оценки планировщика. С большей выборкой статистика собирается по всем строкам
+    "SET LOCAL default_statistics_target = 1000",
+    "ANALYZE users, followers, tweets, likes, medias, tweet_media_association,"
+    " follow_suggestions",
+]
+
+USER_ID = FIRST_ID + 42
+TWEET_ID = FIRST_ID + 42 * TWEETS_PER_USER
+LIKED_BY_ID = FIRST_ID + next(
+    (TWEET_ID + n * 101) % USERS_COUNT
+    for n in range(LIKES_PER_TWEET)
+    if (TWEET_ID + n) % 3
+)  # Пользователь, лайкнувший твит TWEET_ID
+
+RepositoryCall = Callable[[AsyncSession], Awaitable[Any]]
+
+REPOSITORY_CALLS: list[tuple[str, RepositoryCall, set[str]]] = [
+    *[
+        (
+            f"TweetRepository.get_user_tweets.{sort.value}",
+            lambda session, sort=sort: TweetRepository.get_user_tweets(
+                session=session, offset=3, limit=10, sort=sort
+            ),
+            set(),
+        )
+        for sort in FeedSort
+    ],
+    *[
+        (
+            f"TweetRepository.get_user_tweet_ids.{sort.value}",
+            lambda session, sort=sort: TweetRepository.get_user_tweet_ids(
+                session=session, offset=3, limit=10, sort=sort
+            ),
+            set(),
+        )
+        for sort in FeedSort
+    ],
+    (
+        "TweetRepository.get_tweets_by_ids",
+        lambda session: TweetRepository.get_tweets_by_ids(
+            session=session,
+            tweet_ids=list(range(TWEET_ID, TWEET_ID + FOLLOW_PAGE_SIZE)),
+        ),
+        set(),
+    ),
+    (
+        "UserRepository.get_user_with_counts",
+        lambda session: UserRepository.get_user_with_counts(
+            session=session, user_id=USER_ID
+        ),
+        set(),
+    ),
+    (
+        "UserRepository.get_object_by_params",
+        lambda session: UserRepository.get_object_by_params(
+            session=session, data={"token": f"token{USER_ID}"}
+        ),
+        set(),
+    ),
+    (
+        "UserFollowerRepository.get_followers_user",
+        lambda session: UserFollowerRepository.get_followers_user(
+            session=session,
+            user_id=USER_ID,
+            after_id=FIRST_ID,
+            limit=FOLLOW_PAGE_SIZE,
+        ),
+        set(),
+    ),
+    (
+        "UserFollowerRepository.get_following_user",
+        lambda session: UserFollowerRepository.get_following_user(
+            session=session,
+            user_id=USER_ID,
+            after_id=FIRST_ID,
+            limit=FOLLOW_PAGE_SIZE,
+        ),
+        set(),
+    ),
+    (
+        "UserRepository.get_names",
+        lambda session: UserRepository.get_names(
+            session=session, user_ids=list(range(USER_ID, USER_ID + FOLLOW_PAGE_SIZE))
+        ),
+        set(),
+    ),
+    (
+        "FollowSuggestionRepository.get_suggestions",
+        lambda session: FollowSuggestionRepository.get_suggestions(
+            session=session, user_id=USER_ID, limit=SUGGESTIONS_PER_USER
+        ),
+        set(),
+    ),
+    (
+        "UserFollowerRepository.get_relationships",
+        lambda session: UserFollowerRepository.get_relationships(
+            session=session,
+            user_id=USER_ID,
+            other_ids=list(range(FIRST_ID, FIRST_ID + 300)),
+        ),
+        set(),
+    ),
+    (
+        "UserFollowerRepository.create_many",
+        lambda session: UserFollowerRepository.create_many(
+            session=session,
+            follower_id=USER_ID,
+            user_ids=list(range(FIRST_ID, FIRST_ID + BULK_FOLLOW_SIZE)),
+        ),
+        set(),
+    ),
+    (
+        "UserRepository.add_following",
+        lambda session: UserRepository.add_following(
+            session=session,
+            follower_id=USER_ID,
+            user_ids=list(range(FIRST_ID, FIRST_ID + BULK_FOLLOW_SIZE)),
+        ),
+        set(),
+    ),
+    (
+        "UserRepository.change_follow_counts",
+        lambda session: UserRepository.change_follow_counts(
+            session=session, user_id=USER_ID, follower_id=USER_ID + 1, delta=1
+        ),
+        set(),
+    ),
+    (
+        "UserFollowerRepository.check_exists_object_by_params",
+        lambda session: UserFollowerRepository.check_exists_object_by_params(
+            session=session, data={"user_id": USER_ID, "follower_id": USER_ID + 1}
+        ),
+        set(),
+    ),
+    (
+        "TweetRepository.check_exists_object_by_params",
+        lambda session: TweetRepository.check_exists_object_by_params(
+            session=session, data={"id": TWEET_ID, "user_id": USER_ID}
+        ),
+        set(),
+    ),
+    (
+        "LikeRepository.create_object",
+        lambda session: LikeRepository.create_object(
+            session=session,
+            data={"user_id": FIRST_ID, "tweet_id": FIRST_ID + 1},
+            commit_need=False,
+        ),
+        set(),
+    ),
+    (
+        "LikeRepository.delete_object_by_params",
+        lambda session: LikeRepository.delete_object_by_params(
+            session=session,
+            data={"user_id": LIKED_BY_ID, "tweet_id": TWEET_ID},
+            commit_need=False,
+        ),
+        set(),
+    ),
+    (
+        "MediaRepository.delete_media_and_return_attachments",
+        lambda session: MediaRepository.delete_media_and_return_attachments(
+            session=session, tweet_id=TWEET_ID
+        ),
+        set(),
+    ),
+    (
+        "TweetRepository.delete_object_by_params",
+        lambda session: TweetRepository.delete_object_by_params(
+            session=session,
+            data={"id": TWEET_ID, "user_id": USER_ID},
+            commit_need=False,
+        ),
+        set(),
+    ),
+]  # Название вызова, вызов метода репозитория и таблицы, которые допустимо сканировать целиком
+
+CASCADE_STATEMENTS = [
+    (
+        "cascade.likes_by_tweet",
+        f"SELECT id FROM likes WHERE tweet_id = {TWEET_ID}",
+    ),
+    (
+        "cascade.tweet_media_association_by_tweet",
+        f"SELECT id FROM tweet_media_association WHERE tweet_id = {TWEET_ID}",
+    ),
+    (
+        "cascade.tweets_by_user",
+        f"SELECT id FROM tweets WHERE user_id = {USER_ID}",
+    ),
+    (
+        "cascade.followers_by_follower",
+        f"SELECT id FROM followers WHERE follower_id = {USER_ID}",
+    ),
+    (
+        "cascade.follow_suggestions_by_user",
+        f"SELECT id FROM follow_suggestions WHERE user_id = {USER_ID}",
+    ),
+    (
+        "cascade.follow_suggestions_by_suggested",
+        f"SELECT id FROM follow_suggestions WHERE suggested_id = {USER_ID}",
+    ),
+]  # Поиски строк, которые выполняет база при каскадном удалении твитов и пользователей
+
+
+def load_baseline() -> dict[str, float]:
+    """
+    Загружает сохраненные стоимости запросов.
+
+    Возвращает словарь с названиями запросов и их стоимостью.
+    """
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, mode="r") as file:
+        return json.load(file)
+
+
+def find_relations(plan: dict, node_type: str | None = None) -> set[str]:
+    """
+    Ищет таблицы, которые читаются в плане запроса.
+
+    Параметры:
+
+    plan: Узел плана в формате JSON
+    node_type: Тип узлов плана, например Seq Scan. Если не передан, учитываются все узлы
+
+    Возвращает названия таблиц.
+    """
+    tables = set()
+    if "Relation Name" in plan and node_type in (None, plan["Node Type"]):
+        tables.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables |= find_relations(child, node_type)
+    return tables
+
+
+def find_sorts(plan: dict, partitions: dict[str, str | None]) -> list[dict]:
+    """
+    Ищет сортировки в плане запроса.
+
+    Параметры:
+
+    plan: Узел плана в формате JSON
+    partitions: Словарь с названиями секций и их родительских таблиц.
+    Для пустых секций вместо родительской таблицы хранится None
+
+    Возвращает узлы сортировки. Сортировка пустой секции не учитывается.
+    """
+    if plan["Node Type"] == "Sort":
+        relations = find_relations(plan)
+        if not relations or any(partitions.get(name, name) for name in relations):
+            return [plan]
+    return [
+        sort
+        for child in plan.get("Plans", [])
+        for sort in find_sorts(child, partitions)
+    ]
+
+
+def find_seq_scans(plan: dict, partitions: dict[str, str | None]) -> set[str]:
+    """
+    Ищет последовательные сканирования в плане запроса.
+
+    Параметры:
+
+    plan: Узел плана в формате JSON
+    partitions: Словарь с названиями секций и их родительских таблиц.
+    Для пустых секций вместо родительской таблицы хранится None
+
+    Возвращает названия таблиц, которые сканируются целиком.
+    Сканирование секции считается сканированием родительской таблицы,
+    сканирование пустой секции не учитывается.
+    """
+    tables = {
+        partitions.get(relation, relation)
+        for relation in find_relations(plan, node_type="Seq Scan")
+    }
+    return tables - {None}
+
+
+async def get_partitions(connection: AsyncConnection) -> dict[str, str | None]:
+    """
+    Получает секции всех секционированных таблиц.
+
+    Параметры:
+
+    connection: Соединение с базой данных
+
+    Возвращает словарь с названиями секций и их родительских таблиц.
+    Для пустых секций вместо родительской таблицы возвращается None.
+    """
+    result = await connection.execute(
+        text(
+            """
+            SELECT
+                child.relname,
+                CASE WHEN child.reltuples > 0 THEN parent.relname END
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+            """
+        )
+    )
+    return dict(result.tuples().all())
+
+
+@pytest.fixture()
+async def seeded_connection() -> AsyncGenerator[AsyncConnection, None]:
+    """
+    Открывает транзакцию, заполняет базу набором данных и откатывает транзакцию после теста.
+    """
+    engine = create_async_engine(settings.db.database_url, poolclass=NullPool)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        for statement in SEED_STATEMENTS:
+            await connection.execute(text(statement))
+        yield connection
+        await transaction.rollback()
+    await engine.dispose()
+
+
+async def capture_statements(
+    connection: AsyncConnection, call: RepositoryCall
+) -> list[tuple[str, Any]]:
+    """
+    Вызывает метод репозитория и запоминает все выполненные им запросы.
+
+    Параметры:
+
+    connection: Соединение с базой данных
+    call: Вызов метода репозитория
+
+    Возвращает список из текстов запросов и их параметров.
+    """
+    statements = []
+
+    def before_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, *args: Any
+    ) -> None:
+        statements.append((statement, parameters))
+
+    event.listen(connection.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with AsyncSession(
+            bind=connection, join_transaction_mode="create_savepoint"
+        ) as session:
+            await call(session)
+    finally:
+        event.remove(
+            connection.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+    return [
+        (statement, parameters)
+        for statement, parameters in statements
+        if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK"))
+    ]
+
+
+async def explain(
+    connection: AsyncConnection, statement: str, parameters: Any = ()
+) -> dict:
+    """
+    Получает план запроса.
+
+    Параметры:
+
+    connection: Соединение с базой данных
+    statement: Текст запроса
+    parameters: Параметры запроса
+
+    Возвращает корневой узел плана.
+    """
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    )
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+FOLLOW_PAGES = {
+    "followers": UserFollowerRepository.get_followers_user,
+    "following": UserFollowerRepository.get_following_user,
+}  # Методы, отдающие страницы подписчиков и подписок
+
+FEED_STATEMENT_PREFIX = "SELECT tweets.id, tweets.created_at"  # Основной запрос ленты
+
+TIME_BOUNDED_STATEMENT = """
+SELECT id FROM tweets
+WHERE created_at >= date_trunc('month', now()) + interval '1 day'
+    AND created_at < date_trunc('month', now()) + interval '2 days'
+"""  # Запрос твитов за один день текущего месяца
+
+
+class TestQueryPlans:
+    """
+    Класс с тестами, нацеленными на планы запросов репозиториев.
+    """
+
+    @classmethod
+    async def test_query_plans(cls, seeded_connection: AsyncConnection) -> None:
+        """
+        Проверяет, что запросы репозиториев и каскадных удалений используют индексы
+        и их стоимость не выросла.
+
+        Параметры:
+
+        seeded_connection: Соединение с базой, заполненной набором данных
+        """
+        plans: dict[str, tuple[dict, set[str]]] = {}
+        for name, call, allowed_seq_scans in REPOSITORY_CALLS:
+            statements = await capture_statements(seeded_connection, call)
+            assert statements, f"{name} did not execute any statement"
+            for number, (statement, parameters) in enumerate(
+                sorted(statements, key=lambda item: item[0])
+            ):  # Порядок догрузки связей через selectinload не постоянен, поэтому запросы сортируются
+                plans[f"{name}[{number}]"] = (
+                    await explain(seeded_connection, statement, parameters),
+                    allowed_seq_scans,
+                )
+        for name, statement in CASCADE_STATEMENTS:
+            plans[name] = (await explain(seeded_connection, statement), set())
+
+        costs = {name: plan["Total Cost"] for name, (plan, _) in plans.items()}
+        if os.getenv("UPDATE_QUERY_PLANS"):
+            with open(BASELINE_PATH, mode="w") as file:
+                json.dump(costs, file, indent=4, sort_keys=True)
+                file.write("\n")
+
+        baseline = load_baseline()
+        partitions = await get_partitions(seeded_connection)
+        errors = []
+        for name, (plan, allowed_seq_scans) in plans.items():
+            seq_scans = find_seq_scans(plan, partitions) - allowed_seq_scans
+            if seq_scans:
+                errors.append(f"{name}: sequential scan on {sorted(seq_scans)}")
+            if name in baseline and costs[name] > (
+                baseline[name] * COST_TOLERANCE + COST_SLACK
+            ):
+                errors.append(
+                    f"{name}: cost {costs[name]} exceeds baseline {baseline[name]}"
+                )
+        assert not errors, "\n".join(errors)
+
+    @classmethod
+    async def test_partition_pruning(cls, seeded_connection: AsyncConnection) -> None:
+        """
+        Проверяет, что запрос твитов за ограниченный промежуток времени
+        читает только секцию нужного месяца.
+
+        Параметры:
+
+        seeded_connection: Соединение с базой, заполненной набором данных
+        """
+        plan = await explain(seeded_connection, TIME_BOUNDED_STATEMENT)
+        partitions = await get_partitions(seeded_connection)
+        scanned = find_relations(plan)
+        assert len(scanned) == 1
+        assert scanned.pop() in partitions
+
+    @classmethod
+    @pytest.mark.parametrize("sort", list(FeedSort))
+    async def test_feed_served_by_index(
+        cls, seeded_connection: AsyncConnection, sort: FeedSort
+    ) -> None:
+        """
+        Проверяет, что каждая сортировка ленты читает твиты из индекса,
+        а не сортирует всю таблицу.
+
+        Параметры:
+
+        seeded_connection: Соединение с базой, заполненной набором данных
+        sort: Порядок твитов в ленте
+        """
+        statements = await capture_statements(
+            seeded_connection,
+            lambda session: TweetRepository.get_user_tweets(
+                session=session, offset=3, limit=10, sort=sort
+            ),
+        )
+        statement, parameters = next(
+            (statement, parameters)
+            for statement, parameters in statements
+            if statement.startswith(FEED_STATEMENT_PREFIX)
+        )
+        plan = await explain(seeded_connection, statement, parameters)
+        partitions = await get_partitions(seeded_connection)
+        assert not find_sorts(plan, partitions)
+        assert not find_seq_scans(plan, partitions)
+
+    @classmethod
+    @pytest.mark.parametrize("page", list(FOLLOW_PAGES))
+    async def test_follow_page_served_by_index(
+        cls, seeded_connection: AsyncConnection, page: str
+    ) -> None:
+        """
+        Проверяет, что страницы подписчиков и подписок читаются из индекса по порядку,
+        а не сортируются.
+
+        Параметры:
+
+        seeded_connection: Соединение с базой, заполненной набором данных
+        page: Название страницы
+        """
+        get_page = FOLLOW_PAGES[page]
+        ((statement, parameters),) = await capture_statements(
+            seeded_connection,
+            lambda session: get_page(
+                session=session,
+                user_id=USER_ID,
+                after_id=FIRST_ID,
+                limit=FOLLOW_PAGE_SIZE,
+            ),
+        )
+        plan = await explain(seeded_connection, statement, parameters)
+        partitions = await get_partitions(seeded_connection)
+        assert not find_sorts(plan, partitions)
+        assert not find_seq_scans(plan, partitions)
@@ -0,0 +1,103 @@
+"""
+Модуль с тестами статистики запросов к базе данных.
+"""
+
+import logging
+
+import pytest
+
+from src.core.db_helper import DBHelper
+from src.core.query_stats import QueryStats, current_query_stats, get_statement_shape
+from src.core.settings import settings
+from src.repositories.tweets import TweetRepository
+from src.repositories.users import UserRepository
+
+
+@pytest.fixture()
+async def query_stats() -> QueryStats:
+    """
+    Собирает статистику запросов, выполненных внутри теста.
+    """
+    stats = QueryStats(request_name="GET /test")
+    token = current_query_stats.set(stats)
+    yield stats
+    current_query_stats.reset(token)
+
+
+@pytest.fixture()
+async def db_helper() -> DBHelper:
+    """
+    Возвращает помощника для работы с базой данных, собирающего статистику запросов.
+    """
+    helper = DBHelper(url=settings.db.database_url, name="query-stats")
+    yield helper
+    await helper.engine.dispose()
+
+
+class TestQueryStats:
+    """
+    Класс с тестами, нацеленными на сбор статистики запросов к базе данных.
+    """
+
+    @classmethod
+    def test_statement_shape(cls) -> None:
+        """
+        Проверяет, что запросы с разным количеством параметров приводятся к одной форме.
+        """
+        assert get_statement_shape(
+            "SELECT id FROM users\n WHERE id IN ($1, $2, $3)"
+        ) == get_statement_shape("SELECT id FROM users WHERE id IN ($1)")
+
+    @classmethod
+    async def test_statements_counted_by_repository_method(
+        cls, db_helper: DBHelper, query_stats: QueryStats
+    ) -> None:
+        """
+        Проверяет, что запросы ленты учитываются и связываются с методом репозитория.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        query_stats: Статистика запросов теста
+        """
+        async with db_helper.session_factory() as session:
+            await TweetRepository.get_user_tweets(
+                session=session, offset=None, limit=None
+            )
+        assert query_stats.statements_count >= 1
+        assert (
+            query_stats.callers["TweetRepository.get_user_tweets"]
+            == query_stats.statements_count
+        )
+        assert query_stats.total_time > 0
+
+    @classmethod
+    async def test_repeated_statements_reported(
+        cls,
+        db_helper: DBHelper,
+        query_stats: QueryStats,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """
+        Проверяет, что повторяющиеся запросы и превышение бюджета попадают в лог.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        query_stats: Статистика запросов теста
+        caplog: Перехватчик логов
+        """
+        async with db_helper.session_factory() as session:
+            for user_id in range(1, 4):
+                await UserRepository.check_exists_object_by_params(
+                    session=session, data={"id": user_id}
+                )
+        with caplog.at_level(logging.WARNING):
+            query_stats.report(statement_budget=2, repeated_statement_limit=3)
+        messages = [record.getMessage() for record in caplog.records]
+        assert any("Statement budget exceeded (3 > 2)" in msg for msg in messages)
+        assert any(
+            "UserRepository.check_exists_object_by_params executed the same statement 3 times"
+            in msg
+            for msg in messages
+        )
@@ -0,0 +1,146 @@
+"""
+Модуль с тестами ранжирования ленты.
+Запускается после test_app.py и использует созданных там пользователей и твиты.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db_helper import db_helper
+from src.core.ranking import get_hot_score, hot_score_expression
+from src.models import TweetModel
+from src.repositories.tweets import TweetRepository
+from src.services.ranking_service import RankingService
+from src.services.user_tweet_service import LikeService
+
+NOW = datetime.now(timezone.utc)
+
+RANKED_TWEETS = [
+    (NOW - timedelta(days=3), [1, 2, 3]),
+    (NOW - timedelta(hours=2), [1]),
+    (NOW - timedelta(hours=1), []),
+]  # Дата создания твитов и пользователи, которые их лайкают
+
+
+@pytest.fixture(scope="class")
+async def ranked_tweets() -> AsyncGenerator[list[int], None]:
+    """
+    Создает твиты разного возраста с разным количеством лайков. После тестов удаляет их.
+
+    Возвращает идентификаторы твитов.
+    """
+    async with db_helper.session_factory() as session:
+        tweet_ids = []
+        for created_at, user_ids in RANKED_TWEETS:
+            tweet_id = await TweetRepository.create_object(
+                session=session,
+                data={"content": "ranked", "user_id": 1, "created_at": created_at},
+            )
+            for user_id in user_ids:
+                await LikeService.like_tweet(
+                    session=session, tweet_id=tweet_id, user_id=user_id
+                )
+            tweet_ids.append(tweet_id)
+        yield tweet_ids
+        for tweet_id in tweet_ids:
+            await TweetRepository.delete_object_by_params(
+                session=session, data={"id": tweet_id}
+            )
+
+
+@pytest.mark.usefixtures("ranked_tweets")
+class TestRanking:
+    """
+    Класс с тестами, нацеленными на ранжирование ленты.
+    """
+
+    @classmethod
+    async def test_hot_score_expression(cls, async_session: AsyncSession) -> None:
+        """
+        Проверяет, что горячесть в базе считается так же, как в Python,
+        и что твит на сутки новее обгоняет твит с десятикратно большим количеством лайков.
+
+        Параметры:
+
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        created_at = datetime(2026, 5, 17, 12, 30, tzinfo=timezone.utc)
+        score = await async_session.scalar(
+            select(hot_score_expression(literal(25), literal(created_at)))
+        )
+        assert abs(score - get_hot_score(25, created_at)) < 1e-9
+        assert get_hot_score(0, created_at) == get_hot_score(1, created_at)
+        day_before = created_at - timedelta(days=1)
+        assert get_hot_score(10, created_at) > get_hot_score(100, day_before)
+
+    @classmethod
+    async def test_sweep_fixes_like_counts(cls, async_session: AsyncSession) -> None:
+        """
+        Портит количество лайков и горячесть твитов.
+        Проверяет, что сверка возвращает значения, соответствующие таблице лайков.
+
+        Параметры:
+
+        async_session: Сессия для асинхронной работы с базой данных
+        """
+        tweets = (await async_session.scalars(select(TweetModel))).all()
+        expected = {tweet.id: tweet.like_count for tweet in tweets}
+        await async_session.execute(
+            update(TweetModel).values(like_count=TweetModel.like_count + 5, hot_score=0)
+        )
+        await async_session.commit()
+
+        fixed = await RankingService.sweep(session=async_session, batch_size=1)
+        assert fixed == len(tweets)
+        async_session.expire_all()
+        tweets = (await async_session.scalars(select(TweetModel))).all()
+        for tweet in tweets:
+            assert tweet.like_count == expected[tweet.id]
+            hot_score = get_hot_score(tweet.like_count, tweet.created_at)
+            assert abs(tweet.hot_score - hot_score) < 1e-9
+        assert await RankingService.sweep(session=async_session, batch_size=1) == 0
+
+    @classmethod
+    async def test_feed_sorts(
+        cls, ac: AsyncClient, async_session: AsyncSession, ranked_tweets: list[int]
+    ) -> None:
+        """
+        Проверяет порядок твитов в ленте для каждой сортировки.
+        Старый твит с тремя лайками первый по количеству лайков, но последний по горячести.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        async_session: Сессия для асинхронной работы с базой данных
+        ranked_tweets: Идентификаторы твитов разного возраста
+        """
+        tweets = (await async_session.scalars(select(TweetModel))).all()
+        orders = {
+            "hot": sorted(tweets, key=lambda t: (t.hot_score, t.id), reverse=True),
+            "top": sorted(
+                tweets, key=lambda t: (t.like_count, t.created_at, t.id), reverse=True
+            ),
+            "new": sorted(tweets, key=lambda t: (t.created_at, t.id), reverse=True),
+        }
+        for sort, expected in orders.items():
+            response = await ac.get(
+                "/api/tweets", params={"sort": sort}, headers={"api-key": "test"}
+            )
+            assert response.status_code == 200
+            assert [tweet["id"] for tweet in response.json()["tweets"]] == [
+                tweet.id for tweet in expected
+            ]
+        top = [tweet.id for tweet in orders["top"]]
+        hot = [tweet.id for tweet in orders["hot"]]
+        assert top.index(ranked_tweets[0]) == 0
+        assert hot.index(ranked_tweets[0]) > hot.index(ranked_tweets[1])
+
+        response = await ac.get(
+            "/api/tweets", params={"sort": "old"}, headers={"api-key": "test"}
+        )
+        assert response.status_code == 422
@@ -0,0 +1,163 @@
+"""
+Модуль с тестами распределения запросов на чтение между репликами.
+Вместо реплики используется та же тестовая база, поэтому второй экземпляр Postgres не нужен.
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.core.db_helper import DBHelper
+from src.core.settings import settings
+from src.repositories.users import UserFollowerRepository, UserRepository
+
+UNAVAILABLE_REPLICA_URL = (
+    make_url(settings.db.database_url)
+    .set(host="127.0.0.1", port=1)
+    .render_as_string(hide_password=False)
+)  # Строка для подключения к реплике, которая не отвечает
+
+
+@pytest.fixture()
+async def db_helper() -> DBHelper:
+    """
+    Возвращает помощника для работы с базой данных, у которого основная база служит и репликой.
+    """
+    helper = DBHelper(
+        url=settings.db.database_url,
+        replica_urls=[settings.db.database_url],
+        name="replicas",
+    )
+    yield helper
+    await helper.engine.dispose()
+    for engine in helper.replicas.engines:
+        await engine.dispose()
+
+
+@pytest.fixture()
+async def broken_db_helper() -> DBHelper:
+    """
+    Возвращает помощника для работы с базой данных, реплика которого недоступна.
+    """
+    helper = DBHelper(
+        url=settings.db.database_url,
+        replica_urls=[UNAVAILABLE_REPLICA_URL],
+        name="broken-replicas",
+    )
+    yield helper
+    await helper.engine.dispose()
+
+
+class TestReplicas:
+    """
+    Класс с тестами, нацеленными на выбор базы для выполнения запросов.
+    """
+
+    @classmethod
+    async def test_read_routed_to_replica(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что чтение профиля выполняется на реплике.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        async with db_helper.session_factory() as session:
+            await UserRepository.get_user_with_counts(session=session, user_id=1)
+            assert session.info["replica"] is db_helper.replicas.engines[0]
+            assert not session.info.get("primary_only")
+
+    @classmethod
+    async def test_read_after_write_stays_on_primary(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что после записи все чтения в сессии выполняются на основной базе.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        async with db_helper.session_factory() as session:
+            await UserFollowerRepository.create_object(
+                session=session,
+                data={"user_id": 3, "follower_id": 4},
+                commit_need=False,
+            )
+            followers = await UserFollowerRepository.get_followers_user(
+                session=session, user_id=3
+            )
+            assert 4 in [follower_id for follower_id, _ in followers]
+            assert session.info["primary_only"] is True
+            assert "replica" not in session.info
+            await session.rollback()
+
+    @classmethod
+    async def test_unavailable_replica_ejected(cls, broken_db_helper: DBHelper) -> None:
+        """
+        Проверяет, что недоступная реплика исключается, а чтение повторяется на основной базе.
+
+        Параметры:
+
+        broken_db_helper: Помощник для работы с базой данных с недоступной репликой
+        """
+        async with broken_db_helper.session_factory() as session:
+            user = await UserRepository.get_user_with_counts(session=session, user_id=1)
+        assert user.id == 1
+        assert broken_db_helper.replicas.healthy() == []
+
+    @classmethod
+    async def test_auth_read_stays_on_primary(cls, db_helper: DBHelper) -> None:
+        """
+        Проверяет, что поиск пользователя по токену выполняется на основной базе.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        async with db_helper.session_factory() as session:
+            user = await UserRepository.get_object_by_params(
+                session=session, data={"id": 1}
+            )
+            assert user.id == 1
+            assert "replica" not in session.info
+
+    @classmethod
+    async def test_failed_read_keeps_primary_transaction(
+        cls, db_helper: DBHelper
+    ) -> None:
+        """
+        Обрывает соединение с репликой в ее пуле посреди сессии. Проверяет, что чтение
+        повторяется на основной базе без отката ее транзакции, реплика исключается,
+        загруженные объекты остаются доступными, сессия коммитится,
+        а следующие чтения снова направляются на реплику.
+
+        Параметры:
+
+        db_helper: Помощник для работы с базой данных
+        """
+        replica = db_helper.replicas.engines[0]
+        async with db_helper.session_factory() as session:
+            user = await UserRepository.get_object_by_params(
+                session=session, data={"id": 1}
+            )
+            await UserRepository.get_user_with_counts(session=session, user_id=1)
+            async with replica.connect() as connection:
+                pid = (
+                    await connection.exec_driver_sql("SELECT pg_backend_pid()")
+                ).scalar()
+            async with db_helper.engine.connect() as other:
+                await other.execute(
+                    text("SELECT pg_terminate_backend(:pid)"), {"pid": pid}
+                )
+
+            profile = await UserRepository.get_user_with_counts(
+                session=session, user_id=1
+            )
+            assert profile.id == 1
+            assert user.name == profile.name
+            assert db_helper.replicas.healthy() == []
+            assert not session.info.get("primary_only")
+            await session.commit()
+
+            db_helper.replicas._ejected_until.clear()
+            await UserRepository.get_user_with_counts(session=session, user_id=1)
+            assert session.info["replica"] is replica
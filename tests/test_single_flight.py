@@ -0,0 +1,101 @@
+"""
+Модуль с тестами объединения одинаковых одновременных чтений.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from src.core.single_flight import SINGLE_FLIGHT_CALLS, SingleFlight
+
+
+class TestSingleFlight:
+    """
+    Класс с тестами, нацеленными на объединение одновременных чтений.
+    """
+
+    @classmethod
+    async def test_coalesce_calls(cls) -> None:
+        """
+        Проверяет, что одновременные вызовы с одним ключом выполняются один раз
+        и получают один результат или одно исключение, а вызовы с разными ключами - нет.
+        """
+        flight = SingleFlight("test")
+        calls = []
+
+        async def call(key: int) -> list[int]:
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            if key < 0:
+                raise ValueError(key)
+            return [key]
+
+        results = await asyncio.gather(
+            *[flight.run(key, lambda key=key: call(key)) for key in (1, 1, 2, 1)]
+        )
+        assert calls == [1, 2]
+        assert results == [[1], [1], [2], [1]]
+        assert results[0] is results[1] is results[3]
+        assert not flight.calls
+
+        errors = await asyncio.gather(
+            flight.run(-1, lambda: call(-1)),
+            flight.run(-1, lambda: call(-1)),
+            return_exceptions=True,
+        )
+        assert calls == [1, 2, -1]
+        assert errors[0] is errors[1]
+        assert isinstance(errors[0], ValueError)
+
+    @classmethod
+    async def test_cancellation(cls) -> None:
+        """
+        Проверяет, что отмена ожидающего вызова не отменяет общий вызов,
+        а после отмены первого вызова ожидающий выполняет вызов сам.
+        """
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        calls = 0
+
+        async def call() -> int:
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.01)
+            return calls
+
+        leader = asyncio.create_task(flight.run("key", call))
+        await started.wait()
+        follower = asyncio.create_task(flight.run("key", call))
+        await asyncio.sleep(0)
+        follower.cancel()
+        assert await leader == 1
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+        started.clear()
+        leader = asyncio.create_task(flight.run("key", call))
+        await started.wait()
+        follower = asyncio.create_task(flight.run("key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 3
+        assert leader.cancelled()
+
+    @classmethod
+    async def test_coalesce_profile_requests(cls, ac: AsyncClient) -> None:
+        """
+        Отправляет одновременные запросы профиля одного пользователя.
+        Проверяет, что ответы одинаковые, а часть запросов объединена.
+
+        Параметры:
+
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        coalesced = SINGLE_FLIGHT_CALLS.get(name="profile", result="coalesced")
+        responses = await asyncio.gather(*[ac.get("/api/users/1") for _ in range(10)])
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.text for response in responses}) == 1
+        assert SINGLE_FLIGHT_CALLS.get(name="profile", result="coalesced") > coalesced
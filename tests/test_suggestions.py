@@ -0,0 +1,136 @@
+"""
+Модуль с тестами рекомендаций подписок.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+from collections.abc import AsyncIterator
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.follow_graph import CompressedRows
+from src.core.suggestions import suggest
+from src.models import FollowSuggestionModel, UserModel
+from src.services.suggestion_service import SuggestionService
+from src.services.user_service import UserFollowerService, UserService
+
+# Подписки (подписчик, пользователь): 1 подписан на 2, 3 и 4, которые подписаны на 5, 6 и 7
+EDGES = [(1, 2), (1, 3), (1, 4), (2, 5), (2, 6), (3, 5), (3, 6), (4, 5), (4, 7), (4, 1)]
+
+
+async def generate(edges: list[tuple[int, int]]) -> AsyncIterator[tuple[int, int]]:
+    """
+    Отдает подписки по возрастанию пары.
+
+    Параметры:
+
+    edges: Пары (подписчик, пользователь)
+    """
+    for edge in sorted(edges):
+        yield edge
+
+
+@pytest.fixture()
+async def network(async_session: AsyncSession) -> AsyncGenerator[list[int], None]:
+    """
+    Создает пользователя, три его подписки и трех кандидатов, на которых подписаны подписки:
+    на первого кандидата - все три, на второго - две, на третьего - одна.
+    После теста удаляет пользователей вместе с подписками и рекомендациями.
+
+    Возвращает идентификаторы пользователя, подписок и кандидатов.
+    """
+    user_ids = []
+    for number in range(7):
+        user = await UserService.create_user(
+            session=async_session,
+            user_data={"name": f"member{number}", "token": f"member{number}"},
+        )
+        user_ids.append(user["id"])
+    for follower, user in EDGES[:-1]:
+        await UserFollowerService.subscribe_to_user(
+            session=async_session,
+            user_id=user_ids[user - 1],
+            follower_id=user_ids[follower - 1],
+        )
+    yield user_ids
+    await async_session.execute(delete(UserModel).filter(UserModel.id.in_(user_ids)))
+    await async_session.commit()
+
+
+class TestSuggestions:
+    """
+    Класс с тестами, нацеленными на рекомендации подписок.
+    """
+
+    @classmethod
+    async def test_suggest(cls) -> None:
+        """
+        Проверяет баллы и порядок рекомендаций, пропуск себя и своих подписок,
+        количество рекомендаций и прореживание строк.
+        """
+        rows = await CompressedRows.build(generate(EDGES))
+        assert suggest(rows, 1, limit=10, fanout_cap=10, candidate_cap=10) == [
+            (5, 3),
+            (6, 2),
+            (7, 1),
+        ]
+        assert suggest(rows, 1, limit=1, fanout_cap=10, candidate_cap=10) == [(5, 3)]
+        assert suggest(rows, 1, limit=10, fanout_cap=1, candidate_cap=10) == [
+            (5, 1),
+            (6, 1),
+        ]
+        assert suggest(rows, 1, limit=10, fanout_cap=10, candidate_cap=1) == [(5, 2)]
+        assert suggest(rows, 5, limit=10, fanout_cap=10, candidate_cap=10) == []
+        assert suggest(rows, 100, limit=10, fanout_cap=10, candidate_cap=10) == []
+
+    @classmethod
+    async def test_precompute_and_serve(
+        cls, async_session: AsyncSession, ac: AsyncClient, network: list[int]
+    ) -> None:
+        """
+        Рассчитывает рекомендации в пуле процессов.
+        Проверяет, что пользователь получает кандидатов по убыванию балла,
+        пользователь, на которого он подписался после расчета, пропускается,
+        а после отписки от всех рекомендации удаляются при следующем расчете.
+
+        Параметры:
+
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        network: Идентификаторы пользователя, подписок и кандидатов
+        """
+        user_id, *friends = network[:4]
+        candidates = network[4:]
+        assert await SuggestionService.precompute(session=async_session, workers=1) > 0
+        headers = {"api-key": "member0"}
+        response = await ac.get("/api/users/me/suggestions", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {
+            "result": True,
+            "users": [
+                {"id": candidates[0], "name": "member4", "score": 3},
+                {"id": candidates[1], "name": "member5", "score": 2},
+                {"id": candidates[2], "name": "member6", "score": 1},
+            ],
+        }
+
+        await UserFollowerService.subscribe_to_user(
+            session=async_session, user_id=candidates[0], follower_id=user_id
+        )
+        response = await ac.get("/api/users/me/suggestions", headers=headers)
+        assert [user["id"] for user in response.json()["users"]] == candidates[1:]
+
+        for followed_id in [*friends, candidates[0]]:
+            await UserFollowerService.unsubscribe_from_user(
+                session=async_session, user_id=followed_id, follower_id=user_id
+            )
+        await SuggestionService.precompute(session=async_session, workers=1)
+        remaining = await async_session.scalar(
+            select(func.count(FollowSuggestionModel.id)).filter(
+                FollowSuggestionModel.user_id == user_id
+            )
+        )
+        assert remaining == 0
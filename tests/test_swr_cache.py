@@ -0,0 +1,198 @@
+"""
+Модуль с тестами кэша, обновляющего устаревшие записи в фоне.
+Запускается после test_app.py и использует созданных там пользователей.
+"""
+
+import asyncio
+from contextlib import nullcontext
+
+import pytest
+from fixtures.fixtures import FakeClock
+from httpx import AsyncClient
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.settings import settings
+from src.core.swr_cache import SwrCache
+from src.services.user_service import UserFollowerService, profile_cache
+
+
+class FakeLoader:
+    """
+    Функция чтения значения, которая считает вызовы и может имитировать недоступную базу.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failing = False
+
+    async def __call__(self, session: AsyncSession | None) -> int:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.failing:
+            raise DBAPIError("SELECT 1", None, OSError("connection refused"))
+        return self.calls
+
+
+def make_cache(clock: FakeClock, stale_if_error: float = 30) -> SwrCache[int]:
+    """
+    Создает кэш со свежестью 10 секунд и сроком 60 секунд.
+
+    Параметры:
+
+    clock: Часы кэша
+    stale_if_error: Сколько секунд после срока запись отдается, если база недоступна
+    """
+    return SwrCache(
+        name="test",
+        soft_ttl=10,
+        hard_ttl=60,
+        stale_if_error=stale_if_error,
+        max_entries=10,
+        session_factory=lambda: nullcontext(None),
+        clock=clock,
+    )
+
+
+async def wait_refreshes(cache: SwrCache) -> None:
+    """
+    Ждет завершения фоновых обновлений кэша.
+
+    Параметры:
+
+    cache: Кэш
+    """
+    await asyncio.gather(*cache.refreshing.values())
+
+
+class TestSwrCache:
+    """
+    Класс с тестами, нацеленными на кэш, обновляющий устаревшие записи в фоне.
+    """
+
+    @classmethod
+    async def test_serve_stale_while_refreshing(cls) -> None:
+        """
+        Проверяет, что свежая запись отдается без чтения, устаревшая отдается сразу
+        и обновляется одной фоновой задачей, а после срока запрос ждет чтения.
+        """
+        clock, load = FakeClock(), FakeLoader()
+        cache = make_cache(clock)
+        assert await cache.get("key", None, load) == 1
+        clock.now = 5
+        assert await cache.get("key", None, load) == 1
+        assert load.calls == 1
+
+        clock.now = 15
+        results = [await cache.get("key", None, load) for _ in range(3)]
+        assert results == [1, 1, 1]
+        assert len(cache.refreshing) == 1
+        await wait_refreshes(cache)
+        assert await cache.get("key", None, load) == 2
+        assert load.calls == 2
+
+        clock.now = 100
+        assert await cache.get("key", None, load) == 3
+        assert not cache.refreshing
+
+    @classmethod
+    async def test_invalidate(cls) -> None:
+        """
+        Проверяет, что сброс делает запись устаревшей, но не удаляет ее,
+        обновление, начатое до сброса записи, не сохраняется,
+        а сброс другой записи его не затрагивает.
+        """
+        clock, load = FakeClock(), FakeLoader()
+        cache = make_cache(clock)
+        await cache.get("key", None, load)
+        cache.invalidate("key")
+        assert await cache.get("key", None, load) == 1
+        cache.invalidate()
+        await wait_refreshes(cache)
+        assert await cache.get("key", None, load) == 1
+        cache.invalidate("other")
+        await wait_refreshes(cache)
+        assert await cache.get("key", None, load) == 3
+        assert not cache.refreshing
+
+    @classmethod
+    async def test_drop(cls) -> None:
+        """
+        Проверяет, что после удаления записи запрос ждет чтения из базы,
+        а чтение, начатое до удаления, отдается своему запросу, но не сохраняется.
+        """
+        clock, load = FakeClock(), FakeLoader()
+        cache = make_cache(clock)
+        reading = asyncio.create_task(cache.get("key", None, load))
+        await asyncio.sleep(0)
+        cache.drop("key")
+        assert await reading == 1
+        assert "key" not in cache.entries
+        assert await cache.get("key", None, load) == 2
+        cache.drop("key")
+        assert await cache.get("key", None, load) == 3
+        assert load.calls == 3
+
+    @classmethod
+    @pytest.mark.parametrize("stale_if_error", [30, 0])
+    async def test_database_errors(cls, stale_if_error: float) -> None:
+        """
+        Проверяет, что при недоступной базе фоновое обновление оставляет прежнюю запись,
+        а после срока запись отдается еще stale_if_error секунд, затем запрос получает ошибку.
+
+        Параметры:
+
+        stale_if_error: Сколько секунд после срока запись отдается, если база недоступна
+        """
+        clock, load = FakeClock(), FakeLoader()
+        cache = make_cache(clock, stale_if_error=stale_if_error)
+        await cache.get("key", None, load)
+        load.failing = True
+        clock.now = 15
+        assert await cache.get("key", None, load) == 1
+        await wait_refreshes(cache)
+        assert cache.entries["key"].value == 1
+
+        clock.now = 70
+        if stale_if_error:
+            assert await cache.get("key", None, load) == 1
+        else:
+            with pytest.raises(DBAPIError):
+                await cache.get("key", None, load)
+        clock.now = 60 + stale_if_error
+        with pytest.raises(DBAPIError):
+            await cache.get("key", None, load)
+
+    @classmethod
+    async def test_profile_cache(
+        cls,
+        monkeypatch: pytest.MonkeyPatch,
+        async_session: AsyncSession,
+        ac: AsyncClient,
+    ) -> None:
+        """
+        Включает кэш профилей. Проверяет, что сразу после подписки и отписки
+        профиль отдается с новым количеством подписчиков.
+
+        Параметры:
+
+        monkeypatch: Фикстура для временной подмены атрибутов
+        async_session: Сессия для асинхронной работы с базой данных
+        ac: Клиент для асинхронного взаимодействия с приложением
+        """
+        monkeypatch.setattr(settings.db, "profile_cache_enabled", True)
+        monkeypatch.setattr(
+            profile_cache, "session_factory", lambda: nullcontext(async_session)
+        )
+        profile_cache.clear()
+        before = (await ac.get("/api/users/4")).json()
+        await UserFollowerService.subscribe_to_user(
+            session=async_session, user_id=4, follower_id=3
+        )
+        after = (await ac.get("/api/users/4")).json()
+        assert after["user"]["followers_count"] == before["user"]["followers_count"] + 1
+        await UserFollowerService.unsubscribe_from_user(
+            session=async_session, user_id=4, follower_id=3
+        )
+        assert (await ac.get("/api/users/4")).json() == before
+        profile_cache.clear()